@@ -0,0 +1,103 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Calls in flight per backend in the asyncio orchestration mode. The MetaTrader5 terminal API is not
+# thread-safe, so its calls are serialized; ArcticDB releases the GIL during storage I/O and (de)compression,
+# so many uploads and metadata reads can overlap; feature computation holds the GIL for most of its time.
+DEFAULT_CONCURRENCY: Dict[str, int] = {
+    'mt5': 1,
+    'storage': 8,
+    'compute': 2,
+}
+
+# Symbols between the start of their fetch and the end of their store per compute slot in the asyncio
+# run: one being computed and one fetched ahead of it. Fetches are faster than computation, so without
+# this bound every fetched frame of the universe would wait in memory for a compute slot
+FRAMES_PER_COMPUTE_SLOT = 2
+
+# Symbols fetched and computed together in one panel by the asyncio run with `panel`
+DEFAULT_PANEL_BATCH = 64
+
+class AsyncBackend:
+    """
+    Run blocking calls of one backend from asyncio, in a dedicated thread pool sized to the backend's limit.
+    """
+
+    def __init__(self, name: str, max_concurrency: int) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            name (str): Name of the backend, used for the thread names.
+            max_concurrency (int): Maximum number of calls running at the same time.
+        """
+        self.name = name
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"etl-{name}")
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` in the backend's pool and wait for its result. Calls beyond the
+        concurrency limit queue in the pool.
+        """
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, min(self.in_flight, self.max_concurrency))
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"max_concurrency": self.max_concurrency, "calls": self.calls, "peak_in_flight": self.peak_in_flight}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+class AsyncBackends:
+    """
+    The backends of one asyncio run, by name ('mt5', 'storage', 'compute').
+    """
+
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None) -> None:
+        """
+        Args:
+            concurrency (Dict[str, int], optional): Limits overriding DEFAULT_CONCURRENCY per backend.
+        """
+        limits = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.backends = {name: AsyncBackend(name, limit) for name, limit in limits.items()}
+
+    def __getattr__(self, name: str) -> AsyncBackend:
+        try:
+            return self.__dict__['backends'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: backend.stats() for name, backend in self.backends.items()}
+
+    @property
+    def frames_in_flight(self) -> int:
+        """
+        Symbols a run may hold in memory at once, see FRAMES_PER_COMPUTE_SLOT.
+        """
+        return self.compute.max_concurrency * FRAMES_PER_COMPUTE_SLOT
+
+    def shutdown(self) -> None:
+        for backend in self.backends.values():
+            backend.shutdown()
+
+    def __enter__(self) -> 'AsyncBackends':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
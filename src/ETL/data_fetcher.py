@@ -1,27 +1,46 @@
 import datetime
 import pandas as pd
-import MetaTrader5 as mt5
 import logging
-from retry import retry
+from typing import Any, Dict, List, Optional
+
+from ETL import mt5_session
+from ETL.mt5_session import Mt5Session
 
 logger = logging.getLogger(__name__)
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, session: Optional[Mt5Session] = None):
         """
-        Initialize the DataFetcher by setting up the MetaTrader5 connection.
-        
+        Initialize the DataFetcher. Calls go through the MetaTrader5 session of the process (see
+        mt5_session), which initializes and logs in to the terminal once, on first use, so constructing
+        the fetcher (or unpickling it in a worker process) is cheap.
+
+        Args:
+            session (Mt5Session, optional): Session to use instead of the one of the process.
+        """
+        self._session = session
+
+    def __getstate__(self):
+        # A connection belongs to a process, worker processes use their own session
+        state = self.__dict__.copy()
+        state['_session'] = None
+        return state
+
+    @property
+    def session(self) -> Mt5Session:
+        return self._session or mt5_session.session
+
+    def connect(self) -> None:
+        """
+        Connect the session to MetaTrader5 unless this process already did.
+
         Raises:
             RuntimeError: If MetaTrader5 initialization fails.
         """
-        if not mt5.initialize():
-            logger.error("Failed to initialize MetaTrader5")
-            raise RuntimeError("MetaTrader5 initialization failed")
-        else:
-            logger.info("MetaTrader5 initialized successfully")
-    
-    @retry(tries=2, delay=2, backoff=2)
-    def fetch_data(self, symbol: str, start_time: datetime.datetime, end_time: datetime.datetime) -> pd.DataFrame:
+        self.session.connect()
+
+    def fetch_data(self, symbol: str, start_time: datetime.datetime, end_time: datetime.datetime,
+                   warmup_bars: int = 0) -> pd.DataFrame:
         """
         Fetch base historical data (open, high, low, close, tick_volume, spread) for a given symbol between start_time and end_time.
         
@@ -29,22 +48,47 @@ class DataFetcher:
             symbol (str): The financial instrument symbol to fetch data for.
             start_time (datetime.datetime): The start time for the data range.
             end_time (datetime.datetime): The end time for the data range.
+            warmup_bars (int): Number of bars before start_time to prepend, counted in bars rather than
+                               minutes so that sessions with gaps still get the history features need.
         
         Returns:
             pd.DataFrame: A DataFrame containing the historical data with time as the index.
                           Returns an empty DataFrame if no data is fetched.
         """
         logger.info(f"Fetching data for {symbol} from {start_time} to {end_time}")
-        
-        # Ensure MetaTrader5 is initialized before fetching data
-        if not mt5.initialize():
-            logger.error("MetaTrader5 re-initialization failed")
-            return pd.DataFrame()
-        
-        rates = mt5.copy_rates_range(symbol, mt5.TIMEFRAME_M1, start_time, end_time)
+
+        # The session connects on first use and reconnects only if a call fails on the connection
+        session = self.session
+        rates = session.call('copy_rates_range', symbol, session.mt5.TIMEFRAME_M1, start_time, end_time, symbol=symbol)
         if rates is None:
             logger.warning(f"No data returned for {symbol} from MetaTrader5.")
             return pd.DataFrame()
+        df = self.rates_to_frame(rates)
+        if df.empty or warmup_bars <= 0:
+            return df
+
+        # Bars are counted back from start_time, one extra bar covers a bar opening exactly at start_time
+        warmup_rates = session.call('copy_rates_from', symbol, session.mt5.TIMEFRAME_M1, start_time, warmup_bars + 1,
+                                    symbol=symbol)
+        if warmup_rates is None:
+            logger.warning(f"No warm-up data returned for {symbol} from MetaTrader5.")
+            return df
+        warmup = self.rates_to_frame(warmup_rates)
+        warmup = warmup[warmup.index < df.index[0]].tail(warmup_bars)
+        logger.info(f"Prepended {len(warmup)} warm-up bars for {symbol}")
+        return pd.concat([warmup, df])
+
+    @staticmethod
+    def rates_to_frame(rates) -> pd.DataFrame:
+        """
+        Convert the structured array returned by MetaTrader5 into a DataFrame indexed by time.
+
+        Args:
+            rates: Rates as returned by copy_rates_range / copy_rates_from.
+
+        Returns:
+            pd.DataFrame: The bars with a DatetimeIndex named 'time'.
+        """
         df = pd.DataFrame(rates).drop('real_volume', axis=1, errors='ignore')  # Vantage's 'real_volume' is populated with 0 
         if df.empty:
             return df
@@ -61,11 +105,14 @@ class DataFetcher:
             symbol (str): The financial instrument symbol to retrieve information for.
 
         Returns:
-            dict: A dictionary containing the symbol information, currently includes 'name', 'description', and 'last_timestamp'.
-                  Returns an empty dictionary if the symbol is not found.
+            dict: A dictionary containing the symbol information: 'name', 'description', the quote precision
+                  'digits' and 'point', and 'last_timestamp'.
+
+        Raises:
+            ValueError: If the symbol is not found.
         """
 
-        info = mt5.symbol_info(symbol)
+        info = self.session.call('symbol_info', symbol, symbol=symbol)
         if info is None:
             logger.error(f"Symbol {symbol} not found in MetaTrader5.")
             raise ValueError(f"Symbol {symbol} not found.")
@@ -73,6 +120,24 @@ class DataFetcher:
         return {
             "name": info_dict.get('name'),
             "description": info_dict.get('description'),
+            "digits": info_dict.get('digits'),
+            "point": info_dict.get('point'),
             'last_timestamp': None,
             # Add other necessary information as needed, info_dict contains a lot other information
-        }
\ No newline at end of file
+        }
+
+    def get_symbols(self, group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the full information of many symbols in one MetaTrader5 call.
+
+        Args:
+            group (str, optional): MetaTrader5 group filter, e.g. '*USD*' or '*,!*ft', all symbols if None.
+
+        Returns:
+            List[Dict[str, Any]]: The fields of `mt5.symbol_info` per symbol.
+        """
+        symbols = self.session.call('symbols_get', group=group) if group else self.session.call('symbols_get')
+        if symbols is None:
+            logger.error(f"Symbol discovery failed: {self.session.mt5.last_error()}")
+            return []
+        return [info._asdict() for info in symbols]
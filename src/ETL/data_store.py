@@ -1,34 +1,72 @@
-import arcticdb as adb
 import pandas as pd
 import os
 import logging
-from dotenv import load_dotenv
+from typing import Dict, List, Optional, Tuple
+
+from ETL.price_codec import PriceCodec
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Key of the ArcticDB symbol metadata holding the timestamp of the last stored row
+WATERMARK_KEY = 'last_timestamp'
+WATERMARK_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 class DataStore:
     _arctic_instance = None  # Class-level variable to store the single Arctic instance
-    def __init__(self, library_name: str) -> None:
+    _uri_instances: Dict[str, 'adb.Arctic'] = {}  # Arctic instances for explicit URIs (e.g. a local LMDB store)
+    def __init__(self, library_name: str, uri: Optional[str] = None, dtype_policy: Optional['DtypePolicy'] = None) -> None:
         """
-        Initialize the DataStore with a specified library name and normalization option.
+        Initialize the DataStore with a specified library name. ArcticDB is imported and connected
+        on first access to `lib`, so creating a store is cheap.
 
         Args:
             library_name (str): The name of the library to store data in.
+            uri (str, optional): ArcticDB URI to connect to instead of the S3 bucket from the environment.
+            dtype_policy (DtypePolicy, optional): Policy the symbols were stored with; calendar columns
+                                                  it does not persist are derived again on every read.
         """
-        if DataStore._arctic_instance is None:
-            DataStore._arctic_instance = self._initialize_arcticdb()
+        self.uri = uri
         self.library_name = library_name
-        self.lib = DataStore._arctic_instance.get_library(self.library_name, create_if_missing=True)
+        self.dtype_policy = dtype_policy
+        self._lib = None
+
+    def __getstate__(self):
+        # Worker processes open their own connection on first use
+        state = self.__dict__.copy()
+        state['_lib'] = None
+        return state
 
-    def _initialize_arcticdb(self) -> adb.Arctic:
+    @property
+    def lib(self):
+        """
+        The ArcticDB library, connecting on first access.
+        """
+        if self._lib is None:
+            import arcticdb as adb
+            if self.uri is not None:
+                if self.uri not in DataStore._uri_instances:
+                    DataStore._uri_instances[self.uri] = adb.Arctic(self.uri)
+                arctic = DataStore._uri_instances[self.uri]
+            else:
+                if DataStore._arctic_instance is None:
+                    DataStore._arctic_instance = self._initialize_arcticdb()
+                arctic = DataStore._arctic_instance
+            self._lib = arctic.get_library(self.library_name, create_if_missing=True)
+        return self._lib
+
+    def _initialize_arcticdb(self) -> 'adb.Arctic':
         """
         Initialize the ArcticDB connection to AWS S3 using credentials from environment variables.
 
         Returns:
             adb.Arctic: An instance of ArcticDB connected to AWS S3.
         """
-        load_dotenv()
+        import arcticdb as adb
+        if not os.getenv('S3_BUCKET_NAME'):
+            # Standalone use, the ETL entry point has already loaded the .env file
+            from dotenv import load_dotenv
+            load_dotenv()
         # Retrieve configurations from environment variables
         aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
         aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -61,33 +99,91 @@ class DataStore:
             logger.error(f"Failed to connect to ArcticDB at {connection_string} : {e}")
             raise e
         
-    def store_data(self, symbol: str, df: pd.DataFrame) -> None:
+    def store_data(self, symbol: str, df: pd.DataFrame, metadata: Optional[dict] = None, replace: bool = False,
+                   price_digits: Optional[int] = None) -> None:
         """
         Store data for a given symbol in the ArcticDB library.
 
+        The rows replace any stored rows in the same date range (the symbol is created if missing), and the
+        watermark of the new version is written as symbol metadata in the same call, so the watermark can
+        never point past the data that is actually stored.
+
+        With `price_digits`, the OHLC columns are stored as integer point counts (see ETL/price_codec.py)
+        and decoded again by the retrieve methods. The encoding is chosen when the symbol is written from
+        scratch: updates of a symbol keep its stored encoding whatever `price_digits` is (None included),
+        a float symbol needs a `replace` to be encoded.
+
         Args:
             symbol (str): The financial instrument symbol.
             df (pd.DataFrame): The DataFrame containing the data to be stored.
+            metadata (dict, optional): Additional symbol metadata stored with the version.
+            replace (bool): Replace the whole stored history of the symbol with `df` (used by recomputes).
+            price_digits (int, optional): Decimal digits of the symbol's prices, enables the fixed-point codec.
         """
+        metadata = dict(metadata or {})
+        if not df.empty:
+            metadata[WATERMARK_KEY] = df.index.max().strftime(WATERMARK_FORMAT)
         try:
-            self.lib.write(symbol, df)
+            codec = self._price_codec(symbol, price_digits, replace)
+            if codec is not None:
+                df = codec.encode(df)
+                metadata.update(codec.to_metadata())
+            if replace:
+                self.lib.write(symbol, df, metadata=metadata)
+            else:
+                self.lib.update(symbol, df, metadata=metadata, upsert=True)
             logger.info(f"Stored data for symbol: {symbol} in library: {self.library_name}")
         except Exception as e:
             logger.error(f"Failed to store data for symbol {symbol} in library {self.library_name}: {e}")
             raise e
 
-    def retrieve_data(self, symbol: str) -> pd.DataFrame:
+    def _price_codec(self, symbol: str, digits: Optional[int], replace: bool) -> Optional[PriceCodec]:
+        """
+        The codec of the next write of a symbol: a new one for a symbol written from scratch with `digits`,
+        the stored one for an update (an encoded symbol cannot take float prices), None otherwise.
+        """
+        if replace or not self.lib.has_symbol(symbol):
+            return PriceCodec(digits) if digits is not None else None
+        codec = PriceCodec.from_metadata(self.lib.read_metadata(symbol).metadata)
+        if codec is None and digits is not None:
+            logger.info(f"{symbol} prices are stored as float in {self.library_name}, recompute it to encode them")
+        return codec
+
+    def _decoded(self, item, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        # The data of a read version, with fixed-point prices turned back into floats and the
+        # calendar columns the dtype policy does not persist derived from the index
+        codec = PriceCodec.from_metadata(item.metadata)
+        data = codec.decode(item.data) if codec is not None else item.data
+        if self.dtype_policy is not None and not self.dtype_policy.persist_derivable:
+            data = self.dtype_policy.restore(data, columns)
+        return data
+
+    def stored_dtypes(self, symbol: str) -> Optional[pd.Series]:
+        """
+        Column dtypes of a stored symbol as written (prices decoded, no derived columns), which the rows
+        appended to it must keep; None if the symbol does not exist.
+        """
+        if not self.lib.has_symbol(symbol):
+            return None
+        item = self.lib.head(symbol, 0)
+        codec = PriceCodec.from_metadata(item.metadata)
+        return (codec.decode(item.data) if codec is not None else item.data).dtypes
+
+    def retrieve_data(self, symbol: str, columns: Optional[List[str]] = None,
+                      date_range: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None) -> pd.DataFrame:
         """
         Retrieve data for a given symbol from the ArcticDB library.
 
         Args:
             symbol (str): The financial instrument symbol.
+            columns (List[str], optional): Only read these columns (missing ones are ignored), all if None.
+            date_range (Tuple[pd.Timestamp, pd.Timestamp], optional): Only read rows within this inclusive range.
 
         Returns:
             pd.DataFrame: The DataFrame containing the retrieved data.
         """
         try:
-            data = self.lib.read(symbol).data
+            data = self._decoded(self.lib.read(symbol, columns=columns, date_range=date_range), columns)
             logger.info(f"Retrieved data for symbol: {symbol} from library: {self.library_name}")
             return data
         except KeyError:
@@ -95,4 +191,134 @@ class DataStore:
             return pd.DataFrame()
         except Exception as e:
             logger.error(f"Failed to retrieve data for symbol {symbol} from library {self.library_name}: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    def delete_range(self, symbol: str, date_range: Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]) -> None:
+        """
+        Delete the rows of a symbol within an inclusive date range, e.g. history moved to a cold tier.
+        Previous versions are pruned so that the deleted rows stop taking space in the library; the
+        symbol metadata (watermark) is kept.
+
+        Args:
+            symbol (str): The financial instrument symbol.
+            date_range (Tuple): Inclusive start and end, None for an open end.
+        """
+        try:
+            self.lib.delete_data_in_range(symbol, date_range, prune_previous_versions=True)
+            logger.info(f"Deleted rows {date_range} of symbol {symbol} from library {self.library_name}")
+        except Exception as e:
+            logger.error(f"Failed to delete rows of symbol {symbol} from library {self.library_name}: {e}")
+            raise e
+
+    def list_symbols(self) -> List[str]:
+        """
+        List the symbols stored in the library.
+        """
+        return sorted(self.lib.list_symbols())
+
+    def retrieve_batch(self, symbols: List[str], columns: Optional[List[str]] = None,
+                       date_range: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Retrieve the same columns and date range of many symbols in one batched read.
+
+        Args:
+            symbols (List[str]): Symbols to read.
+            columns (List[str], optional): Only read these columns (missing ones are ignored), all if None.
+            date_range (Tuple[pd.Timestamp, pd.Timestamp], optional): Only read rows within this inclusive range.
+
+        Returns:
+            Dict[str, pd.DataFrame]: The non-empty frames per symbol, symbols without data are left out.
+        """
+        import arcticdb as adb
+        requests = [adb.ReadRequest(symbol, columns=columns, date_range=date_range) for symbol in symbols]
+        frames = {}
+        for symbol, item in zip(symbols, self.lib.read_batch(requests)):
+            if isinstance(item, adb.VersionedItem) and not item.data.empty:
+                frames[symbol] = self._decoded(item, columns)
+        return frames
+
+    def retrieve_tail(self, symbol: str, n: int = 1) -> pd.DataFrame:
+        """
+        Retrieve the last `n` rows of a symbol without reading the whole symbol.
+
+        Args:
+            symbol (str): The financial instrument symbol.
+            n (int): Number of rows to retrieve.
+
+        Returns:
+            pd.DataFrame: The last rows, empty if the symbol has no stored data.
+        """
+        try:
+            return self._decoded(self.lib.tail(symbol, n))
+        except Exception as e:
+            logger.error(f"Failed to retrieve tail for symbol {symbol} from library {self.library_name}: {e}")
+            return pd.DataFrame()
+
+    def get_watermark(self, symbol: str) -> Optional[pd.Timestamp]:
+        """
+        Get the timestamp of the last stored row of a symbol.
+
+        Args:
+            symbol (str): The financial instrument symbol.
+
+        Returns:
+            Optional[pd.Timestamp]: The watermark, or None if the symbol has no stored data.
+        """
+        return self.get_watermarks([symbol])[symbol]
+
+    def get_watermarks(self, symbols: Optional[List[str]] = None) -> Dict[str, Optional[pd.Timestamp]]:
+        """
+        Get the watermarks of many symbols with a single batched metadata request.
+
+        Symbols written before watermarks were kept in the metadata fall back to the index range
+        of their description, which is also answered in one batched request.
+
+        Args:
+            symbols (List[str], optional): Symbols to look up, all symbols of the library if None.
+
+        Returns:
+            Dict[str, Optional[pd.Timestamp]]: Watermark per symbol, None for symbols without stored data.
+        """
+        import arcticdb as adb
+        if symbols is None:
+            symbols = self.lib.list_symbols()
+        watermarks: Dict[str, Optional[pd.Timestamp]] = {symbol: None for symbol in symbols}
+        if not symbols:
+            return watermarks
+
+        missing_metadata = []
+        for symbol, item in zip(symbols, self.lib.read_metadata_batch(symbols)):
+            if isinstance(item, adb.VersionedItem):
+                metadata = item.metadata or {}
+                if metadata.get(WATERMARK_KEY):
+                    watermarks[symbol] = pd.Timestamp(metadata[WATERMARK_KEY])
+                else:
+                    missing_metadata.append(symbol)
+
+        if missing_metadata:
+            for symbol, description in zip(missing_metadata, self.lib.get_description_batch(missing_metadata)):
+                if isinstance(description, adb.library.SymbolDescription) and description.row_count > 0:
+                    watermarks[symbol] = pd.Timestamp(description.date_range[1]).tz_localize(None)
+        logger.info(f"Retrieved watermarks for {len(symbols)} symbols from library: {self.library_name}")
+        return watermarks
+
+    def get_first_timestamps(self, symbols: List[str]) -> Dict[str, Optional[pd.Timestamp]]:
+        """
+        Get the timestamp of the first stored row of many symbols with a single batched request.
+
+        Args:
+            symbols (List[str]): Symbols to look up.
+
+        Returns:
+            Dict[str, Optional[pd.Timestamp]]: First timestamp per symbol, None for symbols without stored data.
+        """
+        import arcticdb as adb
+        first_timestamps: Dict[str, Optional[pd.Timestamp]] = {symbol: None for symbol in symbols}
+        if not symbols:
+            return first_timestamps
+        existing = set(self.lib.list_symbols())
+        stored = [symbol for symbol in symbols if symbol in existing]
+        for symbol, description in zip(stored, self.lib.get_description_batch(stored) if stored else []):
+            if isinstance(description, adb.library.SymbolDescription) and description.row_count > 0:
+                first_timestamps[symbol] = pd.Timestamp(description.date_range[0]).tz_localize(None)
+        return first_timestamps
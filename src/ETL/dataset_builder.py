@@ -0,0 +1,251 @@
+import datetime
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ETL.data_store import DataStore
+from ETL.instrumentation import registry, frame_bytes
+from ETL.universal_stream import BAR, DEFAULT_MEMORY_LIMIT_MB
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.json'
+
+# Copies of a block alive while it is aligned: the per-symbol reads and the aligned rows
+BLOCK_OVERHEAD = 2
+
+class DatasetBuilder:
+    """
+    Build training datasets from the feature libraries without holding them in memory.
+
+    The selected columns of the selected symbols are read one time block at a time, aligned point in time
+    on the union of their timestamps and written to memory-mapped NumPy shards, one per block, described
+    by an index file (see Dataset). A symbol without a bar at a timestamp takes its last earlier row,
+    carried across blocks, so a row never contains values from later bars of any symbol; with a
+    `tolerance`, rows older than that are left NaN instead of going stale.
+    """
+
+    def __init__(self, source: DataStore, universal: Optional[DataStore] = None,
+                 universal_symbol: str = 'Universal_Features', memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB,
+                 dtype: str = 'float32', bar: pd.Timedelta = BAR) -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            source (DataStore): Store of the symbol-specific features.
+            universal (DataStore, optional): Store of the universal features, needed for universal columns.
+            universal_symbol (str): Symbol of the universal features in their store.
+            memory_limit_mb (float): Ceiling for the data read and aligned per block.
+            dtype (str): Value dtype of the shards.
+            bar (pd.Timedelta): Bar size, used to convert rows into block durations.
+        """
+        self.source = source
+        self.universal = universal
+        self.universal_symbol = universal_symbol
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+        self.dtype = np.dtype(dtype)
+        self.bar = bar
+
+    def block_length(self, columns: int) -> pd.Timedelta:
+        """
+        Duration of a block whose `columns` float64 values per timestamp fit the memory ceiling.
+        """
+        rows = self.memory_limit_bytes // (max(columns, 1) * 8 * BLOCK_OVERHEAD)
+        return max(int(rows), 1) * self.bar
+
+    def build(self, output_dir: str, symbols: List[str], columns: List[str], start: datetime.datetime,
+              end: datetime.datetime, universal_columns: Optional[List[str]] = None,
+              tolerance: Optional[pd.Timedelta] = None, overwrite: bool = False) -> Dict[str, Any]:
+        """
+        Write the dataset of `symbols` x `columns` (plus the universal columns) from `start` to `end` (inclusive).
+
+        Args:
+            output_dir (str): Directory of the shards and the index file.
+            symbols (List[str]): Symbols, in column order.
+            columns (List[str]): Symbol-specific columns read for every symbol.
+            start (datetime.datetime): First timestamp.
+            end (datetime.datetime): Last timestamp.
+            universal_columns (List[str], optional): Columns of the universal features.
+            tolerance (pd.Timedelta, optional): Oldest row carried forward to a timestamp; rows before
+                                                `start` within the tolerance are carried into the first block.
+            overwrite (bool): Replace an existing dataset in `output_dir`.
+
+        Returns:
+            Dict[str, Any]: Number of shards and rows written and the largest block in bytes.
+
+        Raises:
+            FileExistsError: If `output_dir` already holds a dataset and `overwrite` is False.
+        """
+        index_path = os.path.join(output_dir, INDEX_FILE)
+        if os.path.exists(index_path):
+            if not overwrite:
+                raise FileExistsError(f"A dataset already exists in {output_dir}")
+            Dataset(output_dir).remove()
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Every input is (store, symbol, columns), the layout is input-major: all columns of a symbol are adjacent
+        inputs: List[Tuple[DataStore, str, List[str]]] = [(self.source, symbol, list(columns)) for symbol in symbols]
+        if universal_columns:
+            if self.universal is None:
+                raise ValueError("Universal columns need the universal store")
+            inputs.append((self.universal, self.universal_symbol, list(universal_columns)))
+        layout = [(symbol, column) for _, symbol, input_columns in inputs for column in input_columns]
+
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        carry: Dict[str, pd.DataFrame] = {}
+        if tolerance is not None:
+            carry = self._read(inputs, (start - tolerance, start - pd.Timedelta(1, 'ns')))
+            carry = {symbol: df.iloc[-1:] for symbol, df in carry.items()}
+
+        stats: Dict[str, Any] = {"shards": 0, "rows": 0, "peak_block_bytes": 0}
+        shards: List[Dict[str, Any]] = []
+        block = self.block_length(len(layout))
+        block_start = start
+        logger.info(f"Building a dataset of {len(inputs)} inputs x {len(layout)} columns from {start} to {end} "
+                    f"in blocks of {block}")
+        while block_start <= end:
+            block_end = min(block_start + block, end + pd.Timedelta(1, 'ns'))  # exclusive
+            with registry.stage('dataset_block') as metrics:
+                frames = self._read(inputs, (block_start, block_end - pd.Timedelta(1, 'ns')))
+                block_bytes = sum(frame_bytes(df) for df in frames.values())
+                if block_bytes > self.memory_limit_bytes and block > self.bar:
+                    # Denser than estimated, retry the same start with half the duration
+                    block = max(pd.Timedelta(block.value // 2), self.bar)
+                    logger.warning(f"Dataset block of {block_bytes} bytes exceeds the memory limit, shrinking blocks to {block}")
+                    continue
+                shard = self._write_shard(output_dir, len(shards), inputs, frames, carry, tolerance)
+                metrics.update(rows=shard["rows"] if shard else 0, bytes=block_bytes)
+            if shard:
+                shards.append(shard)
+                stats["rows"] += shard["rows"]
+            del frames
+            stats["peak_block_bytes"] = max(stats["peak_block_bytes"], block_bytes)
+            block_start = block_end
+        stats["shards"] = len(shards)
+
+        index = {
+            "columns": layout,
+            "dtype": self.dtype.str,
+            "start": str(start),
+            "end": str(end),
+            "tolerance_minutes": tolerance / pd.Timedelta(minutes=1) if tolerance is not None else None,
+            "rows": stats["rows"],
+            "shards": shards,
+        }
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, index_path)  # the dataset is only visible once complete
+        logger.info(f"Dataset written to {output_dir}: {stats}")
+        return stats
+
+    def _read(self, inputs: List[Tuple[DataStore, str, List[str]]],
+              date_range: Tuple[pd.Timestamp, pd.Timestamp]) -> Dict[str, pd.DataFrame]:
+        # One batched read per store and column set
+        groups: Dict[Tuple[int, Tuple[str, ...]], Tuple[DataStore, List[str]]] = {}
+        for store, symbol, columns in inputs:
+            groups.setdefault((id(store), tuple(columns)), (store, []))[1].append(symbol)
+        frames = {}
+        for (_, columns), (store, symbols) in groups.items():
+            frames.update(store.retrieve_batch(symbols, list(columns), date_range))
+        return frames
+
+    def _write_shard(self, output_dir: str, number: int, inputs: List[Tuple[DataStore, str, List[str]]],
+                     frames: Dict[str, pd.DataFrame], carry: Dict[str, pd.DataFrame],
+                     tolerance: Optional[pd.Timedelta]) -> Optional[Dict[str, Any]]:
+        """
+        Align a block on the union of its timestamps into a new shard, updating the carried rows.
+        """
+        timeline = None
+        for df in frames.values():
+            timeline = df.index if timeline is None else timeline.union(df.index)
+        if timeline is None or not len(timeline):
+            return None
+
+        name = f"shard_{number:05d}"
+        columns = sum(len(input_columns) for _, _, input_columns in inputs)
+        values = np.lib.format.open_memmap(os.path.join(output_dir, f"{name}.npy"), mode='w+',
+                                           dtype=self.dtype, shape=(len(timeline), columns))
+        offset = 0
+        for _, symbol, input_columns in inputs:
+            target = values[:, offset:offset + len(input_columns)]
+            offset += len(input_columns)
+            parts = [df for df in (carry.get(symbol), frames.get(symbol)) if df is not None and not df.empty]
+            if not parts:
+                target[:] = np.nan
+                continue
+            df = pd.concat(parts) if len(parts) > 1 else parts[0]
+            # Last row at or before every timestamp, never a later one
+            positions = df.index.searchsorted(timeline, side='right') - 1
+            valid = positions >= 0
+            positions = positions.clip(0)
+            if tolerance is not None:
+                valid &= (timeline - df.index[positions]) <= tolerance
+            rows = df.reindex(columns=input_columns).to_numpy(dtype='float64', na_value=np.nan)[positions]
+            rows[~valid] = np.nan
+            target[:] = rows
+            carry[symbol] = df.iloc[-1:]
+        values.flush()
+        del values
+        np.save(os.path.join(output_dir, f"{name}_timestamps.npy"), timeline.asi8)
+        return {"values": f"{name}.npy", "timestamps": f"{name}_timestamps.npy", "rows": len(timeline),
+                "start": str(timeline[0]), "end": str(timeline[-1])}
+
+class Dataset:
+    """
+    A dataset written by DatasetBuilder: shards of (timestamps x columns) values, opened memory-mapped so
+    that training jobs only page in what they read.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Directory holding the index file and the shards.
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index: Dict[str, Any] = json.load(f)
+        self.columns: List[Tuple[str, str]] = [tuple(column) for column in self.index["columns"]]
+        self.shards: List[Dict[str, Any]] = self.index["shards"]
+
+    def __len__(self) -> int:
+        return self.index["rows"]
+
+    def positions(self, symbol: Optional[str] = None, column: Optional[str] = None) -> List[int]:
+        """
+        Column positions of a symbol, of a column across symbols, or of both.
+        """
+        return [i for i, (s, c) in enumerate(self.columns)
+                if (symbol is None or s == symbol) and (column is None or c == column)]
+
+    def shard(self, number: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The timestamps (datetime64[ns]) and the memory-mapped values of a shard.
+        """
+        shard = self.shards[number]
+        timestamps = np.load(os.path.join(self.path, shard["timestamps"])).view('datetime64[ns]')
+        return timestamps, np.load(os.path.join(self.path, shard["values"]), mmap_mode='r')
+
+    def frame(self, number: int, positions: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        A shard as a DataFrame with (symbol, column) columns, optionally only some column positions.
+        """
+        timestamps, values = self.shard(number)
+        positions = list(range(len(self.columns))) if positions is None else positions
+        return pd.DataFrame(values[:, positions], index=pd.DatetimeIndex(timestamps),
+                            columns=pd.MultiIndex.from_tuples([self.columns[i] for i in positions]))
+
+    def remove(self) -> None:
+        """
+        Delete the shards and the index file.
+        """
+        for shard in self.shards:
+            for key in ('values', 'timestamps'):
+                path = os.path.join(self.path, shard[key])
+                if os.path.exists(path):
+                    os.remove(path)
+        os.remove(os.path.join(self.path, INDEX_FILE))
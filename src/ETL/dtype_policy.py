@@ -0,0 +1,136 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ETL.feature_engineer import CALENDAR_COLUMNS, compute_calendar_features
+
+logger = logging.getLogger(__name__)
+
+# Columns kept at float64 by default: raw prices must round-trip exactly, and OBV is a
+# running sum whose magnitude grows without bound (float32 would lose whole units of volume)
+DEFAULT_KEEP_FLOAT64 = ['open', 'high', 'low', 'close', 'OBV']
+
+DEFAULT_CALENDAR_DTYPES = {column: 'int8' for column in CALENDAR_COLUMNS}
+
+class DtypePolicy:
+    """
+    Storage dtype policy applied to processed frames right before they are written to ArcticDB.
+
+    Precision: float32 keeps a 24-bit mantissa, so every downcast value carries a relative
+    rounding error of at most 2**-24 (~6e-8, about 7 significant digits). For bounded
+    oscillators (RSI, STOCH, CMF, Z-Score) this is an absolute error below 1e-5. For
+    price-level indicators (SMA, EMA, BBANDS, ATR) the error scales with the price, e.g.
+    at most ~0.004 on a 60000 BTCUSD moving average, which is below the instrument's tick size.
+    Columns needing exact values are listed in `keep_float64`; with `fixed_point_prices`, the
+    OHLC columns are further stored as integer point counts (see ETL/price_codec.py).
+    """
+
+    def __init__(self,
+                 float_dtype: str = 'float32',
+                 keep_float64: Optional[List[str]] = None,
+                 calendar_dtypes: Optional[Dict[str, str]] = None,
+                 persist_derivable: bool = True,
+                 fixed_point_prices: bool = False) -> None:
+        """
+        Initialize the dtype policy.
+
+        Args:
+            float_dtype (str): Target dtype for floating point indicator columns.
+            keep_float64 (List[str], optional): Columns that are never downcast.
+            calendar_dtypes (Dict[str, str], optional): Target dtype for each calendar column.
+            persist_derivable (bool): If False, calendar columns are dropped before storage,
+                                      use `restore` to derive them again from the index after reading.
+            fixed_point_prices (bool): Store OHLC prices as int32/int64 counts of the symbol's point,
+                                       losslessly, through DataStore.store_data's `price_digits`.
+        """
+        self.float_dtype = np.dtype(float_dtype)
+        self.keep_float64 = set(DEFAULT_KEEP_FLOAT64 if keep_float64 is None else keep_float64)
+        self.calendar_dtypes = dict(DEFAULT_CALENDAR_DTYPES if calendar_dtypes is None else calendar_dtypes)
+        self.persist_derivable = persist_derivable
+        self.fixed_point_prices = fixed_point_prices
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'DtypePolicy':
+        """
+        Build a policy from the 'dtype_policy' section of feature_config.json.
+
+        Args:
+            config (dict, optional): The policy configuration, None or empty for the defaults.
+
+        Returns:
+            DtypePolicy: The configured policy.
+        """
+        config = {k: v for k, v in (config or {}).items() if k != 'description'}
+        return cls(**config)
+
+    def apply(self, df: pd.DataFrame, stored_dtypes: Optional[pd.Series] = None) -> pd.DataFrame:
+        """
+        Downcast (and optionally drop) columns according to the policy.
+
+        ArcticDB cannot change the schema of a stored symbol, so rows appended to a symbol written with
+        another policy (e.g. before the policy existed, with float64 indicators and calendar columns)
+        keep the stored dtypes, and columns the policy would drop are kept; the symbol takes the policy
+        when it is rebuilt. Columns cannot be kept or cast away, though: rows with a feature column the
+        stored symbol does not have (a newly enabled feature), or without one of its columns, are refused.
+
+        Args:
+            df (pd.DataFrame): Processed DataFrame about to be stored.
+            stored_dtypes (pd.Series, optional): Dtypes of the stored symbol the rows are appended to
+                                                 (see DataStore.stored_dtypes), None for a new symbol.
+
+        Returns:
+            pd.DataFrame: A new DataFrame with compact dtypes.
+
+        Raises:
+            ValueError: If the columns of the rows differ from the stored columns, listing the differences.
+        """
+        compact = self._compact(df)
+        if stored_dtypes is None or compact.dtypes.equals(stored_dtypes):
+            return compact
+        new = [column for column in compact.columns if column not in stored_dtypes.index]
+        missing = [column for column in stored_dtypes.index if column not in df.columns]
+        if new or missing:
+            raise ValueError(f"Columns differ from the stored symbol (new: {', '.join(new) or 'none'}; "
+                             f"missing: {', '.join(missing) or 'none'}), recompute the symbol to store them")
+        logger.warning(f"Stored dtypes differ from the dtype policy, keeping the stored dtypes "
+                       f"({len(stored_dtypes)} columns); rebuild the symbol to apply the policy")
+        return df[list(stored_dtypes.index)].astype(stored_dtypes.to_dict())
+
+    def _compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.persist_derivable:
+            df = df.drop(columns=[c for c in CALENDAR_COLUMNS if c in df.columns])
+
+        casts = {}
+        for column, dtype in df.dtypes.items():
+            if column in self.calendar_dtypes:
+                casts[column] = self.calendar_dtypes[column]
+            elif np.issubdtype(dtype, np.floating) and column not in self.keep_float64:
+                casts[column] = self.float_dtype
+        compact = df.astype(casts)
+
+        logger.debug(f"Dtype policy reduced frame from {df.memory_usage(index=False).sum()} "
+                     f"to {compact.memory_usage(index=False).sum()} bytes")
+        return compact
+
+    def restore(self, df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Re-derive calendar columns that were not persisted.
+
+        Args:
+            df (pd.DataFrame): DataFrame read back from ArcticDB.
+            columns (List[str], optional): Columns the read asked for, only these calendar columns
+                                           are derived; all of them if None.
+
+        Returns:
+            pd.DataFrame: DataFrame including the calendar columns.
+        """
+        missing = [c for c in CALENDAR_COLUMNS if c not in df.columns and (columns is None or c in columns)]
+        if not missing or df.empty:
+            return df
+        df = df.copy()
+        calendar = compute_calendar_features(df.index)
+        for column in missing:
+            df[column] = calendar[column].astype(self.calendar_dtypes.get(column, calendar[column].dtype))
+        return df
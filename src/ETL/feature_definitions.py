@@ -1,23 +1,61 @@
-from ETL.features.symbol_specific.moving_averages import SMA, EMA, WMA
-from ETL.features.symbol_specific.momentum_indicators import RSI, MACD, STOCH
-from ETL.features.symbol_specific.volatility_indicators import BBANDS, ATR, Volatility
-from ETL.features.symbol_specific.volume_indicators import OBV, CMF
-from ETL.features.symbol_specific.price_transformations import LogReturns, PctChange, ZScore
-
-from ETL.features.universal.global_metrics import AverageCloseAllSymbols, MedianVolumeAllSymbols
-from ETL.features.universal.correlation_metrics import ClosePriceCorrelation
-
-# Symbol-specific feature classes
-symbol_specific_features = {
-    "Moving_Averages": [SMA, EMA, WMA],
-    "Momentum_Indicators": [RSI, MACD, STOCH],
-    "Volatility_Indicators": [BBANDS, ATR, Volatility],
-    "Volume_Indicators": [OBV, CMF],
-    "Price_Transformations": [LogReturns, PctChange, ZScore],
+from typing import Dict, List, Optional, Set, Type
+from ETL.feature_loader import load_feature_classes
+from ETL.features.base_feature import BaseFeature
+
+_SYMBOL_SPECIFIC = 'ETL.features.symbol_specific'
+_UNIVERSAL = 'ETL.features.universal'
+
+# Symbol-specific feature classes, imported lazily (most of them pull in pandas_ta)
+symbol_specific_feature_references = {
+    "Moving_Averages": [f"{_SYMBOL_SPECIFIC}.moving_averages:{name}" for name in ("SMA", "EMA", "WMA")],
+    "Momentum_Indicators": [f"{_SYMBOL_SPECIFIC}.momentum_indicators:{name}" for name in ("RSI", "MACD", "STOCH")],
+    "Volatility_Indicators": [f"{_SYMBOL_SPECIFIC}.volatility_indicators:{name}" for name in ("BBANDS", "ATR", "Volatility")],
+    "Volume_Indicators": [f"{_SYMBOL_SPECIFIC}.volume_indicators:{name}" for name in ("OBV", "CMF")],
+    "Price_Transformations": [f"{_SYMBOL_SPECIFIC}.price_transformations:{name}" for name in ("LogReturns", "PctChange", "ZScore")],
 }
 
-# Universal feature classes
-universal_features = {
-    "Global_Metrics": [AverageCloseAllSymbols, MedianVolumeAllSymbols],
-    "Correlation_Metrics": [ClosePriceCorrelation],
+# Universal feature classes, imported lazily
+universal_feature_references = {
+    "Global_Metrics": [f"{_UNIVERSAL}.global_metrics:{name}" for name in ("AverageCloseAllSymbols", "MedianVolumeAllSymbols")],
+    "Correlation_Metrics": [f"{_UNIVERSAL}.correlation_metrics:ClosePriceCorrelation"],
+    "Regression_Metrics": [f"{_UNIVERSAL}.regression_metrics:RollingRegression"],
+    "Cross_Sectional_Metrics": [f"{_UNIVERSAL}.cross_sectional:{name}" for name in ("CrossSectionalRank", "CrossSectionalZScore")],
 }
+
+def enabled_features(feature_config: dict, section: str) -> Set[str]:
+    """
+    Names of the features listed in a section of feature_config.json.
+
+    Args:
+        feature_config (dict): The parsed feature configuration.
+        section (str): 'symbol_specific' or 'universal'.
+
+    Returns:
+        Set[str]: The enabled feature class names.
+    """
+    enabled = set()
+    for features in feature_config.get(section, {}).values():
+        enabled.update(features)  # dict of feature settings or list of feature names
+    return enabled
+
+def load_symbol_specific_features(feature_config: Optional[dict] = None) -> Dict[str, List[Type[BaseFeature]]]:
+    """
+    Import the symbol-specific feature classes, only those enabled in `feature_config` when given.
+    """
+    enabled = enabled_features(feature_config, 'symbol_specific') if feature_config is not None else None
+    return load_feature_classes(symbol_specific_feature_references, enabled)
+
+def load_universal_features(feature_config: Optional[dict] = None) -> Dict[str, List[Type[BaseFeature]]]:
+    """
+    Import the universal feature classes, only those enabled in `feature_config` when given.
+    """
+    enabled = enabled_features(feature_config, 'universal') if feature_config is not None else None
+    return load_feature_classes(universal_feature_references, enabled)
+
+def __getattr__(name: str):
+    # `symbol_specific_features` and `universal_features` stay importable, loading every feature on first access
+    if name == 'symbol_specific_features':
+        return load_symbol_specific_features()
+    if name == 'universal_features':
+        return load_universal_features()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
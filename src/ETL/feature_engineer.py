@@ -2,12 +2,69 @@ import pandas as pd
 import numpy as np
 import logging
 import json
+from contextlib import nullcontext
 from itertools import product
-from typing import List, Type, Optional
+from typing import Any, Dict, List, Type, Optional
+from ETL.features import recursions
 from ETL.features.base_feature import BaseFeature
+from ETL.instrumentation import registry
+from ETL.panel import SymbolPanel
+from ETL.profiling import FeatureProfiler
 
 logger = logging.getLogger(__name__)
 
+FEATURE_CONFIG_PATH = 'src/ETL/feature_config.json'
+
+# Entries of a feature's configuration that are not constructor parameters
+NON_PARAMETER_KEYS = ('description', 'backend')
+
+def load_feature_config(path: str = FEATURE_CONFIG_PATH) -> dict:
+    """
+    Load the feature configuration JSON.
+
+    Args:
+        path (str): Path of feature_config.json.
+
+    Returns:
+        dict: The parsed configuration.
+    """
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# Bars of history needed by the base features ('returns' and 'log_returns' use the previous close)
+BASE_FEATURES_LOOKBACK = 1
+
+# Calendar columns added by add_base_features; all of them are derivable from the index
+CALENDAR_COLUMNS = ['minute', 'hour', 'day', 'day_of_week', 'minutes_in_bucket']
+
+def compute_calendar_features(index: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Compute the calendar base features from a DatetimeIndex.
+
+    Args:
+        index (pd.DatetimeIndex): The time index of the bars.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed like `index` with the columns in CALENDAR_COLUMNS.
+    """
+    calendar = pd.DataFrame(index=index)
+    calendar['minute'] = index.minute
+    calendar['hour'] = index.hour
+    calendar['day'] = index.day
+    calendar['day_of_week'] = index.dayofweek
+
+    # Define 'minutes_in_bucket' based on 'minute'
+    thresholds = [15, 30, 45]
+    groups = [0, 1, 2, 3]  # Adjust group labels as needed
+    calendar['minutes_in_bucket'] = np.select(
+        [calendar['minute'] < thresholds[0],
+         calendar['minute'] < thresholds[1],
+         calendar['minute'] < thresholds[2]],
+        groups[:3],
+        default=groups[3]
+    )
+    return calendar
+
 class FeatureEngineer:
     def __init__(self, symbol_features: dict, universal_features: dict) -> None:
         """
@@ -19,31 +76,78 @@ class FeatureEngineer:
         """
         self.symbol_features = symbol_features
         self.universal_features = universal_features
-        self.max_lookback = self.calculate_max_lookback()
-        logger.info(f"Calculated maximum lookback: {self.max_lookback} minutes")
 
         # Load feature configuration from JSON
-        with open('src/ETL/feature_config.json', 'r') as f:
-            self.feature_config = json.load(f)
+        self.feature_config = load_feature_config()
+
+        self.max_lookback = self.calculate_max_lookback()
+        logger.info(f"Calculated maximum lookback: {self.max_lookback} bars")
 
     def calculate_max_lookback(self) -> int:
         """
-        Calculate the maximum lookback required based on feature definitions.
-        Assumes that features with a 'lookback' attribute indicate a lookback.
+        Calculate the maximum lookback required by any configured feature instance.
 
         Returns:
-            int: The maximum lookback period in minutes.
-        """
-        max_lookback = 0
-        for category, features in self.symbol_features.items():
-            for feature_cls in features:
-                if hasattr(feature_cls, 'lookback'):
-                    max_lookback = max(max_lookback, feature_cls.lookback)
-        for category, features in self.universal_features.items():
-            for feature_cls in features:
-                if hasattr(feature_cls, 'lookback'):
-                    max_lookback = max(max_lookback, feature_cls.lookback)
+            int: The maximum lookback in bars.
+        """
+        symbol_feature_classes = [cls for features in self.symbol_features.values() for cls in features]
+        max_lookback = self.required_lookback(symbol_feature_classes)
+        universal_feature_classes = [cls for features in self.universal_features.values() for cls in features]
+        for feature_instance in self.build_feature_instances(universal_feature_classes, 'universal'):
+            max_lookback = max(max_lookback, feature_instance.lookback)
         return max_lookback
+
+    def required_lookback(self, feature_classes: List[Type[BaseFeature]]) -> int:
+        """
+        Calculate the history an incremental run needs so that the given features match a full recompute.
+        The history is a contiguous window before the first new bar, so the union of the requirements of
+        all feature instances is their maximum.
+
+        Args:
+            feature_classes (List[Type[BaseFeature]]): Feature classes applied to the symbol.
+
+        Returns:
+            int: The required number of bars before the first new bar.
+        """
+        lookbacks = [instance.lookback for instance in self.build_feature_instances(feature_classes)]
+        return max([BASE_FEATURES_LOOKBACK] + lookbacks)
+
+    def build_feature_instances(self, feature_classes: List[Type[BaseFeature]],
+                                section: str = 'symbol_specific') -> List[BaseFeature]:
+        """
+        Instantiate every configured parameter combination of the given feature classes.
+
+        Args:
+            feature_classes (List[Type[BaseFeature]]): Feature classes to instantiate.
+            section (str): Section of the configuration holding their parameters, 'symbol_specific' or 'universal'.
+
+        Returns:
+            List[BaseFeature]: Feature instances, in application order.
+        """
+        instances = []
+        for feature_cls in feature_classes:
+            feature_info = self.get_feature_info(feature_cls.__name__, section)
+            if feature_info:
+                for param_combination in self.generate_param_combinations(feature_info):
+                    instance = feature_cls(**param_combination)
+                    if 'backend' in feature_info:
+                        # Implementation chosen in the configuration, e.g. "jit" for the recursive indicators
+                        instance.backend = feature_info['backend']
+                    instances.append(instance)
+            else:
+                instances.append(feature_cls())  # Default instantiation
+        return instances
+
+    def jit_features(self, feature_classes: List[Type[BaseFeature]]) -> List[str]:
+        """
+        Names of the feature classes computed with the compiled kernels of features/recursions.py.
+        """
+        names = []
+        for feature_cls in feature_classes:
+            feature_info = self.get_feature_info(feature_cls.__name__) or {}
+            if feature_info.get('backend', getattr(feature_cls, 'backend', None)) == recursions.JIT:
+                names.append(feature_cls.__name__)
+        return names
     
     def add_base_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -58,35 +162,25 @@ class FeatureEngineer:
         df = df.copy()
         df['returns'] = df['close'].pct_change()
         df['log_returns'] = np.log(df['close'] / df['close'].shift(1))
-        df['minute'] = df.index.minute
-        df['hour'] = df.index.hour
-        df['day'] = df.index.day
-        df['day_of_week'] = df.index.dayofweek
-
-        # Define 'minutes_in_bucket' based on 'minute'
-        thresholds = [15, 30, 45]
-        groups = [0, 1, 2, 3]  # Adjust group labels as needed
-        df['minutes_in_bucket'] = np.select(
-            [df['minute'] < thresholds[0],
-             df['minute'] < thresholds[1],
-             df['minute'] < thresholds[2]],
-            groups[:3],
-            default=groups[3]
-        )
+        calendar = compute_calendar_features(df.index)
+        for column in calendar.columns:
+            df[column] = calendar[column]
         return df
 
-    def get_feature_info(self, feature_name: str) -> Optional[dict]:
+    def get_feature_info(self, feature_name: str, section: str = 'symbol_specific') -> Optional[dict]:
         """
         Get the feature information from the JSON configuration.
 
         Args:
             feature_name (str): The name of the feature.
+            section (str): 'symbol_specific' or 'universal'.
 
         Returns:
-            dict: The feature information dictionary.
+            dict: The feature information dictionary, None for features without parameters
+                  (including those listed by name only).
         """
-        for category, features in self.feature_config['symbol_specific'].items():
-            if feature_name in features:
+        for category, features in self.feature_config.get(section, {}).items():
+            if feature_name in features and isinstance(features, dict):
                 return features[feature_name]
         return None
 
@@ -101,47 +195,30 @@ class FeatureEngineer:
             List[dict]: A list of parameter combinations.
         """
         # Filter out non-parameter keys like 'description'
-        param_keys = {k: v for k, v in parameters.items() if k != 'description'}
+        param_keys = {k: v for k, v in parameters.items() if k not in NON_PARAMETER_KEYS}
         if not param_keys:
             return [{}]  # Return a list with an empty dict if there are no parameters
         keys, values = zip(*param_keys.items())
         return [dict(zip(keys, v)) for v in product(*values)]
 
-    def apply_symbol_features(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]]) -> pd.DataFrame:
+    def apply_symbol_features(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]],
+                              symbol: Optional[str] = None, profiler: Optional[FeatureProfiler] = None) -> pd.DataFrame:
         """
         Apply symbol-specific features to the DataFrame.
 
         Args:
             df (pd.DataFrame): Input DataFrame to which features will be applied.
             feature_classes (List[Type[BaseFeature]]): List of feature classes to apply.
+            symbol (str, optional): Symbol being processed, used to label the per-feature metrics.
+            profiler (FeatureProfiler, optional): Profiler capturing call stacks and allocations of every feature instance.
 
         Returns:
             pd.DataFrame: DataFrame with applied symbol-specific features.
         """
         for feature_cls in feature_classes:
             try:
-                feature_name = feature_cls.__name__
-                feature_info = self.get_feature_info(feature_name)
-                if feature_info:
-                    param_combinations = self.generate_param_combinations(feature_info)
-                    for param_combination in param_combinations:
-                        feature_instance = feature_cls(**param_combination)
-                        result = feature_instance.compute(df)
-                        if isinstance(result, pd.DataFrame):
-                            for col in result.columns:
-                                df[f"{feature_instance.name}_{col}"] = result[col]
-                        else:
-                            df[feature_instance.name] = result
-                        logger.debug(f"Applied feature: {feature_instance.name}")
-                else:
-                    feature_instance = feature_cls()  # Default instantiation
-                    result = feature_instance.compute(df)
-                    if isinstance(result, pd.DataFrame):
-                        for col in result.columns:
-                            df[f"{feature_instance.name}_{col}"] = result[col]
-                    else:
-                        df[feature_instance.name] = result
-                    logger.debug(f"Applied feature: {feature_instance.name}")
+                with registry.stage(f"feature:{feature_cls.__name__}", symbol=symbol, rows=len(df)):
+                    self._apply_feature(df, feature_cls, profiler)
             except TypeError as te:
                 logger.error(f"TypeError applying feature {feature_cls.__name__}: {te}")
             except Exception as e:
@@ -149,9 +226,82 @@ class FeatureEngineer:
         df.rename(columns={'tick_volume': 'volume'}, inplace=True)
         return df
 
+    def _param_combinations(self, feature_cls: Type[BaseFeature]) -> List[dict]:
+        feature_info = self.get_feature_info(feature_cls.__name__)
+        return self.generate_param_combinations(feature_info) if feature_info else [{}]
+
+    def _apply_feature(self, df: pd.DataFrame, feature_cls: Type[BaseFeature], profiler: Optional[FeatureProfiler] = None) -> None:
+        """
+        Add the columns of every configured parameter combination of a feature class to a symbol's frame.
+        """
+        if feature_cls.batched:
+            # The whole parameter grid in one call, e.g. one cumulative sum for every SMA length
+            param_combinations = self._param_combinations(feature_cls)
+            with profiler.profile(feature_cls.__name__) if profiler else nullcontext():
+                result = feature_cls.compute_batch(df, param_combinations)
+            for col in result.columns:
+                df[col] = result[col]
+            logger.debug(f"Applied feature grid: {feature_cls.__name__} ({len(param_combinations)} combinations)")
+        else:
+            for feature_instance in self.build_feature_instances([feature_cls]):
+                with profiler.profile(feature_instance.name) if profiler else nullcontext():
+                    result = feature_instance.compute(df)
+                self._assign_result(df, feature_instance, result)
+                logger.debug(f"Applied feature: {feature_instance.name}")
+
+    def _apply_panel_feature(self, panel: SymbolPanel, feature_cls: Type[BaseFeature],
+                             profiler: Optional[FeatureProfiler] = None) -> bool:
+        """
+        Compute a feature on the panel and scatter its columns back to the frames.
+
+        Returns:
+            bool: False if the panel computation failed and the feature still has to be applied per symbol.
+        """
+        try:
+            with profiler.profile(feature_cls.__name__) if profiler else nullcontext():
+                columns = feature_cls.compute_panel(panel, self._param_combinations(feature_cls))
+        except Exception as e:
+            logger.warning(f"Panel computation of {feature_cls.__name__} failed ({e}), applying it per symbol")
+            return False
+        for col, values in columns.items():
+            for symbol, symbol_values in panel.scatter(values).items():
+                panel.frames[symbol][col] = symbol_values
+        logger.debug(f"Applied feature on the panel: {feature_cls.__name__}")
+        return True
+
+    def apply_symbol_features_panel(self, frames: Dict[str, pd.DataFrame], feature_classes: List[Type[BaseFeature]],
+                                    profiler: Optional[FeatureProfiler] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Apply symbol-specific features to several symbols at once. Features with `supports_panel` run once
+        on (time x symbol) matrices of all symbols (see SymbolPanel) and their results are scattered back
+        to each frame; the others are applied symbol by symbol. The frames get the same columns, in the
+        same order, as with apply_symbol_features.
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): Per-symbol frames with base features, modified in place.
+            feature_classes (List[Type[BaseFeature]]): List of feature classes to apply.
+            profiler (FeatureProfiler, optional): Profiler capturing call stacks and allocations of every feature.
+
+        Returns:
+            Dict[str, pd.DataFrame]: The frames with applied symbol-specific features.
+        """
+        panel = SymbolPanel(frames)
+        for feature_cls in feature_classes:
+            with registry.stage(f"feature:{feature_cls.__name__}", rows=sum(panel.lengths)):
+                if feature_cls.supports_panel and self._apply_panel_feature(panel, feature_cls, profiler):
+                    continue
+                for symbol, df in frames.items():
+                    try:
+                        self._apply_feature(df, feature_cls, profiler)
+                    except Exception as e:
+                        logger.error(f"Error applying feature {feature_cls.__name__} to {symbol}: {e}")
+        for df in frames.values():
+            df.rename(columns={'tick_volume': 'volume'}, inplace=True)
+        return frames
+
     def apply_universal_features(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]]) -> pd.DataFrame:
         """
-        Apply universal features to the DataFrame.
+        Apply universal features to the DataFrame, every configured parameter combination of each class.
 
         Args:
             df (pd.DataFrame): Combined DataFrame across all symbols.
@@ -162,16 +312,124 @@ class FeatureEngineer:
         """
         for feature_cls in feature_classes:
             try:
-                feature_instance = feature_cls()
-                result = feature_instance.compute(df)
-                if isinstance(result, pd.DataFrame):
-                    for col in result.columns:
-                        df[f"{feature_instance.name}_{col}"] = result[col]
-                else:
-                    df[feature_instance.name] = result
-                logger.debug(f"Applied universal feature: {feature_instance.name}")
+                for feature_instance in self.build_feature_instances([feature_cls], 'universal'):
+                    result = feature_instance.compute(df)
+                    self._assign_result(df, feature_instance, result)
+                    logger.debug(f"Applied universal feature: {feature_instance.name}")
             except TypeError as te:
                 logger.error(f"TypeError applying universal feature {feature_cls.__name__}: {te}")
             except Exception as e:
                 logger.error(f"Error applying universal feature {feature_cls.__name__}: {e}")
-        return df
\ No newline at end of file
+        return df
+
+    def compute_universal_features(self, panel: pd.DataFrame, feature_classes: List[Type[BaseFeature]]) -> pd.DataFrame:
+        """
+        Compute universal features on a (field, symbol) panel into a separate frame, leaving the panel untouched.
+
+        Args:
+            panel (pd.DataFrame): Panel with MultiIndex columns (field, symbol).
+            feature_classes (List[Type[BaseFeature]]): List of universal feature classes to apply.
+
+        Returns:
+            pd.DataFrame: One column per feature result on the panel's index.
+        """
+        columns: Dict[str, Any] = {}
+        for feature_cls in feature_classes:
+            try:
+                for feature_instance in self.build_feature_instances([feature_cls], 'universal'):
+                    columns.update(self._result_columns(feature_instance, feature_instance.compute(panel)))
+            except Exception as e:
+                logger.error(f"Error applying universal feature {feature_cls.__name__}: {e}")
+        # Built at once, results of per-symbol features can have hundreds of columns
+        return pd.DataFrame(columns, index=panel.index)
+
+    @staticmethod
+    def _assign_result(df: pd.DataFrame, feature_instance: BaseFeature, result) -> None:
+        """
+        Add a feature result to the DataFrame, prefixing the columns of multi-column results.
+        """
+        for column, values in FeatureEngineer._result_columns(feature_instance, result).items():
+            df[column] = values
+
+    @staticmethod
+    def _result_columns(feature_instance: BaseFeature, result) -> Dict[str, Any]:
+        """
+        The columns of a feature result by name, the feature name prefixing the columns of multi-column results.
+        """
+        if isinstance(result, pd.DataFrame):
+            return {f"{feature_instance.name}_{col}": result[col] for col in result.columns}
+        return {feature_instance.name: result}
+
+    def cumulative_columns(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]]) -> List[str]:
+        """
+        List the columns of `df` produced by cumulative feature instances.
+
+        Args:
+            df (pd.DataFrame): DataFrame with applied features.
+            feature_classes (List[Type[BaseFeature]]): Feature classes that were applied.
+
+        Returns:
+            List[str]: The cumulative feature columns present in `df`.
+        """
+        names = [instance.name for instance in self.build_feature_instances(feature_classes) if instance.cumulative]
+        return [col for col in df.columns if any(col == name or col.startswith(f"{name}_") for name in names)]
+
+    def rebase_cumulative_features(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]],
+                                   anchor: pd.DataFrame) -> pd.DataFrame:
+        """
+        Shift cumulative features computed on an incremental window so that they continue the stored series.
+
+        Args:
+            df (pd.DataFrame): Features computed on the incremental window, including the anchor row.
+            feature_classes (List[Type[BaseFeature]]): Feature classes that were applied.
+            anchor (pd.DataFrame): The last stored row of the symbol.
+
+        Returns:
+            pd.DataFrame: The DataFrame with rebased cumulative columns.
+        """
+        if anchor.empty:
+            return df
+        anchor_time = anchor.index[-1]
+        if anchor_time not in df.index:
+            logger.warning(f"Anchor row {anchor_time} missing from the window, cumulative features not rebased")
+            return df
+        for col in self.cumulative_columns(df, feature_classes):
+            if col in anchor.columns and pd.notna(anchor[col].iloc[-1]):
+                df[col] = df[col] + (anchor[col].iloc[-1] - df.at[anchor_time, col])
+        return df
+
+    def validate_incremental(self, df: pd.DataFrame, feature_classes: List[Type[BaseFeature]],
+                             cutoff: pd.Timestamp, rtol: float = 1e-5, atol: float = 1e-8) -> Dict[str, float]:
+        """
+        Check that computing features on the lookback window after `cutoff` reproduces a full recompute.
+
+        Args:
+            df (pd.DataFrame): Raw OHLCV bars covering the full history.
+            feature_classes (List[Type[BaseFeature]]): Feature classes to validate.
+            cutoff (pd.Timestamp): Timestamp of the last row considered already stored.
+            rtol (float): Relative tolerance of the comparison.
+            atol (float): Absolute tolerance of the comparison.
+
+        Returns:
+            Dict[str, float]: Maximum absolute difference of every column outside the tolerance,
+                              empty if the incremental output matches.
+        """
+        full = self.apply_symbol_features(self.add_base_features(df), feature_classes)
+
+        cutoff_position = df.index.get_indexer([cutoff], method='pad')[0]
+        start = max(0, cutoff_position - self.required_lookback(feature_classes))
+        incremental = self.apply_symbol_features(self.add_base_features(df.iloc[start:]), feature_classes)
+        incremental = self.rebase_cumulative_features(incremental, feature_classes, full.loc[[full.index[cutoff_position]]])
+
+        expected = full[full.index > cutoff]
+        actual = incremental[incremental.index > cutoff]
+        mismatches = {}
+        for col in expected.columns:
+            if not np.issubdtype(expected[col].dtype, np.number):
+                continue
+            a = actual[col].to_numpy(dtype=float)
+            b = expected[col].to_numpy(dtype=float)
+            if not np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+                mismatches[col] = float(np.nanmax(np.abs(a - b)))
+                logger.warning(f"Incremental output of {col} differs from full recompute by {mismatches[col]}")
+        return mismatches
@@ -1,30 +1,45 @@
 import importlib
-from typing import List, Type
-from features.base_feature import BaseFeature
+from typing import Dict, List, Optional, Set, Type
+from ETL.features.base_feature import BaseFeature
 import logging
 
 logger = logging.getLogger(__name__)
 
-def load_feature_classes(feature_names: List[str], category: str, feature_type: str) -> List[Type[BaseFeature]]:
+def load_feature_class(reference: str) -> Type[BaseFeature]:
     """
-    Dynamically load feature classes based on feature names.
+    Import a feature class from a 'module.path:ClassName' reference.
 
     Args:
-        feature_names (List[str]): List of feature class names to load.
-        category (str): Category of the features (e.g., 'symbol_specific', 'universal').
-        feature_type (str): Specific feature category (e.g., 'Moving_Averages').
+        reference (str): Reference of the feature class, e.g. 'ETL.features.symbol_specific.moving_averages:SMA'.
 
     Returns:
-        List[Type[BaseFeature]]: List of feature classes.
+        Type[BaseFeature]: The feature class.
     """
-    feature_classes = []
-    for feature_name in feature_names:
-        module_path = f"features.{category}.{feature_type.lower()}.{feature_name.lower()}"
-        class_name = feature_name
-        try:
-            module = importlib.import_module(module_path)
-            feature_cls = getattr(module, class_name)
-            feature_classes.append(feature_cls)
-        except (ModuleNotFoundError, AttributeError) as e:
-            logger.error(f"Error loading feature {feature_name}: {e}")
+    module_path, class_name = reference.split(':')
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+def load_feature_classes(references: Dict[str, List[str]], enabled: Optional[Set[str]] = None) -> Dict[str, List[Type[BaseFeature]]]:
+    """
+    Import the feature classes of every category, skipping disabled features so that their modules
+    (and dependencies such as pandas_ta) are never imported.
+
+    Args:
+        references (Dict[str, List[str]]): Feature class references per category.
+        enabled (Set[str], optional): Names of the enabled feature classes, all features if None.
+
+    Returns:
+        Dict[str, List[Type[BaseFeature]]]: Feature classes per category.
+    """
+    feature_classes = {}
+    for category, category_references in references.items():
+        classes = []
+        for reference in category_references:
+            if enabled is not None and reference.split(':')[1] not in enabled:
+                continue
+            try:
+                classes.append(load_feature_class(reference))
+            except (ModuleNotFoundError, AttributeError) as e:
+                logger.error(f"Error loading feature {reference}: {e}")
+        feature_classes[category] = classes
     return feature_classes
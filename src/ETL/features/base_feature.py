@@ -1,17 +1,101 @@
 from abc import ABC, abstractmethod
+import math
+import numpy as np
 import pandas as pd
+from typing import Any, Dict, List
+
+# Weight of the truncated history, relative to the full history, tolerated when warming up
+# recursive (EMA-type) features on a window instead of the full series
+EWM_CONVERGENCE_TOLERANCE = 1e-6
+
+def ewm_warmup(alpha: float, tolerance: float = EWM_CONVERGENCE_TOLERANCE) -> int:
+    """
+    Number of bars after which an exponentially weighted recursion has forgotten its seed,
+    i.e. the combined weight (1 - alpha) ** n of all older observations drops below `tolerance`.
+
+    Args:
+        alpha (float): Smoothing factor of the recursion, 2 / (length + 1) for EMA, 1 / length for RMA.
+        tolerance (float): Tolerated relative weight of the truncated history.
+
+    Returns:
+        int: The number of warm-up bars.
+    """
+    return int(math.ceil(math.log(tolerance) / math.log(1.0 - alpha)))
 
 class BaseFeature(ABC):
     """
     Abstract base class for all features.
     """
 
+    # Features whose value depends on the entire history (running sums such as OBV). They are computed
+    # on the incremental window and rebased onto the last stored value instead of needing a lookback.
+    cumulative: bool = False
+
+    # Universal features: the per-symbol columns they read, and whether each timestamp is reduced on its own
+    # (e.g. a cross-sectional mean), which lets them be computed exactly on time blocks of the panel
+    input_columns: List[str] = []
+    rowwise: bool = False
+
+    # Universal features whose value at a timestamp only depends on the `lookback` previous rows of the
+    # panel (rolling windows), computed exactly on time blocks once these rows are prepended
+    windowed: bool = False
+
+    # Features computing a whole grid of parameter combinations in one call (see compute_batch),
+    # e.g. one cumulative sum serving every SMA length
+    batched: bool = False
+
+    # Features computing all symbols at once on (time x symbol) matrices (see compute_panel)
+    supports_panel: bool = False
+
     def __init__(self, name: str):
         self.name = name
 
+    @property
+    def lookback(self) -> int:
+        """
+        Number of bars of history required before the first row whose value must match a
+        full-history computation. Features derive it from their parameters.
+        """
+        return 0
+
     @abstractmethod
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the feature and return as a pandas Series.
         """
         pass
+
+    @classmethod
+    def compute_batch(cls, df: pd.DataFrame, param_combinations: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Compute every parameter combination at once, for features with `batched` set.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame.
+            param_combinations (List[Dict[str, Any]]): Constructor arguments of each instance.
+
+        Returns:
+            pd.DataFrame: The columns the instances would add one by one, with the same names and order.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not compute parameter grids in one call")
+
+    @classmethod
+    def compute_panel(cls, panel, param_combinations: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Compute every parameter combination for all symbols of a panel, for features with `supports_panel`.
+        By default each instance's `compute` runs on the panel, whose fields are (time x symbol) frames,
+        which suits single-column features written with column-wise pandas operations.
+
+        Args:
+            panel (SymbolPanel): The stacked bars of the symbols.
+            param_combinations (List[Dict[str, Any]]): Constructor arguments of each instance.
+
+        Returns:
+            Dict[str, np.ndarray]: A (time x symbol) matrix per column, with the names and in the order
+                                   the instances add them to a single symbol's frame.
+        """
+        columns = {}
+        for params in param_combinations:
+            instance = cls(**params)
+            columns[instance.name] = np.asarray(instance.compute(panel), dtype='float64')
+        return columns
@@ -0,0 +1,241 @@
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+def rolling_means(values: np.ndarray, lengths: Iterable[int]) -> np.ndarray:
+    """
+    Rolling means of one series for several window lengths from a single cumulative sum.
+
+    Matches `Series.rolling(length).mean()`: a window containing NaN, or shorter than `length`, is NaN.
+    The series is centred on its first valid value before summing, so the rounding error of the
+    running sum grows with the drift of the series rather than with its level.
+
+    Args:
+        values (np.ndarray): 1D series, or 2D (time x symbol) matrix whose columns are averaged independently.
+        lengths (Iterable[int]): Window lengths.
+
+    Returns:
+        np.ndarray: Array of shape (len(values), len(lengths)), one column per length, or
+                    (len(values), symbols, len(lengths)) for a matrix.
+    """
+    values = np.asarray(values, dtype='float64')
+    if values.ndim == 1:
+        return rolling_means(values[:, None], lengths)[:, 0, :]
+    lengths = list(lengths)
+    n, columns = values.shape
+    out = np.full((n, columns, len(lengths)), np.nan)
+    if n == 0:
+        return out
+    missing = np.isnan(values)
+    # First valid value of every column (0 for all-NaN columns)
+    first = np.argmax(~missing, axis=0)
+    offset = np.where(missing.all(axis=0), 0.0, values[first, np.arange(columns)])
+    # Leading zeros make window sums a difference of two entries: sum(x[t-L+1..t]) = cs[t+1] - cs[t+1-L]
+    zeros = np.zeros((1, columns))
+    sums = np.concatenate((zeros, np.cumsum(np.where(missing, 0.0, values - offset), axis=0)))
+    nans = np.concatenate((zeros, np.cumsum(missing, axis=0)))
+    for j, length in enumerate(lengths):
+        if length < 1 or length > n:
+            continue
+        window_sums = sums[length:] - sums[:-length]
+        window_nans = nans[length:] - nans[:-length]
+        column = window_sums / length + offset
+        column[window_nans > 0] = np.nan
+        out[length - 1:, :, j] = column
+    return out
+
+def _non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    # pandas_ta.utils.non_zero_range: a series is shifted by epsilon wherever its range is zero anywhere
+    diff = high - low
+    return diff + np.any(diff == 0, axis=0) * sys.float_info.epsilon
+
+def bollinger_columns(values: np.ndarray, mid: np.ndarray, deviation: np.ndarray,
+                      length: int, std: float) -> Dict[str, np.ndarray]:
+    """
+    The BBL, BBM, BBU, BBB and BBP columns of `pandas_ta.bbands` from a rolling mean and a rolling
+    population standard deviation. Works on series and on (time x symbol) matrices alike.
+
+    Args:
+        values (np.ndarray): Close prices.
+        mid (np.ndarray): Rolling mean of the close prices over `length`.
+        deviation (np.ndarray): Rolling population standard deviation over `length`.
+        length (int): Window length, used in the column names.
+        std (float): Standard deviation multiplier.
+
+    Returns:
+        Dict[str, np.ndarray]: The columns by pandas_ta name, e.g. 'BBL_20_2.0'.
+    """
+    std = float(std)
+    lower = mid - std * deviation
+    upper = mid + std * deviation
+    ulr = _non_zero_range(upper, lower)
+    props = f"_{length}_{std}"
+    return {
+        f"BBL{props}": lower,
+        f"BBM{props}": mid,
+        f"BBU{props}": upper,
+        f"BBB{props}": 100 * ulr / mid,
+        f"BBP{props}": _non_zero_range(values, lower) / ulr,
+    }
+
+def bollinger_bands(close: pd.Series, length: int, stds: List[float], mid: np.ndarray = None) -> Dict[float, pd.DataFrame]:
+    """
+    Bollinger Bands of one length for several standard deviation multipliers, sharing one rolling mean
+    and one rolling variance. Same columns and formulas as `pandas_ta.bbands` (population standard
+    deviation, SMA middle band).
+
+    Args:
+        close (pd.Series): Close prices.
+        length (int): Window length.
+        stds (List[float]): Standard deviation multipliers.
+        mid (np.ndarray, optional): The rolling mean of `close` over `length`, if already computed.
+
+    Returns:
+        Dict[float, pd.DataFrame]: Per multiplier, the BBL, BBM, BBU, BBB and BBP columns.
+    """
+    values = close.to_numpy(dtype='float64')
+    if mid is None:
+        mid = rolling_means(values, [length])[:, 0]
+    deviation = np.sqrt(close.rolling(length, min_periods=length).var(ddof=0).to_numpy())
+    return {float(std): pd.DataFrame(bollinger_columns(values, mid, deviation, length, std), index=close.index)
+            for std in stds}
+
+def rolling_regression(x: np.ndarray, y: np.ndarray, window: int,
+                       min_periods: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rolling least-squares regression y = alpha + beta * x of every column of `y` on the series `x`,
+    from window sums of x, y, x*y, x**2 and y**2 taken as differences of cumulative sums, O(T) for
+    all columns at once instead of a fit per window.
+
+    Rows where `x` or a column of `y` is NaN are left out of that column's windows. Meant for returns,
+    whose running sums stay small; levels (prices) lose precision in the differences of their sums.
+
+    Args:
+        x (np.ndarray): Regressor series, e.g. the log returns of a reference symbol.
+        y (np.ndarray): (time x symbol) matrix of the regressed series.
+        window (int): Rows per window.
+        min_periods (int, optional): Valid pairs a window needs, `window` if None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The beta, alpha and R² matrices, shaped like `y`,
+                                                   NaN for windows with too few pairs or a constant x.
+    """
+    x = np.asarray(x, dtype='float64')[:, None]
+    y = np.asarray(y, dtype='float64')
+    min_periods = window if min_periods is None else min_periods
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        # sum(v[t-window+1..t]) = cs[t] - cs[t-window]; numpy buffers the overlapping in-place subtraction
+        sums = np.cumsum(values, axis=0)
+        sums[window:] -= sums[:-window]
+        return sums
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.all():
+        # No missing pair: the sums of x are shared by every column
+        n = np.minimum(np.arange(1, len(y) + 1), window).astype('float64')[:, None]
+        xs, ys = x, y
+    else:
+        n = window_sums(valid.astype('float64'))
+        xs, ys = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    sx, sxx = window_sums(xs), window_sums(xs * xs)
+    sy, syy, sxy = window_sums(ys), window_sums(ys * ys), window_sums(xs * ys)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sxy - sx * sy / n
+        variance_x = sxx - sx * sx / n
+        variance_y = syy - sy * sy / n
+        beta = covariance / variance_x
+        alpha = (sy - beta * sx) / n
+        r2 = covariance * covariance / (variance_x * variance_y)
+    undefined = np.broadcast_to((n < max(min_periods, 2)) | ~(variance_x > 0), beta.shape)
+    beta[undefined] = alpha[undefined] = r2[undefined] = np.nan
+    r2[~(variance_y > 0)] = np.nan
+    return beta, alpha, r2
+
+def cross_sectional_rank(values: np.ndarray) -> np.ndarray:
+    """
+    Percentile rank of every column within its row, from one argsort along the symbol axis for all rows.
+    Ties are resolved from the runs of equal values of the sorted rows, only on the rows that have ties.
+
+    Matches `DataFrame.rank(axis=1, pct=True)`: ties get their average rank, NaN values are left out
+    of their row and stay NaN.
+
+    Args:
+        values (np.ndarray): (time x symbol) matrix, e.g. the log returns of every symbol.
+
+    Returns:
+        np.ndarray: Ranks in (0, 1], shaped like `values`.
+    """
+    values = np.asarray(values, dtype='float64')
+    rows, columns = values.shape
+    if not rows or not columns:
+        return np.full((rows, columns), np.nan)
+    # NaN sort last, so the valid values of a row are its first `count` sorted positions
+    order = np.argsort(values, axis=1)
+    ordered = np.take_along_axis(values, order, axis=1)
+    count = (~np.isnan(values)).sum(axis=1, keepdims=True).astype('float64')
+    positions = np.arange(columns, dtype='float64')
+    ranks = np.broadcast_to(positions, (rows, columns)).copy()
+    ties = ordered[:, 1:] == ordered[:, :-1]
+    tied = np.flatnonzero(ties.any(axis=1))
+    if len(tied):
+        # Rows with ties split into runs of equal values (runs never span rows), each run getting the
+        # average of its positions
+        starts = np.ones((len(tied), columns), dtype=bool)
+        starts[:, 1:] = ~ties[tied]
+        first = np.flatnonzero(starts)
+        lengths = np.diff(first, append=starts.size)
+        ranks[tied] = np.repeat(first % columns + (lengths - 1) / 2, lengths).reshape(len(tied), columns)
+    ranks += 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranks /= count
+    ranks[positions >= count] = np.nan
+    out = np.empty((rows, columns))
+    np.put_along_axis(out, order, ranks, axis=1)
+    return out
+
+def cross_sectional_zscore(values: np.ndarray) -> np.ndarray:
+    """
+    Z-score of every column within its row: (value - row mean) / row standard deviation (ddof=1),
+    NaN values left out. Rows with fewer than two values or no dispersion are NaN.
+
+    Args:
+        values (np.ndarray): (time x symbol) matrix.
+
+    Returns:
+        np.ndarray: Z-scores shaped like `values`.
+    """
+    values = np.asarray(values, dtype='float64')
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / count
+        deviations = np.where(valid, values - mean, 0.0)
+        std = np.sqrt((deviations * deviations).sum(axis=1, keepdims=True) / (count - 1))
+        scores = (values - mean) / std
+    scores[np.broadcast_to((count < 2) | ~(std > 0), scores.shape)] = np.nan
+    return scores
+
+def within_groups(kernel: Callable[[np.ndarray], np.ndarray], values: np.ndarray,
+                  groups: Optional[List]) -> np.ndarray:
+    """
+    Apply a cross-sectional kernel within groups of columns, e.g. asset classes, each group on its own.
+
+    Args:
+        kernel (Callable): Row-wise kernel such as cross_sectional_rank.
+        values (np.ndarray): (time x symbol) matrix.
+        groups (List, optional): Group label of every column, the whole row is one group if None.
+
+    Returns:
+        np.ndarray: The kernel's result shaped like `values`.
+    """
+    values = np.asarray(values, dtype='float64')
+    if groups is None:
+        return kernel(values)
+    out = np.full(values.shape, np.nan)
+    labels = np.asarray(groups, dtype=object)
+    for label in dict.fromkeys(groups):
+        members = np.flatnonzero(labels == label)
+        out[:, members] = kernel(values[:, members])
+    return out
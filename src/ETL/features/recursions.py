@@ -0,0 +1,181 @@
+import logging
+import sys
+import time
+from typing import Dict
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Optional, the kernels then run as plain Python loops
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# Implementations of the recursive indicators (EMA, RSI, ATR, MACD, OBV), selected per feature class with
+# the class attribute `backend` or the "backend" entry of the feature in feature_config.json
+PANDAS_TA = 'pandas_ta'
+JIT = 'jit'
+BACKENDS = (PANDAS_TA, JIT)
+
+NUMBA_AVAILABLE = numba is not None
+
+def jit(function):
+    """
+    Compile a kernel with Numba when it is installed, keeping the plain Python function otherwise.
+    Compiled kernels are cached on disk (next to this module, or in NUMBA_CACHE_DIR), so only the
+    first process after a change pays the compile time, and release the GIL so that the compute
+    threads of the asyncio runner execute them in parallel.
+    """
+    if numba is None:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+@jit
+def ewm_mean(values: np.ndarray, alpha: float, adjust: bool, min_periods: int) -> np.ndarray:
+    """
+    Exponentially weighted mean, same recursion as `Series.ewm(alpha=alpha, adjust=adjust,
+    min_periods=min_periods).mean()` (ignore_na=False): NaN inputs keep the previous mean and still
+    age the older observations.
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    old_wt_factor = 1.0 - alpha
+    new_wt = 1.0 if adjust else alpha
+    minp = max(min_periods, 1)
+    weighted = values[0]
+    nobs = 1 if weighted == weighted else 0
+    out[0] = weighted if nobs >= minp else np.nan
+    old_wt = 1.0
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = cur == cur
+        if is_observation:
+            nobs += 1
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted if nobs >= minp else np.nan
+    return out
+
+def warm_up() -> float:
+    """
+    Compile (or load from the disk cache) every kernel for the float64 inputs the features pass, so that
+    the first feature call of a run does not include the compile time. Called once before workers start:
+    they then load the cached machine code instead of compiling again.
+
+    Returns:
+        float: Seconds spent, 0 without Numba.
+    """
+    if numba is None:
+        return 0.0
+    started = time.perf_counter()
+    values = np.linspace(1.0, 2.0, 8)
+    ewm_mean(values, 0.5, True, 2)
+    ewm_mean(values, 0.5, False, 0)
+    elapsed = time.perf_counter() - started
+    logger.info(f"JIT kernels ready in {elapsed:.3f}s")
+    return elapsed
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    out = np.empty_like(values)
+    out[:1] = np.nan
+    out[1:] = values[1:] - values[:-1]
+    return out
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    `pandas_ta.ema`: an EMA (alpha = 2 / (length + 1), adjust=False) seeded with the mean of the first
+    `length` values at bar length - 1.
+    """
+    values = np.asarray(values, dtype='float64')
+    if len(values) < length:
+        return np.full(len(values), np.nan)
+    seeded = values.copy()
+    seeded[:length - 1] = np.nan
+    seeded[length - 1] = np.nanmean(values[:length]) if not np.isnan(values[:length]).all() else np.nan
+    return ewm_mean(seeded, 2.0 / (length + 1), False, 0)
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    `pandas_ta.rma`: Wilder's moving average, an adjusted EMA with alpha = 1 / length.
+    """
+    return ewm_mean(np.asarray(values, dtype='float64'), 1.0 / length, True, length)
+
+def rsi(close: np.ndarray, length: int) -> np.ndarray:
+    """
+    `pandas_ta.rsi`: 100 * RMA(gains) / (RMA(gains) + |RMA(losses)|).
+    """
+    change = _diff(np.asarray(close, dtype='float64'))
+    gains = np.where(change < 0, 0.0, change)
+    losses = np.where(change > 0, 0.0, change)
+    average_gain = rma(gains, length)
+    return 100 * average_gain / (average_gain + np.abs(rma(losses, length)))
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int) -> np.ndarray:
+    """
+    `pandas_ta.atr` (RMA smoothing): Wilder's average of the true range.
+    """
+    high, low, close = (np.asarray(x, dtype='float64') for x in (high, low, close))
+    high_low = high - low
+    if (high_low == 0).any():
+        high_low = high_low + sys.float_info.epsilon  # pandas_ta.utils.non_zero_range
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(np.fmax(np.abs(high_low), np.abs(high - previous_close)), np.abs(previous_close - low))
+    true_range[:1] = np.nan
+    return rma(true_range, length)
+
+def macd(close: np.ndarray, fast: int, slow: int, signal: int) -> Dict[str, np.ndarray]:
+    """
+    `pandas_ta.macd`: the MACD line, its histogram and its signal line, an EMA started at the first
+    valid MACD value.
+
+    Returns:
+        Dict[str, np.ndarray]: The columns by pandas_ta name, e.g. 'MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9'.
+    """
+    if slow < fast:
+        fast, slow = slow, fast
+    close = np.asarray(close, dtype='float64')
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(len(close), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    props = f"_{fast}_{slow}_{signal}"
+    return {f"MACD{props}": line, f"MACDh{props}": line - signal_line, f"MACDs{props}": signal_line}
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    `pandas_ta.obv`: running sum of the volume signed by the direction of the close. A running sum
+    vectorizes, so it needs no compiled loop.
+    """
+    close = np.asarray(close, dtype='float64')
+    sign = np.sign(_diff(close))
+    sign[:1] = 1
+    signed_volume = sign * np.asarray(volume, dtype='float64')
+    out = np.nancumsum(signed_volume)
+    out[np.isnan(signed_volume)] = np.nan
+    return out
+
+_warned: Dict[str, bool] = {}
+
+def check_backend(backend: str, feature: str) -> str:
+    """
+    Validate a feature's backend, warning once per feature when the JIT backend runs without Numba.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r} for {feature}, expected one of {BACKENDS}")
+    if backend == JIT and numba is None and not _warned.get(feature):
+        _warned[feature] = True
+        logger.warning(f"Numba is not installed, the {JIT} kernels of {feature} run as plain Python loops")
+    return backend
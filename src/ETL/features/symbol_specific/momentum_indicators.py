@@ -1,8 +1,13 @@
 import pandas as pd
 import pandas_ta as ta
-from ETL.features.base_feature import BaseFeature
+from ETL.features import recursions
+from ETL.features.base_feature import BaseFeature, ewm_warmup
+
+STOCH_SMOOTH_K = 3  # %K smoothing period (pandas_ta default)
 
 class RSI(BaseFeature):
+    backend = recursions.PANDAS_TA
+
     def __init__(self, length: int):
         """
         Initialize the Relative Strength Index (RSI) feature.
@@ -13,6 +18,13 @@ class RSI(BaseFeature):
         super().__init__(f"RSI_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        One bar for the price difference plus the warm-up of the RMA (alpha = 1 / length) recursion.
+        """
+        return 1 + ewm_warmup(1 / self.length)
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Relative Strength Index (RSI) for the given DataFrame.
@@ -23,9 +35,13 @@ class RSI(BaseFeature):
         Returns:
             pd.Series: The computed RSI values.
         """
+        if recursions.check_backend(self.backend, self.name) == recursions.JIT:
+            return pd.Series(recursions.rsi(df['close'].to_numpy(), self.length), index=df.index)
         return ta.rsi(df['close'], length=self.length)
 
 class MACD(BaseFeature):
+    backend = recursions.PANDAS_TA
+
     def __init__(self, fast: int, slow: int, signal: int):
         """
         Initialize the Moving Average Convergence Divergence (MACD) feature.
@@ -40,6 +56,13 @@ class MACD(BaseFeature):
         self.slow = slow
         self.signal = signal
 
+    @property
+    def lookback(self) -> int:
+        """
+        Warm-up of the slow EMA followed by the warm-up of the signal EMA computed on the MACD line.
+        """
+        return (self.slow - 1 + ewm_warmup(2 / (self.slow + 1))) + (self.signal - 1 + ewm_warmup(2 / (self.signal + 1)))
+
     def compute(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Compute the Moving Average Convergence Divergence (MACD) for the given DataFrame.
@@ -50,6 +73,8 @@ class MACD(BaseFeature):
         Returns:
             pd.DataFrame: The computed MACD values.
         """
+        if recursions.check_backend(self.backend, self.name) == recursions.JIT:
+            return pd.DataFrame(recursions.macd(df['close'].to_numpy(), self.fast, self.slow, self.signal), index=df.index)
         macd = ta.macd(df['close'], fast=self.fast, slow=self.slow, signal=self.signal)
         return macd
 
@@ -66,6 +91,13 @@ class STOCH(BaseFeature):
         self.k = k
         self.d = d
 
+    @property
+    def lookback(self) -> int:
+        """
+        Rolling high/low over k bars, smoothed %K and then %D simple moving averages.
+        """
+        return (self.k - 1) + (STOCH_SMOOTH_K - 1) + (self.d - 1)
+
     def compute(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Compute the Stochastic Oscillator (STOCH) for the given DataFrame.
@@ -76,5 +108,5 @@ class STOCH(BaseFeature):
         Returns:
             pd.DataFrame: The computed STOCH values.
         """
-        stoch = ta.stoch(df['high'], df['low'], df['close'], k=self.k, d=self.d)
+        stoch = ta.stoch(df['high'], df['low'], df['close'], k=self.k, d=self.d, smooth_k=STOCH_SMOOTH_K)
         return stoch
\ No newline at end of file
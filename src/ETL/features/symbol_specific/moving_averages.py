@@ -1,8 +1,15 @@
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
-from ETL.features.base_feature import BaseFeature
+from typing import Any, Dict, List
+from ETL.features.base_feature import BaseFeature, ewm_warmup
+from ETL.features import recursions
+from ETL.features.kernels import rolling_means
 
 class SMA(BaseFeature):
+    batched = True
+    supports_panel = True
+
     def __init__(self, length: int):
         """
         Initialize the Simple Moving Average (SMA) feature.
@@ -13,6 +20,13 @@ class SMA(BaseFeature):
         super().__init__(f"SMA_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        A rolling mean needs the previous length - 1 bars.
+        """
+        return self.length - 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Simple Moving Average (SMA) for the given DataFrame.
@@ -25,7 +39,41 @@ class SMA(BaseFeature):
         """
         return ta.sma(df['close'], length=self.length)
 
+    @classmethod
+    def compute_batch(cls, df: pd.DataFrame, param_combinations: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Compute the SMA of every length from a single cumulative sum of the close prices.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame containing 'close' prices.
+            param_combinations (List[Dict[str, Any]]): One {'length': ...} per instance.
+
+        Returns:
+            pd.DataFrame: One SMA_<length> column per combination.
+        """
+        lengths = [params['length'] for params in param_combinations]
+        means = rolling_means(df['close'].to_numpy(), lengths)
+        return pd.DataFrame(means, index=df.index, columns=[f"SMA_{length}" for length in lengths])
+
+    @classmethod
+    def compute_panel(cls, panel, param_combinations: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Compute the SMA of every length for all symbols of a panel from one cumulative sum per symbol.
+
+        Args:
+            panel (SymbolPanel): The stacked bars of the symbols.
+            param_combinations (List[Dict[str, Any]]): One {'length': ...} per instance.
+
+        Returns:
+            Dict[str, np.ndarray]: A (time x symbol) matrix per SMA_<length> column.
+        """
+        lengths = [params['length'] for params in param_combinations]
+        means = rolling_means(panel.matrix('close'), lengths)
+        return {f"SMA_{length}": means[:, :, j] for j, length in enumerate(lengths)}
+
 class EMA(BaseFeature):
+    backend = recursions.PANDAS_TA
+
     def __init__(self, length: int):
         """
         Initialize the Exponential Moving Average (EMA) feature.
@@ -36,6 +84,13 @@ class EMA(BaseFeature):
         super().__init__(f"EMA_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        The SMA seed window plus the bars needed for the EMA recursion to forget its seed.
+        """
+        return self.length - 1 + ewm_warmup(2 / (self.length + 1))
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Exponential Moving Average (EMA) for the given DataFrame.
@@ -46,6 +101,8 @@ class EMA(BaseFeature):
         Returns:
             pd.Series: The computed EMA values.
         """
+        if recursions.check_backend(self.backend, self.name) == recursions.JIT:
+            return pd.Series(recursions.ema(df['close'].to_numpy(), self.length), index=df.index)
         return ta.ema(df['close'], length=self.length)
 
 class WMA(BaseFeature):
@@ -59,6 +116,13 @@ class WMA(BaseFeature):
         super().__init__(f"WMA_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        A rolling weighted mean needs the previous length - 1 bars.
+        """
+        return self.length - 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Weighted Moving Average (WMA) for the given DataFrame.
@@ -82,6 +146,13 @@ class HMA(BaseFeature):
         super().__init__(f"HMA_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        The WMA over length bars followed by a WMA over sqrt(length) bars.
+        """
+        return self.length - 1 + int(self.length ** 0.5) - 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Hull Moving Average (HMA) for the given DataFrame.
@@ -101,6 +172,13 @@ class VWAP(BaseFeature):
         """
         super().__init__("VWAP")
 
+    @property
+    def lookback(self) -> int:
+        """
+        VWAP is anchored daily, so up to one day of minute bars is needed.
+        """
+        return 1440
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Volume Weighted Average Price (VWAP) for the given DataFrame.
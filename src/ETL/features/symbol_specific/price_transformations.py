@@ -3,12 +3,21 @@ import numpy as np
 from ETL.features.base_feature import BaseFeature
 
 class LogReturns(BaseFeature):
+    supports_panel = True
+
     def __init__(self):
         """
         Initialize the Log Returns feature.
         """
         super().__init__("Log_Returns")
 
+    @property
+    def lookback(self) -> int:
+        """
+        One previous close.
+        """
+        return 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Log Returns for the given DataFrame.
@@ -22,6 +31,8 @@ class LogReturns(BaseFeature):
         return np.log(df['close'] / df['close'].shift(1))
 
 class PctChange(BaseFeature):
+    supports_panel = True
+
     def __init__(self, periods: int):
         """
         Initialize the Percentage Change feature.
@@ -32,6 +43,13 @@ class PctChange(BaseFeature):
         super().__init__(f"Pct_Change_{periods}")
         self.periods = periods
 
+    @property
+    def lookback(self) -> int:
+        """
+        The close `periods` bars back.
+        """
+        return self.periods
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Percentage Change for the given DataFrame.
@@ -45,6 +63,8 @@ class PctChange(BaseFeature):
         return df['close'].pct_change(periods=self.periods)
 
 class ZScore(BaseFeature):
+    supports_panel = True
+
     def __init__(self, window: int):
         """
         Initialize the Z-Score feature.
@@ -55,6 +75,13 @@ class ZScore(BaseFeature):
         super().__init__(f"Z_Score_{window}")
         self.window = window
 
+    @property
+    def lookback(self) -> int:
+        """
+        A rolling mean and standard deviation over window bars.
+        """
+        return self.window - 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Z-Score for the given DataFrame.
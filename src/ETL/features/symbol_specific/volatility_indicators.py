@@ -1,8 +1,15 @@
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
-from ETL.features.base_feature import BaseFeature
+from typing import Any, Dict, List
+from ETL.features import recursions
+from ETL.features.base_feature import BaseFeature, ewm_warmup
+from ETL.features.kernels import bollinger_bands, bollinger_columns, rolling_means
 
 class BBANDS(BaseFeature):
+    batched = True
+    supports_panel = True
+
     def __init__(self, length: int, std: int):
         """
         Initialize the Bollinger Bands (BBANDS) feature.
@@ -15,6 +22,13 @@ class BBANDS(BaseFeature):
         self.length = length
         self.std = std
 
+    @property
+    def lookback(self) -> int:
+        """
+        A rolling mean and standard deviation over length bars.
+        """
+        return self.length - 1
+
     def compute(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Compute the Bollinger Bands (BBANDS) for the given DataFrame.
@@ -28,7 +42,62 @@ class BBANDS(BaseFeature):
         bbands = ta.bbands(df['close'], length=self.length, std=self.std)
         return bbands
 
+    @classmethod
+    def compute_batch(cls, df: pd.DataFrame, param_combinations: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Compute the bands of every (length, std) pair: one cumulative sum serves the middle bands of
+        all lengths, and the rolling variance of each length serves all of its multipliers.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame containing 'close' prices.
+            param_combinations (List[Dict[str, Any]]): One {'length': ..., 'std': ...} per instance.
+
+        Returns:
+            pd.DataFrame: The BBANDS_<length>_<std>_* columns of every combination.
+        """
+        close = df['close']
+        lengths = sorted({params['length'] for params in param_combinations})
+        mids = rolling_means(close.to_numpy(), lengths)
+        bands = {}
+        for j, length in enumerate(lengths):
+            stds = [params['std'] for params in param_combinations if params['length'] == length]
+            bands[length] = bollinger_bands(close, length, stds, mid=mids[:, j])
+        columns = {}
+        for params in param_combinations:
+            name = f"BBANDS_{params['length']}_{params['std']}"
+            for col, values in bands[params['length']][float(params['std'])].items():
+                columns[f"{name}_{col}"] = values
+        return pd.DataFrame(columns, index=df.index)
+
+    @classmethod
+    def compute_panel(cls, panel, param_combinations: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Compute the bands of every (length, std) pair for all symbols of a panel at once.
+
+        Args:
+            panel (SymbolPanel): The stacked bars of the symbols.
+            param_combinations (List[Dict[str, Any]]): One {'length': ..., 'std': ...} per instance.
+
+        Returns:
+            Dict[str, np.ndarray]: A (time x symbol) matrix per BBANDS_<length>_<std>_* column.
+        """
+        close = panel.matrix('close')
+        lengths = sorted({params['length'] for params in param_combinations})
+        mids = rolling_means(close, lengths)
+        deviations = {length: np.sqrt(panel['close'].rolling(length, min_periods=length).var(ddof=0).to_numpy())
+                      for length in lengths}
+        columns = {}
+        for params in param_combinations:
+            length = params['length']
+            name = f"BBANDS_{length}_{params['std']}"
+            bands = bollinger_columns(close, mids[:, :, lengths.index(length)], deviations[length], length, params['std'])
+            for col, values in bands.items():
+                columns[f"{name}_{col}"] = values
+        return columns
+
 class ATR(BaseFeature):
+    backend = recursions.PANDAS_TA
+
     def __init__(self, length: int):
         """
         Initialize the Average True Range (ATR) feature.
@@ -39,6 +108,13 @@ class ATR(BaseFeature):
         super().__init__(f"ATR_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        One bar for the previous close of the true range plus the warm-up of the RMA recursion.
+        """
+        return 1 + ewm_warmup(1 / self.length)
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Average True Range (ATR) for the given DataFrame.
@@ -49,9 +125,14 @@ class ATR(BaseFeature):
         Returns:
             pd.Series: The computed ATR values.
         """
+        if recursions.check_backend(self.backend, self.name) == recursions.JIT:
+            return pd.Series(recursions.atr(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), self.length),
+                             index=df.index)
         return ta.atr(df['high'], df['low'], df['close'], length=self.length)
 
 class Volatility(BaseFeature):
+    supports_panel = True
+
     def __init__(self, window: int):
         """
         Initialize the Volatility feature.
@@ -62,6 +143,13 @@ class Volatility(BaseFeature):
         super().__init__(f"Volatility_{window}")
         self.window = window
 
+    @property
+    def lookback(self) -> int:
+        """
+        One bar for the returns plus a rolling window of returns.
+        """
+        return self.window
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Volatility for the given DataFrame.
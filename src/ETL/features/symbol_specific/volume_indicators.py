@@ -1,14 +1,25 @@
 import pandas as pd
 import pandas_ta as ta
+from ETL.features import recursions
 from ETL.features.base_feature import BaseFeature
 
 class OBV(BaseFeature):
+    cumulative = True
+    backend = recursions.PANDAS_TA
+
     def __init__(self):
         """
         Initialize the On-Balance Volume (OBV) feature.
         """
         super().__init__("OBV")
 
+    @property
+    def lookback(self) -> int:
+        """
+        Only the previous close is needed, the running sum is rebased onto the stored value.
+        """
+        return 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the On-Balance Volume (OBV) for the given DataFrame.
@@ -19,6 +30,8 @@ class OBV(BaseFeature):
         Returns:
             pd.Series: The computed OBV values.
         """
+        if recursions.check_backend(self.backend, self.name) == recursions.JIT:
+            return pd.Series(recursions.obv(df['close'].to_numpy(), df['tick_volume'].to_numpy()), index=df.index)
         return ta.obv(df['close'], df['tick_volume'])
 
 class CMF(BaseFeature):
@@ -32,6 +45,13 @@ class CMF(BaseFeature):
         super().__init__(f"CMF_{length}")
         self.length = length
 
+    @property
+    def lookback(self) -> int:
+        """
+        Rolling sums over length bars.
+        """
+        return self.length - 1
+
     def compute(self, df: pd.DataFrame) -> pd.Series:
         """
         Compute the Chaikin Money Flow (CMF) for the given DataFrame.
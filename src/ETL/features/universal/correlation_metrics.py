@@ -2,6 +2,8 @@ import pandas as pd
 from ETL.features.base_feature import BaseFeature
 
 class ClosePriceCorrelation(BaseFeature):
+    input_columns = ['close']
+
     def __init__(self):
         """
         Initialize the Close Price Correlation feature.
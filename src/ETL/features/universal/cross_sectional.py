@@ -0,0 +1,61 @@
+import pandas as pd
+
+from data_selection.create_symbols_list import symbol_category
+from ETL.features.base_feature import BaseFeature
+from ETL.features.kernels import cross_sectional_rank, cross_sectional_zscore, within_groups
+
+class CrossSectionalFeature(BaseFeature):
+    """
+    A per-symbol column of the panel (returns, RSI, volatility...) compared across symbols at every
+    timestamp, over the whole universe or within asset classes (data_selection.create_symbols_list).
+    Each timestamp is computed on its own, so the stream only computes newly appended rows.
+    """
+    input_columns = ['Log_Returns']
+    rowwise = True
+    # Column name prefix and row-wise kernel of the subclasses
+    prefix = ''
+    kernel = None
+
+    def __init__(self, column: str = 'Log_Returns', by_category: bool = False):
+        """
+        Initialize the cross-sectional feature.
+
+        Args:
+            column (str): Symbol-specific column compared across symbols, e.g. 'Log_Returns', 'RSI_14'
+                          or 'Volatility_20'.
+            by_category (bool): Compare each symbol with the symbols of its asset class only, symbols
+                                outside every class forming one group.
+        """
+        super().__init__(f"{self.prefix}_{column}" + ("_Category" if by_category else ""))
+        self.column = column
+        self.by_category = by_category
+        self.input_columns = [column]
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the feature of every symbol of the panel.
+
+        Args:
+            df (pd.DataFrame): Panel with (field, symbol) columns including `column`.
+
+        Returns:
+            pd.DataFrame: One column per symbol.
+        """
+        values = df[self.column]
+        groups = [symbol_category(symbol) for symbol in values.columns] if self.by_category else None
+        result = within_groups(self.kernel, values.to_numpy(dtype='float64'), groups)
+        return pd.DataFrame(result, index=df.index, columns=values.columns)
+
+class CrossSectionalRank(CrossSectionalFeature):
+    """
+    Percentile rank of a column across symbols at every timestamp, in (0, 1], ties averaged.
+    """
+    prefix = 'CS_Rank'
+    kernel = staticmethod(cross_sectional_rank)
+
+class CrossSectionalZScore(CrossSectionalFeature):
+    """
+    Z-score of a column across symbols at every timestamp.
+    """
+    prefix = 'CS_ZScore'
+    kernel = staticmethod(cross_sectional_zscore)
@@ -2,6 +2,9 @@ from ETL.features.base_feature import BaseFeature
 import pandas as pd
 
 class AverageCloseAllSymbols(BaseFeature):
+    input_columns = ['close']
+    rowwise = True
+
     def __init__(self):
         super().__init__("Average_Close_All_Symbols")
 
@@ -9,10 +12,14 @@ class AverageCloseAllSymbols(BaseFeature):
         return df['close'].mean(axis=1)
 
 class MedianVolumeAllSymbols(BaseFeature):
+    # Stored frames carry the tick volume as 'volume' (renamed by FeatureEngineer.apply_symbol_features)
+    input_columns = ['volume']
+    rowwise = True
+
     def __init__(self):
         super().__init__("Median_Volume_All_Symbols")
 
     def compute(self, df: pd.DataFrame) -> pd.Series:
-        return df['tick_volume'].median(axis=1)
+        return df['volume'].median(axis=1)
 
 # Similarly, define other universal metrics like correlation metrics, etc.
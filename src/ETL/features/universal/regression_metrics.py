@@ -0,0 +1,55 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ETL.features.base_feature import BaseFeature
+from ETL.features.kernels import rolling_regression
+
+class RollingRegression(BaseFeature):
+    """
+    Rolling beta, alpha and R² of the log returns of every symbol regressed on those of a reference
+    symbol (e.g. SP500, USDX or BTCUSD), all symbols at once from running sums (see kernels.rolling_regression).
+    """
+    input_columns = ['Log_Returns']
+    windowed = True
+
+    def __init__(self, reference: str = 'SP500', window: int = 240, min_periods: Optional[int] = None):
+        """
+        Initialize the rolling regression against a reference symbol.
+
+        Args:
+            reference (str): Symbol whose returns are the regressor.
+            window (int): Rows of the panel per regression window.
+            min_periods (int, optional): Bars both symbols need within a window, `window` if None.
+        """
+        super().__init__(f"Regression_{reference}_{window}")
+        self.reference = reference
+        self.window = window
+        self.min_periods = min_periods
+
+    @property
+    def lookback(self) -> int:
+        return self.window - 1
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the regressions of every symbol of the panel except the reference.
+
+        Args:
+            df (pd.DataFrame): Panel with (field, symbol) columns including 'Log_Returns'.
+
+        Returns:
+            pd.DataFrame: Beta_<symbol>, Alpha_<symbol> and R2_<symbol> columns.
+
+        Raises:
+            ValueError: If the reference symbol is not in the panel.
+        """
+        returns = df['Log_Returns']
+        if self.reference not in returns.columns:
+            raise ValueError(f"Reference symbol {self.reference} is not in the cross-section")
+        symbols = [symbol for symbol in returns.columns if symbol != self.reference]
+        beta, alpha, r2 = rolling_regression(returns[self.reference].to_numpy(dtype='float64'),
+                                             returns[symbols].to_numpy(dtype='float64'), self.window, self.min_periods)
+        columns = [f"{stat}_{symbol}" for stat in ('Beta', 'Alpha', 'R2') for symbol in symbols]
+        return pd.DataFrame(np.concatenate((beta, alpha, r2), axis=1), index=df.index, columns=columns)
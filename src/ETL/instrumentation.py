@@ -0,0 +1,173 @@
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows, where the MetaTrader5 terminal runs
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of the current process since it started, None if it cannot be determined.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # kilobytes on Linux
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss)
+    except ImportError:
+        return None
+
+def frame_bytes(df: Optional[pd.DataFrame]) -> int:
+    """
+    Shallow in-memory size of a DataFrame including its index.
+    """
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+class MetricsRegistry:
+    """
+    In-process registry of per-stage measurements (wall time, CPU time, rows, bytes and the process peak RSS).
+
+    CPU time is that of the thread running the stage, so that stages running side by side in the threads
+    of the asyncio mode are not charged each other's CPU; a stage awaiting work done in other threads (the
+    asyncio 'process_symbol') only counts the event loop's. The peak RSS is the high-water mark of the whole
+    process when the stage ended, it cannot attribute memory to a stage.
+
+    Every process has its own registry: worker processes hand the records of a symbol back to the
+    parent with `pop_symbol`, which merges them with `extend`.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, stage: str, symbol: Optional[str] = None, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Measure a block of code. The yielded record can be updated with 'rows' and 'bytes' once known.
+
+        Args:
+            stage (str): Name of the stage, e.g. 'fetch' or 'feature:SMA'.
+            symbol (str, optional): Symbol the stage processed.
+            rows (int, optional): Number of rows processed, if known upfront.
+        """
+        record: Dict[str, Any] = {"stage": stage, "symbol": symbol, "rows": rows, "bytes": None, "pid": os.getpid()}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall_start
+            record["cpu_s"] = time.thread_time() - cpu_start
+            record["process_peak_rss_bytes"] = peak_rss_bytes()
+            self.records.append(record)
+
+    def timed(self, stage: str) -> Callable:
+        """
+        Decorator measuring every call of a function as `stage`. A 'symbol' keyword argument is used as label.
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage, symbol=kwargs.get('symbol')):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def pop_symbol(self, symbol: str) -> List[Dict[str, Any]]:
+        """
+        Remove and return the records of a symbol.
+        """
+        popped = [record for record in self.records if record["symbol"] == symbol]
+        self.records = [record for record in self.records if record["symbol"] != symbol]
+        return popped
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        self.records.extend(records)
+
+    def clear(self) -> None:
+        self.records = []
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate the records per stage.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per stage the call count, total wall/CPU seconds, rows and bytes,
+                                       and the process peak RSS observed after its last call.
+        """
+        summary: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            entry = summary.setdefault(record["stage"], {
+                "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0, "bytes": 0, "process_peak_rss_bytes": None
+            })
+            entry["count"] += 1
+            entry["wall_s"] += record["wall_s"]
+            entry["cpu_s"] += record["cpu_s"]
+            entry["rows"] += record["rows"] or 0
+            entry["bytes"] += record["bytes"] or 0
+            if record["process_peak_rss_bytes"] is not None:
+                entry["process_peak_rss_bytes"] = max(entry["process_peak_rss_bytes"] or 0, record["process_peak_rss_bytes"])
+        return summary
+
+    def to_prometheus(self) -> str:
+        """
+        Export the records in the Prometheus text exposition format, aggregated per stage and symbol.
+        """
+        metrics = [
+            ('etl_stage_wall_seconds', 'counter', 'Wall time spent per ETL stage', 'wall_s', sum),
+            ('etl_stage_cpu_seconds', 'counter', 'CPU time of the thread running an ETL stage', 'cpu_s', sum),
+            ('etl_stage_rows', 'counter', 'Rows processed per ETL stage', 'rows', sum),
+            ('etl_stage_bytes', 'counter', 'Bytes processed per ETL stage', 'bytes', sum),
+            ('etl_process_peak_rss_bytes', 'gauge',
+             'Peak resident set size of the process since it started, read after an ETL stage (not the memory of the stage)',
+             'process_peak_rss_bytes', max),
+        ]
+        lines = []
+        for name, metric_type, help_text, field, reduce in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            grouped: Dict[tuple, List[float]] = {}
+            for record in self.records:
+                if record[field] is not None:
+                    grouped.setdefault((record["stage"], record["symbol"] or ''), []).append(record[field])
+            for (stage, symbol), values in sorted(grouped.items()):
+                lines.append(f'{name}{{stage="{_escape_label(stage)}",symbol="{_escape_label(symbol)}"}} {reduce(values)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Write a JSON run report (summary and raw records) and a Prometheus text file next to it.
+
+        Args:
+            path (str): Path of the JSON report; the Prometheus file uses the same name with a '.prom' suffix.
+            extra (Dict[str, Any], optional): Additional top-level fields, e.g. the run id.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        report = {**(extra or {}), "summary": self.summary(), "records": self.records}
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=4, default=str)
+        with open(os.path.splitext(path)[0] + '.prom', 'w') as f:
+            f.write(self.to_prometheus())
+        logger.info(f"Run report written to {path}")
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Registry of the current process
+registry = MetricsRegistry()
@@ -0,0 +1,221 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from ETL.data_store import DataStore
+from ETL.instrumentation import registry
+from ETL.run_journal import RunJournal
+
+logger = logging.getLogger(__name__)
+
+# A symbol is fragmented when compacting it would merge away at least MIN_SEGMENTS segments; ArcticDB
+# writes segments of up to 100k rows, while every incremental update of the ETL adds a segment of a few
+# minutes of bars
+DEFAULT_MIN_SEGMENTS = 8
+
+# ArcticDB runtime setting holding that threshold for is_symbol_fragmented and defragment_symbol_data
+# (100 by default). It is process-wide, so it is only set while a maintenance runs (see compaction_threshold)
+SEGMENT_COUNT_CONFIG = 'SymbolDataCompact.SegmentCount'
+
+@contextmanager
+def compaction_threshold(min_segments: int) -> Iterator[None]:
+    """
+    Set ArcticDB's compaction threshold to `min_segments` for the duration of the block and restore the
+    previous setting afterwards, so that other users of ArcticDB in the process keep theirs.
+    """
+    from arcticdb_ext import get_config_int, set_config_int, unset_config_int
+    previous = get_config_int(SEGMENT_COUNT_CONFIG)
+    set_config_int(SEGMENT_COUNT_CONFIG, min_segments)
+    try:
+        yield
+    finally:
+        if previous is None:
+            unset_config_int(SEGMENT_COUNT_CONFIG)
+        else:
+            set_config_int(SEGMENT_COUNT_CONFIG, previous)
+
+class StoreMaintenance:
+    """
+    Compaction and version retention of a library written by incremental appends.
+
+    Every `update` of a symbol adds at least one data segment and one version, so after weeks of minute
+    runs a symbol is spread over thousands of small segments (slow reads, many S3 objects) and keeps
+    every superseded version. `run` detects fragmented symbols with ArcticDB's `is_symbol_fragmented`,
+    merges their segments with `defragment_symbol_data`, restores their metadata (watermark, price codec)
+    on the new version and deletes versions beyond the retention policy.
+
+    Defragmentation writes a version without metadata and the watermark and price codec are written back
+    by a second call: in between, a reader gets the integer point counts of fixed-point prices and an ETL
+    update finds neither codec nor watermark. With the ETL's `journal`, `run` therefore holds the journal's
+    maintenance lease, refusing to start while a run is unfinished and keeping runs from starting until it
+    is done, and every compacted symbol is checked to carry its metadata again before `run` moves on.
+    Processes that only read the libraries are not coordinated and should not read during a maintenance.
+    """
+
+    def __init__(self, store: DataStore, min_segments: int = DEFAULT_MIN_SEGMENTS, segment_size: Optional[int] = None,
+                 keep_versions: int = 1, journal: Optional[RunJournal] = None) -> None:
+        """
+        Initialize the maintenance of a library.
+
+        Args:
+            store (DataStore): The library to maintain.
+            min_segments (int): Segments a compaction must merge away for a symbol to be compacted.
+            segment_size (int, optional): Target rows per segment after compaction, the library's
+                                          `segment_row_size` if None.
+            keep_versions (int): Versions kept per symbol, the latest included; versions referenced by
+                                 snapshots stay readable from their snapshots.
+            journal (RunJournal, optional): Run journal of the ETL writing the library, see the class docstring.
+        """
+        if keep_versions < 1:
+            raise ValueError("keep_versions must be at least 1")
+        self.store = store
+        self.min_segments = min_segments
+        self.segment_size = segment_size
+        self.keep_versions = keep_versions
+        self.journal = journal
+
+    def fragmentation(self, symbol: str) -> Dict[str, Any]:
+        """
+        State of the latest version of a symbol, from public library calls.
+
+        ArcticDB does not report the segments of a symbol, but `is_symbol_fragmented` tells whether a
+        compaction would merge away at least as many row slices as the threshold, so the slices it would
+        merge away are found by searching the threshold, and the symbol has that many more slices than its
+        rows fill at `segment_size` rows per slice.
+
+        Returns:
+            Dict[str, Any]: Rows, row slices, average rows per slice, live versions and whether the
+                            symbol is fragmented.
+        """
+        rows = int(self.store.lib.get_description(symbol).row_count)
+        mergeable = self._mergeable_segments(symbol)
+        segment_size = self.segment_size or self.store.lib.options().rows_per_segment
+        segments = mergeable + -(-rows // segment_size)
+        return {
+            "rows": rows,
+            "segments": segments,
+            "rows_per_segment": rows / segments if segments else 0.0,
+            "versions": len(self._versions(symbol)),
+            "fragmented": mergeable >= self.min_segments,
+        }
+
+    def _mergeable_segments(self, symbol: str) -> int:
+        # Largest threshold under which the symbol is fragmented: doubled until it is not, then bisected
+        def fragmented(threshold: int) -> bool:
+            with compaction_threshold(threshold):
+                return self.store.lib.is_symbol_fragmented(symbol, self.segment_size)
+
+        low, high = 0, 1
+        while fragmented(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if fragmented(middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def _versions(self, symbol: str) -> List[int]:
+        return sorted(version.version for version, info in self.store.lib.list_versions(symbol).items()
+                      if not info.deleted)
+
+    def _read_seconds(self, symbol: str) -> float:
+        start = time.perf_counter()
+        self.store.lib.read(symbol)
+        return time.perf_counter() - start
+
+    def run(self, symbols: Optional[List[str]] = None, timings: bool = True) -> List[Dict[str, Any]]:
+        """
+        Compact the fragmented symbols and prune old versions.
+
+        Args:
+            symbols (List[str], optional): Symbols to maintain, all symbols of the library if None.
+            timings (bool): Time a full read of every compacted symbol before and after compaction.
+
+        Returns:
+            List[Dict[str, Any]]: Per symbol: the state before and after, whether it was compacted,
+                                  the versions deleted and the read timings.
+        """
+        existing = set(self.store.list_symbols())
+        symbols = sorted(existing) if symbols is None else [symbol for symbol in symbols if symbol in existing]
+        report = []
+        if self.journal is not None:
+            self.journal.begin_maintenance()
+        try:
+            for symbol in symbols:
+                with registry.stage('maintain_symbol', symbol=symbol) as metrics:
+                    entry = self.maintain_symbol(symbol, timings)
+                    metrics.update(rows=entry["before"]["rows"], compacted=entry["compacted"], pruned=entry["pruned_versions"])
+                report.append(entry)
+                if self.journal is not None:
+                    self.journal.renew_maintenance()
+        finally:
+            if self.journal is not None:
+                self.journal.end_maintenance()
+        compacted = [entry for entry in report if entry["compacted"]]
+        logger.info(f"Maintained {len(report)} symbols of {self.store.library_name}: {len(compacted)} compacted, "
+                    f"{sum(entry['pruned_versions'] for entry in report)} versions pruned")
+        return report
+
+    def maintain_symbol(self, symbol: str, timings: bool = True) -> Dict[str, Any]:
+        """
+        Compact one symbol if it is fragmented, then apply the version retention.
+
+        Raises:
+            RuntimeError: If the metadata of the compacted symbol could not be restored.
+        """
+        before = self.fragmentation(symbol)
+        entry: Dict[str, Any] = {"symbol": symbol, "before": before, "compacted": False,
+                                 "pruned_versions": 0, "read_s_before": None, "read_s_after": None}
+        lib = self.store.lib
+        if before["fragmented"]:
+            if timings:
+                entry["read_s_before"] = self._read_seconds(symbol)
+            # Defragmentation writes a version without metadata, the watermark and codec are written back
+            # right after (see the class docstring for the window in between)
+            metadata = lib.read_metadata(symbol).metadata
+            with compaction_threshold(self.min_segments):
+                lib.defragment_symbol_data(symbol, self.segment_size)
+            if metadata is not None:
+                lib.write_metadata(symbol, metadata)
+                if lib.read_metadata(symbol).metadata != metadata:
+                    raise RuntimeError(f"Metadata of {symbol} was not restored after its compaction")
+            entry["compacted"] = True
+            if timings:
+                entry["read_s_after"] = self._read_seconds(symbol)
+        entry["pruned_versions"] = self.prune_versions(symbol)
+        entry["after"] = self.fragmentation(symbol) if entry["compacted"] or entry["pruned_versions"] else before
+        if entry["compacted"]:
+            logger.info(f"Compacted {symbol}: {before['segments']} -> {entry['after']['segments']} segments"
+                        + (f", full read {entry['read_s_before']:.3f}s -> {entry['read_s_after']:.3f}s" if timings else ""))
+        return entry
+
+    def prune_versions(self, symbol: str) -> int:
+        """
+        Delete the versions of a symbol older than the last `keep_versions`.
+
+        Returns:
+            int: Number of versions deleted.
+        """
+        versions = self._versions(symbol)
+        old = versions[:-self.keep_versions]
+        if old:
+            self.store.lib.delete(symbol, versions=old)
+        return len(old)
+
+    def prune_snapshots(self, prefix: str, keep: int) -> List[str]:
+        """
+        Delete the snapshots named `<prefix>...` except the last `keep` in name order (e.g. dated names),
+        so that the versions they hold can be reclaimed.
+
+        Returns:
+            List[str]: The deleted snapshots.
+        """
+        snapshots = sorted(name for name in self.store.lib.list_snapshots(load_metadata=False) if name.startswith(prefix))
+        deleted = snapshots[:-keep] if keep else snapshots
+        for name in deleted:
+            self.store.lib.delete_snapshot(name)
+            logger.info(f"Deleted snapshot {name} of {self.store.library_name}")
+        return deleted
@@ -0,0 +1,136 @@
+import logging
+import threading
+from os import environ
+from typing import Any, Dict, Optional
+
+from ETL.instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+# MetaTrader5 error codes of a lost or unusable link to the terminal (IPC send/receive failures,
+# failed initialization, no IPC connection, timeout). Other failures, e.g. an unknown symbol or
+# a range without bars, are returned to the caller without reconnecting.
+CONNECTION_ERRORS = frozenset({-10001, -10002, -10003, -10004, -10005})
+
+class Mt5Session:
+    """
+    The MetaTrader5 terminal connection of a process.
+
+    The terminal is initialized and logged in once, on the first call. The terminal API is not
+    thread-safe, so every call goes through `call`, which holds a lock; when a call fails with a
+    connection error the session reconnects and retries the call once. Connects and reconnects are
+    recorded in the metrics registry as 'mt5_connect' and 'mt5_reconnect' stages, labelled with the
+    symbol whose call triggered them so that worker processes hand them back with the symbol metrics.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._mt5 = None
+        self.connected = False
+        self.connections = 0
+        self.reconnects = 0
+
+    @property
+    def mt5(self):
+        """
+        The MetaTrader5 module, imported on first use.
+        """
+        if self._mt5 is None:
+            import MetaTrader5
+            self._mt5 = MetaTrader5
+        return self._mt5
+
+    def _connect(self) -> None:
+        """
+        Initialize the terminal and log in with the credentials from the environment.
+
+        Raises:
+            ValueError: If `mt5_broker_login` is set but is not a numeric account number.
+            RuntimeError: If MetaTrader5 initialization or the login fails.
+        """
+        login = environ.get("mt5_broker_login")
+        if login:
+            try:
+                login = int(login)
+            except ValueError:
+                raise ValueError(f"mt5_broker_login must be the numeric MetaTrader5 account number, got {login!r}") from None
+        mt5 = self.mt5
+        if not mt5.initialize():
+            logger.error(f"Failed to initialize MetaTrader5: {mt5.last_error()}")
+            raise RuntimeError("MetaTrader5 initialization failed")
+        logger.info("MetaTrader5 initialized successfully")
+
+        # MetaTrader 5 login
+        if login:
+            authorized = mt5.login(
+                login=login,
+                password=environ.get("mt5_broker_password"),
+                server=environ.get("mt5_broker_server")
+            )
+            if not authorized:
+                logger.error(f"MetaTrader5 login failed: {mt5.last_error()}")
+                mt5.shutdown()
+                raise RuntimeError(f"MetaTrader5 login to account {login} failed")
+        self.connected = True
+        self.connections += 1
+
+    def connect(self, symbol: Optional[str] = None) -> None:
+        """
+        Connect to the terminal unless this process already did.
+        """
+        with self._lock:
+            if not self.connected:
+                with registry.stage('mt5_connect', symbol=symbol):
+                    self._connect()
+
+    def reconnect(self, symbol: Optional[str] = None) -> None:
+        """
+        Drop the current terminal connection and connect again.
+        """
+        with self._lock:
+            with registry.stage('mt5_reconnect', symbol=symbol):
+                if self.connected:
+                    self.mt5.shutdown()
+                    self.connected = False
+                self.reconnects += 1
+                self._connect()
+
+    def healthy(self) -> bool:
+        """
+        Cheap health check: connected, and the terminal is reachable and connected to the trade server.
+        `call` reconnects when a failed call leaves the session unhealthy.
+        """
+        with self._lock:
+            if not self.connected:
+                return False
+            info = self.mt5.terminal_info()
+            return info is not None and bool(getattr(info, 'connected', True))
+
+    def _connection_lost(self) -> bool:
+        return self.mt5.last_error()[0] in CONNECTION_ERRORS or not self.healthy()
+
+    def call(self, function: str, *args, symbol: Optional[str] = None, **kwargs) -> Any:
+        """
+        Call a MetaTrader5 function, e.g. `call('copy_rates_range', symbol, timeframe, start, end)`.
+
+        Args:
+            function (str): Name of the MetaTrader5 function.
+            symbol (str, optional): Symbol the call is made for, labels connect and reconnect metrics.
+
+        Returns:
+            Any: The result of the function, None when it failed for another reason than the connection.
+        """
+        with self._lock:
+            self.connect(symbol)
+            result = getattr(self.mt5, function)(*args, **kwargs)
+            if result is None and self._connection_lost():
+                logger.warning(f"MetaTrader5 connection lost during {function} ({self.mt5.last_error()}), reconnecting")
+                self.reconnect(symbol)
+                result = getattr(self.mt5, function)(*args, **kwargs)
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"connections": self.connections, "reconnects": self.reconnects}
+
+# Terminal connection of this process, shared by every fetcher
+session = Mt5Session()
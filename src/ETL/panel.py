@@ -0,0 +1,87 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+class SymbolPanel:
+    """
+    The bars of several symbols stacked into (time x symbol) matrices, one per field.
+
+    Symbols trade different hours and incremental windows differ in length, so the columns are aligned
+    on their last bar rather than on timestamps: row -1 is the last bar of every symbol, row -k its k-th
+    bar from the end, and shorter columns are padded with NaN at the top. Rolling windows, shifts and
+    differences along the rows therefore see exactly the bars of each symbol, as on its own frame, and
+    the padding behaves like the missing history before a symbol's first bar.
+
+    `panel['close']` returns a (time x symbol) DataFrame, so feature code written for a frame column
+    (rolling statistics, shift, pct_change) runs on all symbols at once.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]) -> None:
+        """
+        Args:
+            frames (Dict[str, pd.DataFrame]): Per-symbol frames with the fields the features read.
+        """
+        self.frames = frames
+        self.symbols: List[str] = list(frames)
+        self.lengths: List[int] = [len(df) for df in frames.values()]
+        self.rows = max(self.lengths, default=0)
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    def matrix(self, field: str) -> np.ndarray:
+        """
+        The float64 (time x symbol) matrix of a field, built on first use. Fields are read once, columns
+        added to the frames afterwards are not seen.
+        """
+        if field not in self._matrices:
+            values = np.full((self.rows, len(self.symbols)), np.nan)
+            for j, df in enumerate(self.frames.values()):
+                if len(df):
+                    values[self.rows - len(df):, j] = df[field].to_numpy(dtype='float64')
+            self._matrices[field] = values
+        return self._matrices[field]
+
+    def __getitem__(self, field: str) -> pd.DataFrame:
+        return pd.DataFrame(self.matrix(field), columns=self.symbols, copy=False)
+
+    def scatter(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Split a (time x symbol) result into the values of each symbol, aligned with its frame.
+        """
+        values = np.asarray(values)
+        return {symbol: values[self.rows - length:, j] for j, (symbol, length) in enumerate(zip(self.symbols, self.lengths))}
+
+def build_panel(frames: Dict[str, pd.DataFrame], fields: List[str], how: str = 'inner') -> pd.DataFrame:
+    """
+    Assemble the panel used by universal features, MultiIndex columns (field, symbol) over the timestamps
+    common to all symbols, copying every symbol column exactly once.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): Per-symbol frames, e.g. read from the store.
+        fields (List[str]): Columns to keep, fields missing from a frame are left as NaN.
+        how (str): 'inner' keeps the timestamps of all symbols, 'outer' the timestamps of any symbol
+                   with NaN where a symbol has no bar.
+
+    Returns:
+        pd.DataFrame: The panel, columns sorted by field then symbol.
+    """
+    index = None
+    for df in frames.values():
+        if index is None:
+            index = df.index
+        else:
+            index = index.intersection(df.index) if how == 'inner' else index.union(df.index)
+    if index is None:
+        return pd.DataFrame()
+    columns = pd.MultiIndex.from_product([sorted(fields), sorted(frames)])
+    values = np.full((len(index), len(columns)), np.nan, dtype='float64')
+    positions = {}
+    for symbol, df in frames.items():
+        indexer = df.index.get_indexer(index)
+        found = indexer >= 0
+        positions[symbol] = (indexer[found], found)
+    for i, (field, symbol) in enumerate(columns):
+        if field in frames[symbol].columns:
+            indexer, found = positions[symbol]
+            values[found, i] = frames[symbol][field].to_numpy()[indexer]
+    return pd.DataFrame(values, index=index, columns=columns)
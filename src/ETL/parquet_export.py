@@ -0,0 +1,178 @@
+import datetime
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from ETL.data_store import DataStore
+from ETL.instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_export_state.json'
+
+# Partition granularities: directory key, the partition start of timestamps (a Timestamp or a DatetimeIndex),
+# the length of a partition and its directory label
+PARTITIONS = {
+    'day': ('date', lambda ts: ts.floor('D'), pd.DateOffset(days=1), lambda start: start.strftime('%Y-%m-%d')),
+    'month': ('month', lambda ts: ts.to_period('M').start_time, pd.DateOffset(months=1), lambda start: start.strftime('%Y-%m')),
+}
+
+# Rows of a Parquet row group, the unit min/max statistics are kept for
+ROW_GROUP_SIZE = 64 * 1024
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The Parquet export needs pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.parquet
+
+class ParquetExporter:
+    """
+    Export a feature library to a Parquet dataset partitioned by symbol and date, and archive history
+    that was exported out of the library.
+
+    Files are laid out Hive-style, `<root>/<library>/symbol=<symbol>/date=<YYYY-MM-DD>/part.parquet`, so
+    query engines (DuckDB, Spark, pyarrow.dataset) prune partitions from the path and row groups from
+    their min/max statistics. Exports are incremental: every symbol resumes from the partition of the
+    last exported row, which is rewritten since it may have been partial, and the progress is kept in
+    `<root>/_export_state.json`.
+    """
+
+    def __init__(self, store: DataStore, root: str, partition: str = 'day') -> None:
+        """
+        Initialize the exporter.
+
+        Args:
+            store (DataStore): The library to export.
+            root (str): Root directory of the Parquet datasets, one per library.
+            partition (str): Partition granularity, 'day' or 'month'.
+        """
+        if partition not in PARTITIONS:
+            raise ValueError(f"Unknown partition {partition!r}, expected one of {sorted(PARTITIONS)}")
+        self.store = store
+        self.root = root
+        self.partition = partition
+        self.state_path = os.path.join(root, STATE_FILE)
+        self.state: Dict[str, Dict[str, Dict[str, Optional[str]]]] = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def symbol_state(self, symbol: str) -> Dict[str, Optional[str]]:
+        """
+        Export progress of a symbol: the last exported row and the start of the history kept in the library.
+        """
+        return self.state.setdefault(self.store.library_name, {}).setdefault(
+            symbol, {'exported_until': None, 'archived_before': None})
+
+    def partition_start(self, timestamps):
+        """
+        Start of the partition of a timestamp, or of every timestamp of a DatetimeIndex.
+        """
+        return PARTITIONS[self.partition][1](timestamps)
+
+    def partition_path(self, symbol: str, start: pd.Timestamp) -> str:
+        key, _, _, label = PARTITIONS[self.partition]
+        return os.path.join(self.root, self.store.library_name, f"symbol={symbol}", f"{key}={label(start)}", 'part.parquet')
+
+    def export(self, symbols: List[str], read_window: pd.Timedelta = pd.Timedelta(days=31),
+               rebuild: bool = False) -> Dict[str, int]:
+        """
+        Write the partitions of `symbols` added since their last export.
+
+        Args:
+            symbols (List[str]): Symbols to export.
+            read_window (pd.Timedelta): Span of history read from the library at a time.
+            rebuild (bool): Export again everything still in the library, e.g. after a recompute.
+
+        Returns:
+            Dict[str, int]: Partitions written per symbol.
+        """
+        _parquet()  # fail before reading anything
+        watermarks = self.store.get_watermarks(symbols)
+        firsts = self.store.get_first_timestamps(symbols)
+        written = {}
+        for symbol in symbols:
+            state = self.symbol_state(symbol)
+            if watermarks.get(symbol) is None:
+                continue
+            exported_until = None if rebuild else state['exported_until']
+            start = self.partition_start(pd.Timestamp(exported_until) if exported_until else firsts[symbol])
+            with registry.stage('export_symbol', symbol=symbol) as metrics:
+                written[symbol] = self._export_symbol(symbol, start, watermarks[symbol], read_window, state)
+                metrics['partitions'] = written[symbol]
+            logger.info(f"Exported {written[symbol]} partitions of {symbol} from {start}")
+        return written
+
+    def _export_symbol(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, read_window: pd.Timedelta,
+                       state: Dict[str, Optional[str]]) -> int:
+        partitions = 0
+        window_start = start
+        while window_start <= end:
+            # Windows end on a partition boundary, so that no partition is split across reads
+            window_end = max(self.partition_start(window_start + read_window), window_start + PARTITIONS[self.partition][2])
+            data = self.store.retrieve_data(symbol, date_range=(window_start, window_end - pd.Timedelta(1, 'ns')))
+            if not data.empty:
+                for partition_start, rows in data.groupby(self.partition_start(data.index)):
+                    self._write_partition(self.partition_path(symbol, partition_start), rows)
+                    partitions += 1
+                state['exported_until'] = str(data.index.max())
+                self._save_state()  # an interrupted export resumes after the last written window
+            window_start = window_end
+        return partitions
+
+    def _write_partition(self, path: str, rows: pd.DataFrame) -> None:
+        pyarrow, parquet = _parquet()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pyarrow.Table.from_pandas(rows, preserve_index=True)
+        tmp_path = f"{path}.tmp"
+        parquet.write_table(table, tmp_path, compression='zstd', write_statistics=True, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)  # readers never see a partial partition
+
+    def archive(self, symbols: List[str], cutoff: datetime.datetime) -> Dict[str, str]:
+        """
+        Move the history before `cutoff` out of the library into the Parquet dataset: the symbols are
+        exported first, then their rows before the cutoff (rounded down to a partition boundary, so
+        that archived partitions are complete) are deleted from the library with their old versions.
+
+        Args:
+            symbols (List[str]): Symbols to archive.
+            cutoff (datetime.datetime): Rows before this timestamp leave the library.
+
+        Returns:
+            Dict[str, str]: The start of the history kept in the library per archived symbol.
+        """
+        cutoff = self.partition_start(pd.Timestamp(cutoff))
+        self.export(symbols)
+        archived = {}
+        for symbol in symbols:
+            state = self.symbol_state(symbol)
+            if state['exported_until'] is None:
+                continue
+            # Only delete what the export covers, never the partition of the last exported row: the next
+            # export resumes there and rewrites it from the rows still in the library
+            until = min(cutoff, self.partition_start(pd.Timestamp(state['exported_until'])))
+            if state['archived_before'] is not None and pd.Timestamp(state['archived_before']) >= until:
+                continue
+            with registry.stage('archive_symbol', symbol=symbol):
+                self.store.delete_range(symbol, (None, until - pd.Timedelta(1, 'ns')))
+            state['archived_before'] = str(until)
+            self._save_state()
+            archived[symbol] = state['archived_before']
+            logger.info(f"Archived {symbol} before {until} to {self.root}")
+        return archived
@@ -0,0 +1,111 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Key of the ArcticDB symbol metadata describing the encoded price columns
+CODEC_KEY = 'price_codec'
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Headroom kept when choosing int32: a symbol is only stored as int32 if its prices can grow
+# this many times before overflowing, since the dtype of a stored column can never change
+INT32_HEADROOM = 16
+
+class PriceCodec:
+    """
+    Lossless fixed-point encoding of prices: MetaTrader5 quotes every symbol with a fixed number of
+    `digits`, so a price is an integer count of points (10**-digits) stored as int32 or int64 instead of
+    float64. Decoding divides by 10**digits, which gives back the exact float64 the terminal returned.
+
+    A column is only encoded if every value round-trips exactly (no NaN, no value off the point grid);
+    other columns are stored unchanged. The codec is kept in the symbol metadata under CODEC_KEY, and
+    the dtype chosen for the first write is reused by every update since ArcticDB schemas are fixed.
+    """
+
+    def __init__(self, digits: int, dtype: Optional[str] = None, columns: Optional[List[str]] = None) -> None:
+        """
+        Args:
+            digits (int): Decimal digits of the symbol's quotes (`symbol_info.digits`).
+            dtype (str, optional): 'int32' or 'int64', chosen from the first encoded prices if None.
+            columns (List[str], optional): Columns to encode, PRICE_COLUMNS if None.
+        """
+        self.digits = int(digits)
+        self.scale = 10 ** self.digits
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.columns = list(PRICE_COLUMNS if columns is None else columns)
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[Dict[str, Any]]) -> Optional['PriceCodec']:
+        """
+        The codec of a stored symbol, None if its prices are not encoded.
+        """
+        codec = (metadata or {}).get(CODEC_KEY)
+        if not codec:
+            return None
+        return cls(codec['digits'], codec['dtype'], codec['columns'])
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {CODEC_KEY: {'digits': self.digits, 'dtype': self.dtype.name, 'columns': self.columns}}
+
+    def _points(self, values: np.ndarray) -> Optional[np.ndarray]:
+        # Point counts of a column, None if some value would not round-trip
+        points = np.rint(values * self.scale)
+        if not np.isfinite(points).all() or not np.array_equal(points / self.scale, values):
+            return None
+        return points
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Encode the price columns of a frame about to be stored. A codec without a dtype settles its
+        dtype and columns on the first frame: columns that do not round-trip are left as float.
+
+        Args:
+            df (pd.DataFrame): The frame to store.
+
+        Returns:
+            pd.DataFrame: A new frame with integer price columns.
+
+        Raises:
+            ValueError: If the prices of an already stored symbol do not fit its codec (values off the
+                        point grid or beyond the int32 range), the symbol has to be recomputed.
+        """
+        settled = self.dtype is not None
+        encoded = {}
+        for column in self.columns:
+            if column not in df.columns:
+                if settled:
+                    raise ValueError(f"Encoded price column {column} is missing")
+                continue
+            points = self._points(df[column].to_numpy(dtype='float64'))
+            if points is None:
+                if settled:
+                    raise ValueError(f"{column} prices are not multiples of 10**-{self.digits}")
+                logger.warning(f"{column} prices do not round-trip with {self.digits} digits, storing them as float")
+                continue
+            encoded[column] = points
+
+        if not settled:
+            self.columns = list(encoded)
+            peak = max((np.abs(points).max(initial=0) for points in encoded.values()), default=0)
+            self.dtype = np.dtype('int32' if peak * INT32_HEADROOM <= np.iinfo('int32').max else 'int64')
+
+        limit = np.iinfo(self.dtype).max
+        df = df.copy()
+        for column, points in encoded.items():
+            if np.abs(points).max(initial=0) > limit:
+                raise ValueError(f"{column} prices exceed the {self.dtype.name} range of the stored symbol")
+            df[column] = points.astype(self.dtype)
+        return df
+
+    def decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turn the encoded columns of a stored frame back into float64 prices, in place.
+        """
+        for column in self.columns:
+            if column in df.columns:
+                df[column] = df[column].to_numpy(dtype='float64') / self.scale
+        return df
@@ -0,0 +1,165 @@
+import cProfile
+import glob
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set to 1/true/yes to profile every feature instance of a run
+PROFILE_ENV_VAR = 'ETL_PROFILE'
+
+def profiling_enabled() -> bool:
+    """
+    Whether profiling was requested through the ETL_PROFILE environment variable.
+    """
+    return os.environ.get(PROFILE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+class FeatureProfiler:
+    """
+    Opt-in profiler capturing a cProfile call graph and tracemalloc allocation snapshots per feature instance.
+
+    Profiling slows feature computation down considerably (tracemalloc alone roughly doubles it),
+    so it is only enabled on request.
+    """
+
+    def __init__(self, top_n: int = 15, trace_frames: int = 1) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            top_n (int): Number of functions and allocation sites kept per feature instance.
+            trace_frames (int): Stack depth recorded by tracemalloc for each allocation.
+        """
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+        self.entries: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def profile(self, feature_name: str) -> Iterator[None]:
+        """
+        Profile a block computing one feature instance.
+
+        Args:
+            feature_name (str): Name of the feature instance, e.g. 'SMA_10'.
+        """
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.trace_frames)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        profiler = cProfile.Profile()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()  # the thread computing the feature, see ETL/instrumentation.py
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self.entries.append({
+                "feature": feature_name,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "peak_alloc_bytes": traced_peak - traced_before,
+                "retained_bytes": traced_after - traced_before,
+                "top_functions": self._top_functions(profiler),
+                "top_allocations": self._top_allocations(before, after),
+            })
+
+    def _top_functions(self, profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "ncalls": ncalls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            })
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:self.top_n]
+
+    def _top_allocations(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        # Ignore the bookkeeping of tracemalloc and of this module
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        return [
+            {"site": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in diff[:self.top_n]
+        ]
+
+    def report(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the report of the profiled feature instances, most expensive first.
+        """
+        return {
+            "symbol": symbol,
+            "features": sorted(self.entries, key=lambda entry: entry["wall_s"], reverse=True),
+        }
+
+    def write_report(self, path: str, symbol: Optional[str] = None) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(symbol), f, indent=4)
+        logger.info(f"Profile report written to {path}")
+
+def merge_profile_reports(directory: str, top_n: int = 20) -> Dict[str, Any]:
+    """
+    Combine the per-symbol profile reports of a run into a ranking of features and allocation sites,
+    written as 'summary.json' in the same directory.
+
+    Args:
+        directory (str): Directory holding one '<symbol>.json' report per symbol.
+        top_n (int): Number of entries kept in each ranking.
+
+    Returns:
+        Dict[str, Any]: The summary with 'features' ranked by total wall time and 'allocation_sites'
+                        ranked by the bytes they still held when a feature returned (tracemalloc
+                        `size_diff`), summed over symbols.
+    """
+    features: Dict[str, Dict[str, Any]] = {}
+    sites: Dict[str, Dict[str, Any]] = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        if os.path.basename(path) == 'summary.json':
+            continue
+        with open(path, 'r') as f:
+            report = json.load(f)
+        for entry in report['features']:
+            total = features.setdefault(entry['feature'], {
+                "feature": entry['feature'], "wall_s": 0.0, "cpu_s": 0.0, "max_peak_alloc_bytes": 0, "symbols": 0,
+                "slowest_symbol": None, "slowest_wall_s": 0.0,
+            })
+            total["wall_s"] += entry['wall_s']
+            total["cpu_s"] += entry['cpu_s']
+            total["max_peak_alloc_bytes"] = max(total["max_peak_alloc_bytes"], entry['peak_alloc_bytes'])
+            total["symbols"] += 1
+            if entry['wall_s'] > total["slowest_wall_s"]:
+                total["slowest_symbol"], total["slowest_wall_s"] = report['symbol'], entry['wall_s']
+            for allocation in entry['top_allocations']:
+                site = sites.setdefault(allocation['site'], {"site": allocation['site'], "size_diff": 0, "features": set()})
+                site["size_diff"] += allocation['size_diff']
+                site["features"].add(entry['feature'])
+    summary = {
+        "features": sorted(features.values(), key=lambda total: total["wall_s"], reverse=True)[:top_n],
+        "allocation_sites": [
+            {**site, "features": sorted(site["features"])}
+            for site in sorted(sites.values(), key=lambda site: site["size_diff"], reverse=True)[:top_n]
+        ],
+    }
+    with open(os.path.join(directory, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=4)
+    return summary
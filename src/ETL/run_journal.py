@@ -0,0 +1,388 @@
+import datetime
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-symbol stages recorded during a run, in pipeline order
+STAGES = ('fetched', 'computed', 'stored')
+FAILED = 'failed'
+
+RUNNING = 'Running'
+COMPLETED = 'Completed'
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Seconds after which the lease of a store maintenance that stopped renewing it (a crashed process) is
+# ignored; a running maintenance renews it after every symbol
+MAINTENANCE_LEASE_SECONDS = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    symbol TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    last_timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS progress (
+    run_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    rows INTEGER,
+    updated_at TEXT NOT NULL,
+    details TEXT,
+    PRIMARY KEY (run_id, symbol)
+);
+CREATE TABLE IF NOT EXISTS maintenance (
+    lease INTEGER PRIMARY KEY CHECK (lease = 1),
+    owner TEXT NOT NULL,
+    renewed_at TEXT NOT NULL
+);
+"""
+
+class RunJournal:
+    """
+    Transactional journal of symbol metadata and ETL run progress backed by SQLite.
+
+    Every per-symbol update is a single-row transaction, so the cost of recording progress does not
+    grow with the number of symbols. The legacy `metadata.json` layout is kept as a read-only snapshot
+    that is written atomically (temporary file + rename) at the end of a run.
+    """
+
+    def __init__(self, path: str = 'TimeSeriesDB/etl_journal.sqlite',
+                 snapshot_path: str = 'TimeSeriesDB/metadata.json') -> None:
+        """
+        Initialize the journal.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            snapshot_path (str): Path of the JSON metadata snapshot.
+        """
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # SQLite connections cannot be pickled, worker processes reconnect lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+
+    # ------------------------------------------------------------------ symbols
+
+    def is_empty(self) -> bool:
+        return self.conn.execute('SELECT COUNT(*) FROM symbols').fetchone()[0] == 0
+
+    def has_symbol(self, symbol: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM symbols WHERE symbol = ?', (symbol,)).fetchone() is not None
+
+    def add_symbol(self, symbol: str, info: Dict[str, Any]) -> None:
+        """
+        Register a symbol with its information, keeping the watermark of an already known symbol.
+
+        Args:
+            symbol (str): The financial instrument symbol.
+            info (Dict[str, Any]): Symbol information, the 'last_timestamp' key is stored separately.
+        """
+        info = dict(info)
+        last_timestamp = info.pop('last_timestamp', None)
+        self.conn.execute(
+            'INSERT INTO symbols (symbol, info, last_timestamp) VALUES (?, ?, ?) '
+            'ON CONFLICT(symbol) DO UPDATE SET info = excluded.info',
+            (symbol, json.dumps(info), last_timestamp)
+        )
+
+    def add_symbols(self, infos: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Register or update many symbols in one transaction, see add_symbol.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            for symbol, info in infos.items():
+                self.add_symbol(symbol, info)
+
+    def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute('SELECT info, last_timestamp FROM symbols WHERE symbol = ?', (symbol,)).fetchone()
+        if row is None:
+            return None
+        info = json.loads(row[0])
+        info['last_timestamp'] = row[1]
+        return info
+
+    def get_last_timestamp(self, symbol: str) -> Optional[str]:
+        row = self.conn.execute('SELECT last_timestamp FROM symbols WHERE symbol = ?', (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def set_last_timestamp(self, symbol: str, last_timestamp: Optional[str]) -> None:
+        self.conn.execute('UPDATE symbols SET last_timestamp = ? WHERE symbol = ?', (last_timestamp, symbol))
+
+    # --------------------------------------------------------------------- runs
+
+    def begin_run(self, end_time: datetime.datetime) -> Tuple[int, datetime.datetime, bool]:
+        """
+        Start a new run, or resume the latest run if it never finished.
+
+        Args:
+            end_time (datetime.datetime): End of the data range for a new run.
+
+        Returns:
+            Tuple[int, datetime.datetime, bool]: The run id, the end time the run must use
+                                                 (the original one when resuming) and whether it was resumed.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            owner = self._maintenance_owner()
+            if owner is not None:
+                raise RuntimeError(f"Store maintenance in progress ({owner}), the ETL run cannot start before it ends")
+            row = self.conn.execute(
+                'SELECT run_id, end_time FROM runs WHERE status = ? ORDER BY run_id DESC LIMIT 1', (RUNNING,)
+            ).fetchone()
+            if row is not None:
+                logger.warning(f"Resuming unfinished ETL run {row[0]}")
+                return row[0], datetime.datetime.strptime(row[1], TIMESTAMP_FORMAT), True
+            cursor = self.conn.execute(
+                'INSERT INTO runs (started_at, end_time, status) VALUES (?, ?, ?)',
+                (self._now(), end_time.strftime(TIMESTAMP_FORMAT), RUNNING)
+            )
+            return cursor.lastrowid, end_time.replace(microsecond=0), False
+
+    def mark_stage(self, run_id: int, symbol: str, stage: str,
+                   rows: Optional[int] = None, details: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record the stage a symbol reached within a run.
+
+        Args:
+            run_id (int): The run id returned by begin_run.
+            symbol (str): The financial instrument symbol.
+            stage (str): One of STAGES or FAILED.
+            rows (int, optional): Number of rows handled at this stage.
+            details (Dict[str, Any], optional): Extra JSON-serializable information.
+        """
+        self.conn.execute(
+            'INSERT OR REPLACE INTO progress (run_id, symbol, stage, rows, updated_at, details) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (run_id, symbol, stage, rows, self._now(), json.dumps(details) if details else None)
+        )
+
+    def mark_stored(self, run_id: Optional[int], symbol: str, last_timestamp: str, rows: int) -> None:
+        """
+        Atomically advance the symbol watermark and mark the symbol as stored in the run.
+
+        Args:
+            run_id (int, optional): The run id, None when called outside a run.
+            symbol (str): The financial instrument symbol.
+            last_timestamp (str): Timestamp of the last stored row.
+            rows (int): Number of rows stored.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.set_last_timestamp(symbol, last_timestamp)
+            if run_id is not None:
+                self.mark_stage(run_id, symbol, 'stored', rows=rows)
+
+    def get_stage(self, run_id: int, symbol: str) -> Optional[str]:
+        row = self.conn.execute(
+            'SELECT stage FROM progress WHERE run_id = ? AND symbol = ?', (run_id, symbol)
+        ).fetchone()
+        return row[0] if row else None
+
+    def symbols_in_stage(self, run_id: int, stage: str) -> List[str]:
+        rows = self.conn.execute(
+            'SELECT symbol FROM progress WHERE run_id = ? AND stage = ? ORDER BY symbol', (run_id, stage)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_symbol_costs(self, run_id: int, costs: Dict[str, Dict[str, float]]) -> None:
+        """
+        Keep the measured cost of each symbol of a run (see scheduler.symbol_costs) with its progress,
+        for the scheduling of later runs.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            for symbol, cost in costs.items():
+                row = self.conn.execute(
+                    'SELECT details FROM progress WHERE run_id = ? AND symbol = ?', (run_id, symbol)
+                ).fetchone()
+                if row is None:
+                    continue
+                details = {**json.loads(row[0] or '{}'), 'cost': cost}
+                self.conn.execute('UPDATE progress SET details = ? WHERE run_id = ? AND symbol = ?',
+                                  (json.dumps(details), run_id, symbol))
+
+    def get_symbol_costs(self, runs: int = 5) -> List[Dict[str, Dict[str, float]]]:
+        """
+        Symbol costs of the most recent completed runs, newest first.
+
+        Args:
+            runs (int): Number of completed runs to look back.
+
+        Returns:
+            List[Dict[str, Dict[str, float]]]: Per run, the recorded cost of each symbol.
+        """
+        history = []
+        for (run_id,) in self.conn.execute(
+                'SELECT run_id FROM runs WHERE status = ? ORDER BY run_id DESC LIMIT ?', (COMPLETED, runs)).fetchall():
+            costs = {}
+            for symbol, details in self.conn.execute(
+                    'SELECT symbol, details FROM progress WHERE run_id = ? AND details IS NOT NULL', (run_id,)).fetchall():
+                cost = json.loads(details).get('cost')
+                if cost:
+                    costs[symbol] = cost
+            history.append(costs)
+        return history
+
+    def finish_run(self, run_id: int, status: str = COMPLETED, summary: Optional[Dict[str, Any]] = None) -> None:
+        self.conn.execute(
+            'UPDATE runs SET finished_at = ?, status = ?, summary = ? WHERE run_id = ?',
+            (self._now(), status, json.dumps(summary) if summary else None, run_id)
+        )
+
+    def get_runs(self) -> List[Dict[str, Any]]:
+        """
+        Return the recorded runs in the legacy 'etl_runs' layout, oldest first.
+        """
+        runs = []
+        for run_id, end_time, status, summary in self.conn.execute(
+                'SELECT run_id, end_time, status, summary FROM runs ORDER BY run_id').fetchall():
+            run = {
+                "run_id": run_id,
+                "timestamp": end_time,
+                "processed_symbols": self.symbols_in_stage(run_id, 'stored'),
+                "status": status,
+            }
+            if summary:
+                run.update(json.loads(summary))
+            runs.append(run)
+        return runs
+
+    # -------------------------------------------------------------- maintenance
+
+    def _maintenance_owner(self) -> Optional[str]:
+        # Owner of the live maintenance lease, None if there is none or it expired
+        row = self.conn.execute('SELECT owner, renewed_at FROM maintenance').fetchone()
+        if row is None:
+            return None
+        age = datetime.datetime.now() - datetime.datetime.strptime(row[1], TIMESTAMP_FORMAT)
+        if age.total_seconds() > MAINTENANCE_LEASE_SECONDS:
+            logger.warning(f"Ignoring the expired maintenance lease of {row[0]} (renewed {row[1]})")
+            return None
+        return row[0]
+
+    def begin_maintenance(self) -> None:
+        """
+        Take the maintenance lease, which keeps ETL runs from starting until `end_maintenance`
+        (see ETL/maintenance.py).
+
+        Raises:
+            RuntimeError: If a run is unfinished (in progress, or interrupted and waiting to be resumed)
+                          or another maintenance holds the lease.
+        """
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute('SELECT run_id FROM runs WHERE status = ? ORDER BY run_id DESC LIMIT 1', (RUNNING,)).fetchone()
+            if row is not None:
+                raise RuntimeError(f"ETL run {row[0]} is unfinished, the store cannot be maintained before it completes")
+            owner = self._maintenance_owner()
+            if owner is not None:
+                raise RuntimeError(f"Store maintenance already in progress ({owner})")
+            self.conn.execute('INSERT OR REPLACE INTO maintenance (lease, owner, renewed_at) VALUES (1, ?, ?)',
+                         (f"{socket.gethostname()}:{os.getpid()}", self._now()))
+
+    def renew_maintenance(self) -> None:
+        self.conn.execute('UPDATE maintenance SET renewed_at = ?', (self._now(),))
+
+    def end_maintenance(self) -> None:
+        self.conn.execute('DELETE FROM maintenance')
+
+    # ---------------------------------------------------------------- snapshots
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """
+        Export the journal in the legacy metadata.json layout.
+        """
+        symbols = {}
+        for symbol, info, last_timestamp in self.conn.execute(
+                'SELECT symbol, info, last_timestamp FROM symbols ORDER BY rowid').fetchall():
+            symbols[symbol] = {**json.loads(info), 'last_timestamp': last_timestamp}
+        return {"symbols": symbols, "etl_runs": self.get_runs()}
+
+    def write_snapshot(self) -> None:
+        """
+        Atomically write the metadata snapshot: readers see either the old or the new file, never a partial one.
+        """
+        directory = os.path.dirname(self.snapshot_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metadata.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_metadata(), f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info("Metadata snapshot saved successfully.")
+
+    def import_metadata(self, metadata_path: str) -> None:
+        """
+        Seed an empty journal from a legacy metadata.json file.
+
+        Args:
+            metadata_path (str): Path of the legacy metadata file.
+
+        Raises:
+            ValueError: If the file exists but cannot be parsed, rather than silently
+                        starting over and reprocessing the full history of every symbol.
+        """
+        if not self.is_empty() or not os.path.exists(metadata_path):
+            return
+        try:
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"Metadata file {metadata_path} is corrupted: {e}")
+            raise ValueError(f"Corrupted metadata file {metadata_path}") from e
+        for symbol, info in metadata.get('symbols', {}).items():
+            self.add_symbol(symbol, info)
+        for run in metadata.get('etl_runs', []):
+            cursor = self.conn.execute(
+                'INSERT INTO runs (started_at, end_time, finished_at, status) VALUES (?, ?, ?, ?)',
+                (run['timestamp'], run['timestamp'], run['timestamp'], run.get('status', COMPLETED))
+            )
+            for symbol in run.get('processed_symbols', []):
+                self.mark_stage(cursor.lastrowid, symbol, 'stored')
+        logger.info(f"Imported legacy metadata from {metadata_path}")
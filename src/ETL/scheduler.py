@@ -0,0 +1,144 @@
+import heapq
+import logging
+import statistics
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bars per minute assumed for symbols without history: around-the-clock minute bars, the most
+# expensive case, so unknown symbols are scheduled early rather than stretching the end of a run
+DEFAULT_ROWS_PER_MINUTE = 1.0
+
+# Tasks queued per worker process, enough to keep workers busy without committing the whole
+# symbol order to the executor queue upfront
+TASKS_PER_WORKER = 2
+
+def symbol_costs(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Per-symbol cost of a run from its stage metrics: the wall time of the whole symbol task and
+    the rows and minutes of data it fetched.
+
+    Args:
+        records (List[Dict[str, Any]]): Records of the metrics registry.
+
+    Returns:
+        Dict[str, Dict[str, float]]: 'wall_s', 'rows' and 'minutes' per symbol.
+    """
+    costs: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        if record["symbol"] is None:
+            continue
+        cost = costs.setdefault(record["symbol"], {"wall_s": 0.0, "rows": 0, "minutes": 0.0})
+        if record["stage"] == 'process_symbol':
+            cost["wall_s"] += record["wall_s"]
+        elif record["stage"] == 'fetch':
+            cost["rows"] += record["rows"] or 0
+            cost["minutes"] += record.get("span_minutes") or 0.0
+    return costs
+
+class CostModel:
+    """
+    Estimate the processing time of a symbol from the per-symbol costs of previous runs.
+
+    The time of a symbol task is modelled as a shared per-task overhead plus a cost per row (least
+    squares over all symbols), scaled by how much slower or faster each symbol was than that fit.
+    Rows are predicted from the bars per minute each symbol produced before, which separates
+    24/7 crypto symbols from stocks trading a few hours a day.
+    """
+
+    def __init__(self, history: Iterable[Dict[str, Dict[str, float]]]) -> None:
+        """
+        Fit the model.
+
+        Args:
+            history (Iterable[Dict[str, Dict[str, float]]]): Per run, the output of `symbol_costs`.
+        """
+        samples: Dict[str, List[Dict[str, float]]] = {}
+        for run in history:
+            for symbol, cost in run.items():
+                if cost.get("wall_s"):
+                    samples.setdefault(symbol, []).append(cost)
+
+        rows = [cost["rows"] for costs in samples.values() for cost in costs]
+        walls = [cost["wall_s"] for costs in samples.values() for cost in costs]
+        self.has_history = bool(walls)
+        if len(set(rows)) >= 2:
+            per_row, overhead = np.polyfit(rows, walls, 1)
+            self.overhead_s, self.per_row_s = max(float(overhead), 0.0), max(float(per_row), 0.0)
+        elif rows and sum(rows) > 0:
+            self.overhead_s, self.per_row_s = 0.0, sum(walls) / sum(rows)
+        else:
+            # No history: estimates are proportional to the expected rows, which is enough for ordering
+            self.overhead_s, self.per_row_s = (statistics.median(walls) if walls else 0.0), 1.0
+
+        self.rows_per_minute: Dict[str, float] = {}
+        self.scale: Dict[str, float] = {}
+        for symbol, costs in samples.items():
+            minutes = sum(cost["minutes"] for cost in costs)
+            if minutes > 0:
+                self.rows_per_minute[symbol] = sum(cost["rows"] for cost in costs) / minutes
+            ratios = [cost["wall_s"] / self._fitted(cost["rows"]) for cost in costs if self._fitted(cost["rows"]) > 0]
+            if ratios:
+                self.scale[symbol] = statistics.median(ratios)
+        self.default_rows_per_minute = (statistics.median(self.rows_per_minute.values())
+                                        if self.rows_per_minute else DEFAULT_ROWS_PER_MINUTE)
+
+    def _fitted(self, rows: float) -> float:
+        return self.overhead_s + self.per_row_s * rows
+
+    def estimate(self, symbol: str, minutes: float) -> float:
+        """
+        Estimated seconds to process `minutes` of new data of a symbol.
+        """
+        rows = self.rows_per_minute.get(symbol, self.default_rows_per_minute) * max(minutes, 0.0)
+        return self.scale.get(symbol, 1.0) * self._fitted(rows)
+
+def lpt_order(costs: Dict[str, float]) -> List[str]:
+    """
+    Longest processing time first: symbols by decreasing estimated cost, ties in name order.
+    """
+    return sorted(costs, key=lambda symbol: (-costs[symbol], symbol))
+
+def simulate_makespan(order: List[str], costs: Dict[str, float], workers: int) -> float:
+    """
+    Makespan of dispatching `order` to `workers` workers, each taking the next symbol when it becomes idle.
+    """
+    loads = [0.0] * max(workers, 1)
+    for symbol in order:
+        heapq.heapreplace(loads, loads[0] + costs[symbol])
+    return max(loads)
+
+def ideal_makespan(costs: Iterable[float], workers: int) -> float:
+    """
+    Lower bound of the makespan: perfectly balanced work, but never shorter than the longest task.
+    """
+    costs = list(costs)
+    if not costs:
+        return 0.0
+    return max(sum(costs) / max(workers, 1), max(costs))
+
+def schedule_report(makespan: float, actual_costs: Dict[str, float], workers: int,
+                    predicted: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Compare the makespan of a run with its ideal, computed from the measured task times.
+
+    Returns:
+        Dict[str, float]: The makespan, the ideal, their ratio as 'efficiency' and, when estimates
+                          are given, the mean absolute relative error of the estimates.
+    """
+    ideal = ideal_makespan(actual_costs.values(), workers)
+    report = {
+        "makespan_s": makespan,
+        "ideal_s": ideal,
+        "efficiency": ideal / makespan if makespan > 0 else 1.0,
+        "workers": workers,
+        "tasks": len(actual_costs),
+    }
+    if predicted:
+        errors = [abs(predicted[symbol] - actual) / actual
+                  for symbol, actual in actual_costs.items() if symbol in predicted and actual > 0]
+        if errors:
+            report["estimate_error"] = statistics.mean(errors)
+    return report
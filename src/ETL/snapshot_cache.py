@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Byte alignment of every array in a segment
+SHM_ALIGNMENT = 64
+
+# Rows kept per symbol when no capacity is given
+DEFAULT_SNAPSHOT_ROWS = 256
+
+# Header of a ring buffer: int64 fields followed by the JSON list of column names
+SEQUENCE, APPENDED, CAPACITY, COLUMNS, RETIRED, NAMES_SIZE = range(6)
+HEADER_BYTES = SHM_ALIGNMENT
+
+# Attempts of a reader to get a consistent copy while the writer keeps updating the ring
+READ_RETRIES = 10000
+
+def _aligned(offset: int) -> int:
+    return -(-offset // SHM_ALIGNMENT) * SHM_ALIGNMENT
+
+class SnapshotRetired(Exception):
+    """
+    The ring buffer was replaced by its writer (e.g. after a feature configuration change).
+    """
+
+class RingBuffer:
+    """
+    The last `capacity` rows of one symbol in fixed arrays: an int64 index and a float64 (rows x columns)
+    matrix, written in a circle. The arrays live in a single buffer, a bytearray in process or a shared
+    memory segment read by other processes.
+
+    Updates are guarded by a sequence lock: the writer makes the sequence odd while writing and even
+    again when done, readers copy the rows they need and retry if the sequence was odd or moved
+    meanwhile. There is a single writer per ring (the ETL process), readers never block it.
+    """
+
+    def __init__(self, buffer: Union[bytearray, memoryview]) -> None:
+        """
+        Args:
+            buffer: A buffer laid out by RingBuffer.create.
+        """
+        self.buffer = buffer
+        self._header = np.ndarray(NAMES_SIZE + 1, dtype='int64', buffer=buffer)
+        names_size = int(self._header[NAMES_SIZE])
+        self.columns: List[str] = json.loads(bytes(buffer[HEADER_BYTES:HEADER_BYTES + names_size]).decode())
+        self.capacity = int(self._header[CAPACITY])
+        index_offset, values_offset, _ = self._layout(names_size, self.capacity, len(self.columns))
+        self._index = np.ndarray(self.capacity, dtype='int64', buffer=buffer, offset=index_offset)
+        self._values = np.ndarray((self.capacity, len(self.columns)), dtype='float64', buffer=buffer, offset=values_offset)
+
+    @staticmethod
+    def _layout(names_size: int, capacity: int, columns: int):
+        index_offset = _aligned(HEADER_BYTES + names_size)
+        values_offset = _aligned(index_offset + capacity * 8)
+        return index_offset, values_offset, _aligned(values_offset + capacity * columns * 8)
+
+    @classmethod
+    def size(cls, columns: List[str], capacity: int) -> int:
+        """
+        Bytes needed by a ring of the given columns and capacity.
+        """
+        return cls._layout(len(json.dumps(columns).encode()), capacity, len(columns))[2]
+
+    @classmethod
+    def create(cls, columns: List[str], capacity: int, buffer: Union[bytearray, memoryview, None] = None) -> 'RingBuffer':
+        """
+        Lay out an empty ring in `buffer`, a new bytearray if None.
+        """
+        columns = [str(column) for column in columns]
+        names = json.dumps(columns).encode()
+        if buffer is None:
+            buffer = bytearray(cls.size(columns, capacity))
+        header = np.ndarray(NAMES_SIZE + 1, dtype='int64', buffer=buffer)
+        header[:] = 0
+        header[CAPACITY], header[COLUMNS], header[NAMES_SIZE] = capacity, len(columns), len(names)
+        buffer[HEADER_BYTES:HEADER_BYTES + len(names)] = names
+        del header
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return int(min(self._header[APPENDED], self.capacity))
+
+    @property
+    def retired(self) -> bool:
+        return bool(self._header[RETIRED])
+
+    def append(self, df: pd.DataFrame) -> None:
+        """
+        Write the rows of a frame after the current ones, keeping the last `capacity`. Columns the ring
+        does not have are ignored, missing ones are NaN. Rows that do not follow the last one (a rebuilt
+        history) replace the ring's content.
+        """
+        values = df.reindex(columns=self.columns).to_numpy(dtype='float64', na_value=np.nan)[-self.capacity:]
+        stamps = df.index.asi8[-self.capacity:]
+        if not len(stamps):
+            return
+        header = self._header
+        header[SEQUENCE] += 1  # odd: readers retry until the update is complete
+        appended = int(header[APPENDED])
+        if appended and stamps[0] <= self._index[(appended - 1) % self.capacity]:
+            appended = 0
+        positions = (appended + len(df) - len(stamps) + np.arange(len(stamps))) % self.capacity
+        self._index[positions] = stamps
+        self._values[positions] = values
+        header[APPENDED] = appended + len(df)
+        header[SEQUENCE] += 1
+
+    def latest(self, n: int = 1) -> pd.DataFrame:
+        """
+        A consistent copy of the last `n` rows, oldest first.
+
+        Raises:
+            SnapshotRetired: If the writer replaced this ring.
+            RuntimeError: If no consistent copy could be taken within READ_RETRIES attempts.
+        """
+        header = self._header
+        for _ in range(READ_RETRIES):
+            if header[RETIRED]:
+                raise SnapshotRetired()
+            sequence = int(header[SEQUENCE])
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            appended = int(header[APPENDED])
+            rows = min(n, appended, self.capacity)
+            positions = (appended - rows + np.arange(rows)) % self.capacity
+            stamps, values = self._index[positions], self._values[positions]  # fancy indexing copies
+            if int(header[SEQUENCE]) == sequence:
+                return pd.DataFrame(values, index=pd.DatetimeIndex(stamps.view('datetime64[ns]')), columns=self.columns)
+        raise RuntimeError("The snapshot kept changing while being read")
+
+    def retire(self) -> None:
+        self._header[RETIRED] = 1
+
+    def release(self) -> None:
+        """
+        Drop the array views, so that a shared segment can be closed.
+        """
+        self._header = self._index = self._values = self.buffer = None
+
+def _segment_name(prefix: str, symbol: str) -> str:
+    return f"{prefix}_{re.sub(r'[^0-9A-Za-z]', '_', symbol)}"
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach a segment without registering it with this process's resource tracker, which would otherwise
+    remove it, still in use by the ETL, when a reader exits (bpo-39959, `track` exists from Python 3.13).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    if os.name != 'posix':
+        return shared_memory.SharedMemory(name=name)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+class SnapshotCache:
+    """
+    The latest rows of every symbol processed by the ETL, for live consumers.
+
+    Each symbol is a RingBuffer updated after its new rows are stored. With `name`, the rings are shared
+    memory segments named `<name>_<symbol>` that other processes read through SnapshotReader; without it
+    they are only readable in process with `latest`. The segments live as long as the cache (`close`).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SNAPSHOT_ROWS, name: Optional[str] = None) -> None:
+        """
+        Args:
+            capacity (int): Rows kept per symbol.
+            name (str, optional): Prefix of the shared memory segments, rings are in process only if None.
+        """
+        self.capacity = capacity
+        self.name = name
+        self.buffers: Dict[str, RingBuffer] = {}
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+
+    def __getstate__(self):
+        # Worker processes get an empty cache, only the process that created the segments writes them
+        return {'capacity': self.capacity, 'name': self.name, 'buffers': {}, '_segments': {}}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.buffers
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.buffers)
+
+    def update(self, symbol: str, df: pd.DataFrame) -> None:
+        """
+        Append the newly stored rows of a symbol. A symbol whose columns changed gets a new ring, holding
+        the previous rows under the new columns.
+        """
+        if df is None or df.empty:
+            return
+        columns = [str(column) for column in df.columns]
+        ring = self.buffers.get(symbol)
+        if ring is None or ring.columns != columns:
+            previous = ring.latest(self.capacity) if ring is not None else None
+            ring = self._create(symbol, columns)
+            if previous is not None and not previous.empty:
+                ring.append(previous)
+        ring.append(df)
+
+    def latest(self, symbol: str, n: int = 1) -> pd.DataFrame:
+        """
+        The last `n` rows of a symbol, oldest first.
+
+        Raises:
+            KeyError: If the symbol has no snapshot.
+        """
+        return self.buffers[symbol].latest(n)
+
+    def seed(self, store, symbols: List[str]) -> None:
+        """
+        Fill the rings of symbols without one from the tail of their stored history, so that consumers
+        see `capacity` rows from the first cycle on even when a cycle only adds a few.
+
+        Args:
+            store (DataStore): The symbol-specific store.
+            symbols (List[str]): Symbols to seed.
+        """
+        for symbol in symbols:
+            if symbol not in self.buffers:
+                self.update(symbol, store.retrieve_tail(symbol, self.capacity))
+
+    def _create(self, symbol: str, columns: List[str]) -> RingBuffer:
+        self._drop(symbol)
+        if self.name is None:
+            ring = RingBuffer.create(columns, self.capacity)
+        else:
+            name = _segment_name(self.name, symbol)
+            try:  # left behind by a process that did not close its cache
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            segment = shared_memory.SharedMemory(name=name, create=True, size=RingBuffer.size(columns, self.capacity))
+            self._segments[symbol] = segment
+            ring = RingBuffer.create(columns, self.capacity, segment.buf)
+        self.buffers[symbol] = ring
+        return ring
+
+    def _drop(self, symbol: str) -> None:
+        ring = self.buffers.pop(symbol, None)
+        if ring is None:
+            return
+        ring.retire()  # readers attached to it move to its replacement
+        ring.release()
+        segment = self._segments.pop(symbol, None)
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+    def close(self) -> None:
+        """
+        Retire every ring and remove the shared memory segments.
+        """
+        for symbol in list(self.buffers):
+            self._drop(symbol)
+
+    def __enter__(self) -> 'SnapshotCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class SnapshotReader:
+    """
+    Read the snapshots published by a SnapshotCache of another process, without copying more than the
+    requested rows and without ever blocking its writer.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Args:
+            name (str): The `name` of the publishing SnapshotCache.
+        """
+        self.name = name
+        self._rings: Dict[str, RingBuffer] = {}
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+
+    def _attach(self, symbol: str) -> RingBuffer:
+        try:
+            segment = _attach_untracked(_segment_name(self.name, symbol))
+        except FileNotFoundError:
+            raise KeyError(f"No snapshot published for {symbol}")
+        self._segments[symbol] = segment
+        self._rings[symbol] = RingBuffer(segment.buf)
+        return self._rings[symbol]
+
+    def latest(self, symbol: str, n: int = 1) -> pd.DataFrame:
+        """
+        The last `n` rows of a symbol, oldest first.
+
+        Raises:
+            KeyError: If the symbol is not published.
+        """
+        ring = self._rings.get(symbol)
+        if ring is None:  # not `or`: a ring without rows yet is falsy
+            ring = self._attach(symbol)
+        try:
+            return ring.latest(n)
+        except SnapshotRetired:
+            self._detach(symbol)
+            return self._attach(symbol).latest(n)
+
+    def _detach(self, symbol: str) -> None:
+        self._rings.pop(symbol).release()
+        self._segments.pop(symbol).close()
+
+    def close(self) -> None:
+        for symbol in list(self._rings):
+            self._detach(symbol)
+
+    def __enter__(self) -> 'SnapshotReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
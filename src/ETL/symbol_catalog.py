@@ -0,0 +1,213 @@
+import fnmatch
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from data_selection.create_symbols_list import symbol_category
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached catalog is used before it is discovered again from the terminal
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+class SymbolSpec:
+    """
+    Contract specification of a symbol, from `mt5.symbol_info`.
+    """
+
+    # Fields kept from the terminal, with their type
+    FIELDS = {
+        'name': str,
+        'description': str,
+        'path': str,
+        'digits': int,
+        'point': float,
+        'trade_tick_size': float,
+        'trade_tick_value': float,
+        'trade_contract_size': float,
+        'volume_min': float,
+        'volume_max': float,
+        'volume_step': float,
+        'currency_base': str,
+        'currency_profit': str,
+        'currency_margin': str,
+        'trade_mode': int,
+    }
+
+    def __init__(self, name: str, description: str = '', path: str = '', digits: int = 0, point: float = 0.0,
+                 trade_tick_size: float = 0.0, trade_tick_value: float = 0.0, trade_contract_size: float = 0.0,
+                 volume_min: float = 0.0, volume_max: float = 0.0, volume_step: float = 0.0,
+                 currency_base: str = '', currency_profit: str = '', currency_margin: str = '',
+                 trade_mode: int = 0, category: Optional[str] = None) -> None:
+        self.name = name
+        self.description = description
+        self.path = path  # group path in the terminal, e.g. 'Forex\\Majors\\EURUSD'
+        self.digits = digits
+        self.point = point
+        self.trade_tick_size = trade_tick_size
+        self.trade_tick_value = trade_tick_value
+        self.trade_contract_size = trade_contract_size
+        self.volume_min = volume_min
+        self.volume_max = volume_max
+        self.volume_step = volume_step
+        self.currency_base = currency_base
+        self.currency_profit = currency_profit
+        self.currency_margin = currency_margin
+        self.trade_mode = trade_mode
+        self.category = category  # asset class from data_selection.create_symbols_list
+
+    @classmethod
+    def from_symbol_info(cls, info: Dict[str, Any]) -> 'SymbolSpec':
+        """
+        Build a spec from the fields of `mt5.symbol_info`, ignoring the ones not kept.
+        """
+        values = {field: kind(info[field]) for field, kind in cls.FIELDS.items() if info.get(field) is not None}
+        return cls(category=symbol_category(values['name']), **values)
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> 'SymbolSpec':
+        return cls(**{key: value for key, value in values.items() if key in cls.FIELDS or key == 'category'})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**{field: getattr(self, field) for field in self.FIELDS}, 'category': self.category}
+
+    def __repr__(self) -> str:
+        return f"SymbolSpec(name={self.name!r}, category={self.category!r}, digits={self.digits}, point={self.point})"
+
+class SymbolCatalog:
+    """
+    Lookup table of symbol specifications, discovered from the terminal with a single `symbols_get` call
+    and cached locally as JSON. The cache is used while it is younger than its TTL; a lookup of a symbol
+    missing from a fresh cache triggers one new discovery.
+    """
+
+    def __init__(self, fetcher, cache_path: str = 'TimeSeriesDB/symbol_specs.json',
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, group: Optional[str] = None) -> None:
+        """
+        Initialize the catalog, nothing is read or discovered until the first lookup.
+
+        Args:
+            fetcher (DataFetcher): Fetcher used for the discovery.
+            cache_path (str): Path of the JSON cache.
+            ttl_seconds (float): Age after which the cache is discovered again.
+            group (str, optional): MetaTrader5 group filter of the discovery, e.g. '*,!*ft', all symbols if None.
+        """
+        self.fetcher = fetcher
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.group = group
+        self._specs: Optional[Dict[str, SymbolSpec]] = None
+        self._from_cache = False  # specs read from the cache rather than discovered by this instance
+        self.discovered_at: Optional[float] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes read the cache again if they need it
+        state = self.__dict__.copy()
+        state['_specs'] = None
+        return state
+
+    def _load_cache(self) -> bool:
+        try:
+            with open(self.cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if time.time() - cache.get('discovered_at', 0) > self.ttl_seconds:
+            logger.info(f"Symbol catalog cache {self.cache_path} is older than {self.ttl_seconds}s")
+            return False
+        self._specs = {name: SymbolSpec.from_dict(values) for name, values in cache['symbols'].items()}
+        self.discovered_at = cache['discovered_at']
+        self._from_cache = True
+        return True
+
+    def _write_cache(self) -> None:
+        directory = os.path.dirname(self.cache_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.symbol_specs.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"discovered_at": self.discovered_at,
+                           "symbols": {name: spec.to_dict() for name, spec in self._specs.items()}}, f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def refresh(self) -> None:
+        """
+        Discover every symbol of the terminal (matching `group`) in one call and rewrite the cache.
+
+        Raises:
+            RuntimeError: If the discovery returns no symbol (e.g. MetaTrader5 failed); the known specs
+                          and the cache are kept as they are.
+        """
+        infos = self.fetcher.get_symbols(self.group)
+        if not infos:
+            raise RuntimeError(f"MetaTrader5 returned no symbols{f' for group {self.group}' if self.group else ''}, "
+                               f"keeping the symbol catalog {self.cache_path}")
+        self._specs = {spec.name: spec for spec in map(SymbolSpec.from_symbol_info, infos)}
+        self.discovered_at = time.time()
+        self._from_cache = False
+        self._write_cache()
+        logger.info(f"Discovered {len(self._specs)} symbols from MetaTrader5")
+
+    @property
+    def specs(self) -> Dict[str, SymbolSpec]:
+        """
+        All known specs by symbol name, from the cache while it is fresh.
+        """
+        if self._specs is None and not self._load_cache():
+            self.refresh()
+        return self._specs
+
+    def lookup(self, symbols: Iterable[str]) -> Dict[str, SymbolSpec]:
+        """
+        Specs of the given symbols. Symbols missing from a cached catalog trigger one new discovery,
+        symbols unknown to the terminal are left out.
+        """
+        symbols = list(symbols)
+        specs = self.specs
+        if self._from_cache and any(symbol not in specs for symbol in symbols):
+            try:
+                self.refresh()
+            except RuntimeError as e:
+                # The cached specs are still valid for the symbols they know
+                logger.warning(f"{e}: unknown symbols are left out")
+            specs = self._specs
+        return {symbol: specs[symbol] for symbol in symbols if symbol in specs}
+
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
+        return self.lookup([symbol]).get(symbol)
+
+    def __getitem__(self, symbol: str) -> SymbolSpec:
+        spec = self.get(symbol)
+        if spec is None:
+            raise KeyError(symbol)
+        return spec
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def discover(self, patterns: Optional[Iterable[str]] = None,
+                 categories: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Names of the known symbols matching any of the glob patterns and belonging to one of the categories.
+
+        Args:
+            patterns (Iterable[str], optional): Globs such as 'USD*', every symbol if None.
+            categories (Iterable[str], optional): Asset classes of data_selection.create_symbols_list,
+                                                  e.g. ['forex', 'crypto'], any symbol if None.
+
+        Returns:
+            List[str]: The matching symbols in name order.
+        """
+        patterns = list(patterns or ['*'])
+        categories = set(categories) if categories is not None else None
+        return sorted(
+            name for name, spec in self.specs.items()
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+            and (categories is None or spec.category in categories)
+        )
@@ -0,0 +1,78 @@
+import fnmatch
+import logging
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYMBOLS_FILE = 'src/data_selection/core_symbols.txt'
+
+def read_symbols_file(path: str = DEFAULT_SYMBOLS_FILE) -> List[str]:
+    """
+    Read a symbol list with one symbol per line, ignoring blank lines, '#' comments and duplicates.
+
+    Args:
+        path (str): Path of the symbol list.
+
+    Returns:
+        List[str]: The symbols in file order.
+    """
+    symbols = []
+    with open(path, 'r') as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].strip()
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+    return symbols
+
+def resolve_symbols(patterns: Optional[Iterable[str]], universe: List[str]) -> List[str]:
+    """
+    Select symbols of the universe by name or glob pattern (e.g. 'USD*', '*USD', 'XA?USD').
+
+    Args:
+        patterns (Iterable[str], optional): Symbol names or glob patterns, the whole universe if None or empty.
+        universe (List[str]): The known symbols.
+
+    Returns:
+        List[str]: The selected symbols in universe order. Plain names missing from the universe
+                   are kept, appended in the order given.
+    """
+    patterns = list(patterns or [])
+    if not patterns:
+        return list(universe)
+    selected = [symbol for symbol in universe if any(fnmatch.fnmatchcase(symbol, pattern) for pattern in patterns)]
+    for pattern in patterns:
+        if not any(char in pattern for char in '*?[') and pattern not in selected:
+            selected.append(pattern)
+        elif not any(fnmatch.fnmatchcase(symbol, pattern) for symbol in universe):
+            logger.warning(f"Symbol pattern {pattern} matches no symbol")
+    return selected
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """
+    Parse a shard specification 'i/n' into (index, count), with 0 <= index < count.
+
+    Raises:
+        ValueError: If the specification is malformed or out of range.
+    """
+    try:
+        index, count = (int(part) for part in shard.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}', expected 'i/n' such as '0/4'")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{shard}', expected 0 <= i < n")
+    return index, count
+
+def shard_of(symbol: str, count: int) -> int:
+    """
+    Shard of a symbol among `count` shards. CRC32 of the name is stable across processes, hosts and
+    Python versions (unlike hash()), so every host computes the same partition of the universe.
+    """
+    return zlib.crc32(symbol.encode('utf-8')) % count
+
+def select_shard(symbols: List[str], index: int, count: int) -> List[str]:
+    """
+    Keep the symbols belonging to shard `index` of `count`. The shards of 0..count-1 are disjoint
+    and together cover every symbol, whatever symbols the other hosts are given.
+    """
+    return [symbol for symbol in symbols if shard_of(symbol, count) == index]
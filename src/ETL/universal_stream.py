@@ -0,0 +1,156 @@
+import datetime
+import logging
+from typing import Any, Dict, List, Optional, Type
+
+import pandas as pd
+
+from ETL.data_store import DataStore
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.base_feature import BaseFeature
+from ETL.instrumentation import registry, frame_bytes
+from ETL.panel import build_panel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_LIMIT_MB = 256
+
+# Panel-sized copies alive while a block is processed: the per-symbol reads, the panel itself
+# and the feature results with their temporaries
+PANEL_OVERHEAD = 3
+
+# Bar size of the stored data (MetaTrader5 M1 rates)
+BAR = pd.Timedelta(minutes=1)
+
+class UniversalFeatureStream:
+    """
+    Compute universal features without holding the processed frames of all symbols in memory.
+
+    Only the columns the features read (e.g. close, volume, Log_Returns) are read back from the
+    symbol-specific store, one time block at a time across all symbols. Blocks are sized so that the
+    reads and the panel stay below a memory ceiling, and the results of every block are written to the
+    universal store before the next block is read. Features reducing each timestamp on its own
+    (`rowwise`) give the same result on blocks as on the full history, and so do rolling (`windowed`)
+    features once the last `lookback` rows of the previous block, or of the stored history before
+    `start` for the first block, are prepended; other features are skipped.
+    """
+
+    def __init__(self, engineer: FeatureEngineer, source: DataStore, target: DataStore, target_symbol: str,
+                 memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB, join: str = 'outer', bar: pd.Timedelta = BAR) -> None:
+        """
+        Initialize the stream.
+
+        Args:
+            engineer (FeatureEngineer): Computes the features on each block.
+            source (DataStore): Store of the symbol-specific data.
+            target (DataStore): Store the results are written to.
+            target_symbol (str): Symbol of the results in the target store.
+            memory_limit_mb (float): Ceiling for the data held while processing a block.
+            join (str): 'outer' keeps every timestamp of any symbol, 'inner' only those all symbols share.
+            bar (pd.Timedelta): Bar size, used to convert rows into block durations.
+        """
+        self.engineer = engineer
+        self.source = source
+        self.target = target
+        self.target_symbol = target_symbol
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+        self.join = join
+        self.bar = bar
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], engineer: FeatureEngineer, source: DataStore,
+                    target: DataStore, target_symbol: str) -> 'UniversalFeatureStream':
+        """
+        Build the stream from the 'universal_stream' section of feature_config.json.
+        """
+        config = config or {}
+        return cls(engineer, source, target, target_symbol,
+                   memory_limit_mb=config.get('memory_limit_mb', DEFAULT_MEMORY_LIMIT_MB),
+                   join=config.get('join', 'outer'))
+
+    def block_length(self, symbols: int, columns: int) -> pd.Timedelta:
+        """
+        Duration of a block whose panel of `symbols` x `columns` float64 values fits the memory ceiling.
+        """
+        rows = self.memory_limit_bytes // (max(symbols, 1) * max(columns, 1) * 8 * PANEL_OVERHEAD)
+        return max(int(rows), 1) * self.bar
+
+    def _panel(self, frames: Dict[str, pd.DataFrame], symbols: List[str], columns: List[str]) -> pd.DataFrame:
+        """
+        The panel of a block. With an outer join, symbols without rows in the block are kept as NaN columns,
+        so that features with a column per symbol write the same columns for every block.
+        """
+        if self.join == 'outer':
+            empty = pd.DataFrame(columns=columns, index=pd.DatetimeIndex([]), dtype='float64')
+            frames = {symbol: frames.get(symbol, empty) for symbol in symbols}
+        return build_panel(frames, columns, how=self.join)
+
+    def _history(self, symbols: List[str], columns: List[str], start: pd.Timestamp, rows: int) -> pd.DataFrame:
+        """
+        The last `rows` rows of the panel before `start`, read over a span widened until it holds them
+        (market closures leave gaps) or reaches the first stored row.
+        """
+        firsts = [first for first in self.source.get_first_timestamps(symbols).values() if first is not None]
+        span = rows * self.bar
+        while True:
+            frames = self.source.retrieve_batch(symbols, columns, (start - span, start - pd.Timedelta(1, 'ns')))
+            panel = self._panel(frames, symbols, columns)
+            if len(panel) >= rows or not firsts or start - span <= min(firsts):
+                return panel.iloc[-rows:]
+            span *= 4
+
+    def run(self, symbols: List[str], feature_classes: List[Type[BaseFeature]],
+            start: datetime.datetime, end: datetime.datetime) -> Dict[str, Any]:
+        """
+        Compute the universal features of `symbols` from `start` to `end` (inclusive) block by block.
+
+        Returns:
+            Dict[str, Any]: Number of blocks and rows written, the largest block in bytes and the final block length.
+        """
+        streamable = []
+        for feature_cls in feature_classes:
+            if feature_cls.rowwise or feature_cls.windowed:
+                streamable.append(feature_cls)
+            else:
+                logger.warning(f"Skipping universal feature {feature_cls.__name__}: it is not computed per timestamp "
+                               f"or over a rolling window and cannot be streamed")
+        stats: Dict[str, Any] = {"blocks": 0, "rows": 0, "peak_block_bytes": 0, "block_minutes": None}
+        if not streamable or not symbols:
+            return stats
+
+        # Parametrised features (e.g. cross-sectional ranks of a configured column) set their inputs per instance
+        instances = self.engineer.build_feature_instances(streamable, 'universal')
+        columns = sorted({column for instance in instances for column in instance.input_columns})
+        lookback = max([instance.lookback for instance in instances if instance.windowed] + [0])
+        block = self.block_length(len(symbols), len(columns))
+        block_start, end = pd.Timestamp(start), pd.Timestamp(end)
+        logger.info(f"Streaming universal features of {len(symbols)} symbols from {block_start} to {end} "
+                    f"in blocks of {block}, reading {columns}")
+        history = self._history(symbols, columns, block_start, lookback) if lookback else None
+        while block_start <= end:
+            block_end = min(block_start + block, end + pd.Timedelta(1, 'ns'))  # exclusive
+            with registry.stage('universal_block') as metrics:
+                frames = self.source.retrieve_batch(symbols, columns, (block_start, block_end - pd.Timedelta(1, 'ns')))
+                panel = self._panel(frames, symbols, columns)
+                block_bytes = sum(frame_bytes(df) for df in frames.values()) + frame_bytes(panel)
+                metrics.update(rows=len(panel), bytes=block_bytes)
+                if block_bytes > self.memory_limit_bytes and block > self.bar:
+                    # Denser than estimated, retry the same start with half the duration
+                    block = max(pd.Timedelta(block.value // 2), self.bar)
+                    logger.warning(f"Universal block of {block_bytes} bytes exceeds the memory limit, shrinking blocks to {block}")
+                    continue
+                if not panel.empty:
+                    if history is not None and not history.empty:
+                        # Rolling windows continue from the rows before the block, only the block's rows are stored
+                        panel = pd.concat([history, panel])
+                    result = self.engineer.compute_universal_features(panel, streamable)
+                    result = result.iloc[len(history) if history is not None else 0:]
+                    self.target.store_data(self.target_symbol, result)
+                    stats["rows"] += len(result)
+                    if lookback:
+                        history = panel.iloc[-lookback:]
+            del frames, panel
+            stats["blocks"] += 1
+            stats["peak_block_bytes"] = max(stats["peak_block_bytes"], block_bytes)
+            block_start = block_end
+        stats["block_minutes"] = block / pd.Timedelta(minutes=1)
+        return stats
@@ -0,0 +1,363 @@
+import datetime
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.synthetic import make_ohlcv, make_panel, make_rates, make_universe
+
+logger = logging.getLogger(__name__)
+
+# A benchmark setup yields (name, work, rows): `work` is timed, `rows` is used for throughput
+BenchmarkCase = Tuple[str, Callable[[], Any], int]
+BENCHMARKS: List[Callable[['BenchmarkContext'], Iterator[BenchmarkCase]]] = []
+
+# Upper bounds (seconds) for the startup benchmarks, reported as 'within_target' in the results.
+# A spawned worker should be ready well within a second, otherwise short runs are dominated by process start-up.
+STARTUP_TARGETS: Dict[str, float] = {
+    'startup_import_main_etl': 1.0,
+    'startup_worker_cold_start': 1.0,
+    'startup_time_to_first_fetch': 3.0,
+}
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def benchmark(setup: Callable[['BenchmarkContext'], Iterator[BenchmarkCase]]):
+    """
+    Register a benchmark setup function.
+    """
+    BENCHMARKS.append(setup)
+    return setup
+
+class BenchmarkContext:
+    """
+    Synthetic inputs shared by the benchmarks of one suite run.
+    """
+
+    def __init__(self, rows: int, symbols: int, workdir: str) -> None:
+        self.rows = rows
+        self.symbols = symbols
+        self.workdir = workdir
+        self._frames = None
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self._frames = make_universe(self.symbols, self.rows)
+        return self._frames
+
+    def feature_engineer(self, symbol_features: Optional[dict] = None, universal_features: Optional[dict] = None):
+        from ETL.feature_engineer import FeatureEngineer
+        return FeatureEngineer(symbol_features or {}, universal_features or {})
+
+@benchmark
+def bench_fetcher_conversion(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.data_fetcher import DataFetcher
+    rates = make_rates(ctx.rows)
+    yield 'fetcher_conversion', lambda: DataFetcher.rates_to_frame(rates), ctx.rows
+
+@benchmark
+def bench_check_data_quality(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from main_etl import Mt5_ArcticDB_ETL
+    df = make_ohlcv(ctx.rows)
+    etl = Mt5_ArcticDB_ETL.__new__(Mt5_ArcticDB_ETL)  # check_data_quality needs no connections
+    yield 'check_data_quality', lambda: etl.check_data_quality(df), ctx.rows
+
+@benchmark
+def bench_add_base_features(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    engineer = ctx.feature_engineer()
+    df = make_ohlcv(ctx.rows)
+    yield 'add_base_features', lambda: engineer.add_base_features(df), ctx.rows
+
+@benchmark
+def bench_symbol_features(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.feature_definitions import load_symbol_specific_features
+    symbol_specific_features = load_symbol_specific_features()
+    feature_classes = [cls for features in symbol_specific_features.values() for cls in features]
+    if not feature_classes:
+        raise ImportError("no symbol-specific feature module could be imported")
+    engineer = ctx.feature_engineer(symbol_specific_features)
+    base = engineer.add_base_features(make_ohlcv(ctx.rows))
+    for feature_cls in feature_classes:
+        yield (f"apply_symbol_features[{feature_cls.__name__}]",
+               lambda feature_cls=feature_cls: engineer.apply_symbol_features(base.copy(), [feature_cls]), ctx.rows)
+    yield 'apply_symbol_features[full_grid]', lambda: engineer.apply_symbol_features(base.copy(), feature_classes), ctx.rows
+
+@benchmark
+def bench_batch_kernels(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.features.kernels import rolling_means
+    close = make_ohlcv(ctx.rows)['close']
+    lengths = [5, 10, 20, 50, 100, 200]
+    yield 'sma_grid[rolling_per_length]', lambda: [close.rolling(length).mean() for length in lengths], ctx.rows
+    yield 'sma_grid[shared_cumsum]', lambda: rolling_means(close.to_numpy(), lengths), ctx.rows
+
+@benchmark
+def bench_recursive_kernels(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.features import recursions
+    close = make_ohlcv(ctx.rows)['close']
+    recursions.warm_up()  # compile time is paid once per cache, not per call
+
+    def rsi_pandas():
+        # The pandas_ta formulation: two ewm passes over the gains and losses
+        change = close.diff()
+        gains = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        losses = change.clip(upper=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        return 100 * gains / (gains + losses.abs())
+
+    yield 'rsi[pandas_ewm]', rsi_pandas, ctx.rows
+    yield f"rsi[{'numba' if recursions.NUMBA_AVAILABLE else 'python'}]", lambda: recursions.rsi(close.to_numpy(), 14), ctx.rows
+
+@benchmark
+def bench_universal_features(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.features.universal.global_metrics import AverageCloseAllSymbols, MedianVolumeAllSymbols
+    engineer = ctx.feature_engineer()
+    # Stored frames carry the tick volume as 'volume'
+    frames = {symbol: df.rename(columns={'tick_volume': 'volume'}) for symbol, df in ctx.frames.items()}
+    panel = make_panel(frames, ['close', 'volume'])
+    for feature_cls in [AverageCloseAllSymbols, MedianVolumeAllSymbols]:
+        yield (f"apply_universal_features[{feature_cls.__name__}]",
+               lambda feature_cls=feature_cls: engineer.apply_universal_features(panel.copy(), [feature_cls]),
+               ctx.rows * ctx.symbols)
+
+@benchmark
+def bench_rolling_regression(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    import numpy as np
+    from ETL.features.kernels import rolling_regression
+    returns = np.log(make_panel(ctx.frames, ['close'])['close']).diff()
+    x, y = returns.iloc[:, 0], returns.iloc[:, 1:]
+    window = 240
+
+    def pandas_rolling():
+        # Beta, alpha and R² of every symbol against the first one from pandas rolling moments
+        beta = y.apply(lambda column: column.rolling(window).cov(x)).div(x.rolling(window).var(), axis=0)
+        alpha = y.rolling(window).mean() - beta.mul(x.rolling(window).mean(), axis=0)
+        r2 = y.apply(lambda column: column.rolling(window).corr(x)) ** 2
+        return beta, alpha, r2
+
+    yield 'rolling_regression[pandas_rolling]', pandas_rolling, ctx.rows * y.shape[1]
+    yield ('rolling_regression[running_sums]', lambda: rolling_regression(x.to_numpy(), y.to_numpy(), window),
+           ctx.rows * y.shape[1])
+
+@benchmark
+def bench_cross_sectional(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    import numpy as np
+    from ETL.features.kernels import cross_sectional_rank, cross_sectional_zscore
+    returns = np.log(make_panel(ctx.frames, ['close'])['close']).diff()
+    values = returns.to_numpy()
+
+    def pandas_rows():
+        ranks = returns.rank(axis=1, pct=True)
+        scores = returns.sub(returns.mean(axis=1), axis=0).div(returns.std(axis=1), axis=0)
+        return ranks, scores
+
+    yield 'cross_sectional[pandas]', pandas_rows, values.size
+    yield 'cross_sectional[argsort]', lambda: (cross_sectional_rank(values), cross_sectional_zscore(values)), values.size
+
+@benchmark
+def bench_data_store(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.data_store import DataStore
+    store = DataStore(library_name='benchmark', uri=f"lmdb://{os.path.join(ctx.workdir, 'lmdb')}")
+    engineer = ctx.feature_engineer()
+    frames = {symbol: engineer.add_base_features(df).rename(columns={'tick_volume': 'volume'})
+              for symbol, df in ctx.frames.items()}
+
+    def write_all():
+        for symbol, df in frames.items():
+            store.lib.write(symbol, df)
+
+    def read_all():
+        for symbol in frames:
+            store.retrieve_data(symbol)
+
+    total_rows = ctx.rows * ctx.symbols
+    yield 'data_store_write', write_all, total_rows
+    write_all()
+    yield 'data_store_read', read_all, total_rows
+    yield 'data_store_watermarks', lambda: store.get_watermarks(list(frames)), ctx.symbols
+
+    from ETL.features.universal.global_metrics import AverageCloseAllSymbols, MedianVolumeAllSymbols
+    from ETL.universal_stream import UniversalFeatureStream
+    target = DataStore(library_name='benchmark_universal', uri=f"lmdb://{os.path.join(ctx.workdir, 'lmdb')}")
+    stream = UniversalFeatureStream(engineer, store, target, 'Universal_Features', memory_limit_mb=64)
+    index = next(iter(frames.values())).index
+    yield ('universal_stream',
+           lambda: stream.run(list(frames), [AverageCloseAllSymbols, MedianVolumeAllSymbols], index[0], index[-1]),
+           total_rows)
+
+@benchmark
+def bench_snapshot_cache(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.data_store import DataStore
+    from ETL.snapshot_cache import SnapshotCache, SnapshotReader
+    store = DataStore(library_name='benchmark_snapshots', uri=f"lmdb://{os.path.join(ctx.workdir, 'lmdb')}")
+    engineer = ctx.feature_engineer()
+    symbol, df = next(iter(ctx.frames.items()))
+    df = engineer.add_base_features(df)
+    store.lib.write(symbol, df)
+    cache = SnapshotCache(capacity=256, name=f"etl_bench_{os.getpid()}")
+    cache.update(symbol, df)
+    reader = SnapshotReader(cache.name)
+    # Latest feature vector of a symbol: full read, stored tail, in-process and shared memory snapshots
+    yield 'latest_row[retrieve_data]', lambda: store.retrieve_data(symbol).iloc[-1:], 1
+    yield 'latest_row[retrieve_tail]', lambda: store.retrieve_tail(symbol, 1), 1
+    yield 'latest_row[snapshot]', lambda: cache.latest(symbol), 1
+    yield 'latest_row[shared_snapshot]', lambda: reader.latest(symbol), 1
+    yield 'snapshot_update', lambda: cache.update(symbol, df.iloc[-1:]), 1
+    reader.close()
+    cache.close()
+
+@benchmark
+def bench_maintenance(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    from ETL.data_store import DataStore
+    from ETL.maintenance import StoreMaintenance
+    store = DataStore(library_name='benchmark_maintenance', uri=f"lmdb://{os.path.join(ctx.workdir, 'lmdb')}")
+    symbol, df = next(iter(ctx.frames.items()))
+    # The history written by 500 incremental runs (10-minute runs for 5000 bars), then compacted
+    step = max(len(df) // 500, 1)
+    for start in range(0, len(df), step):
+        store.store_data(symbol, df.iloc[start:start + step])
+    yield 'read[fragmented]', lambda: store.retrieve_data(symbol), len(df)
+    StoreMaintenance(store).run([symbol], timings=False)
+    yield 'read[compacted]', lambda: store.retrieve_data(symbol), len(df)
+
+def _run_python(code: str) -> None:
+    # Fresh interpreter with the same sys.path as a worker process
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC_DIR, os.environ.get('PYTHONPATH', '')]))
+    subprocess.run([sys.executable, '-c', code], check=True, env=env, cwd=os.path.dirname(SRC_DIR))
+
+def _worker_ready() -> bool:
+    # What a worker of Mt5_ArcticDB_ETL.run_etl imports before it can process its first symbol
+    import main_etl  # noqa: F401
+    return True
+
+def _spawn_worker() -> None:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        executor.submit(_worker_ready).result()
+
+@benchmark
+def bench_startup(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    yield 'startup_import_main_etl', lambda: _run_python('import main_etl'), 1
+    yield 'startup_worker_cold_start', _spawn_worker, 1
+
+@benchmark
+def bench_time_to_first_fetch(ctx: BenchmarkContext) -> Iterator[BenchmarkCase]:
+    if importlib.util.find_spec('MetaTrader5') is None:
+        raise ImportError("No module named 'MetaTrader5'")
+    symbol = os.environ.get('BENCHMARK_SYMBOL', 'EURUSD')
+    code = (
+        "import datetime\n"
+        "from ETL.data_fetcher import DataFetcher\n"
+        "end = datetime.datetime.now()\n"
+        f"DataFetcher().fetch_data({symbol!r}, end - datetime.timedelta(days=1), end)\n"
+    )
+    yield 'startup_time_to_first_fetch', lambda: _run_python(code), 1
+
+def _time_case(work: Callable[[], Any], rows: int, repeat: int) -> Dict[str, float]:
+    work()  # warm-up: imports, caches, lazily created libraries
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "median_s": median,
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "rows": rows,
+        "rows_per_s": rows / median if median > 0 else float('inf'),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(rows: int = 100_000, symbols: int = 10, repeat: int = 5,
+              name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every registered benchmark against synthetic data.
+
+    Args:
+        rows (int): Bars per synthetic symbol.
+        symbols (int): Number of synthetic symbols for cross-symbol and storage benchmarks.
+        repeat (int): Timed repetitions per benchmark, after one untimed warm-up call.
+        name_filter (str, optional): Only run benchmarks whose name contains this string.
+
+    Returns:
+        Dict[str, Any]: Run information under 'meta' and per-benchmark timings under 'results'.
+                        Benchmarks whose dependencies cannot be imported are reported as skipped.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = BenchmarkContext(rows, symbols, workdir)
+        for setup in BENCHMARKS:
+            try:
+                for name, work, case_rows in setup(ctx):
+                    if name_filter and name_filter not in name:
+                        continue
+                    results[name] = _time_case(work, case_rows, repeat)
+                    if name in STARTUP_TARGETS:
+                        results[name]["target_s"] = STARTUP_TARGETS[name]
+                        results[name]["within_target"] = results[name]["median_s"] <= STARTUP_TARGETS[name]
+                    logger.info(f"{name}: {results[name]['median_s']:.4f}s ({results[name]['rows_per_s']:.0f} rows/s)")
+            except ImportError as e:
+                results[setup.__name__] = {"skipped": f"ImportError: {e}"}
+                logger.warning(f"Skipped {setup.__name__}: {e}")
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": rows,
+            "symbols": symbols,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def save_results(report: Dict[str, Any], path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Benchmark results saved to {path}")
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> Dict[str, Dict[str, float]]:
+    """
+    Compare two benchmark reports by median time.
+
+    Args:
+        baseline (Dict[str, Any]): Report of the reference commit.
+        current (Dict[str, Any]): Report of the commit under test.
+        threshold (float): Relative slowdown above which a benchmark counts as a regression.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For every benchmark present and timed in both reports, the baseline and
+                                     current medians, their ratio and whether it regressed.
+    """
+    comparison = {}
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if not reference or 'median_s' not in reference or 'median_s' not in result:
+            continue
+        ratio = result['median_s'] / reference['median_s']
+        comparison[name] = {
+            "baseline_s": reference['median_s'],
+            "current_s": result['median_s'],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        }
+    return comparison
@@ -0,0 +1,84 @@
+import datetime
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Layout of the structured array returned by MetaTrader5.copy_rates_range
+MT5_RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+def make_rates(rows: int, seed: int = 0, start: datetime.datetime = datetime.datetime(2024, 9, 1),
+               start_price: float = 1.1, digits: int = 5) -> np.ndarray:
+    """
+    Generate synthetic M1 bars in the MetaTrader5 structured array layout.
+
+    Args:
+        rows (int): Number of bars.
+        seed (int): Seed of the random walk.
+        start (datetime.datetime): Open time of the first bar.
+        start_price (float): Price of the first bar.
+        digits (int): Number of decimals prices are rounded to, like a symbol's 'digits'.
+
+    Returns:
+        np.ndarray: Structured array with MT5_RATES_DTYPE.
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 2e-4, rows)))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 3e-4, rows)) * close
+    rates = np.empty(rows, dtype=MT5_RATES_DTYPE)
+    rates['time'] = int(start.replace(tzinfo=datetime.timezone.utc).timestamp()) + 60 * np.arange(rows)
+    rates['open'] = np.round(open_, digits)
+    rates['close'] = np.round(close, digits)
+    rates['high'] = np.round(np.maximum(open_, close) + spread, digits)
+    rates['low'] = np.round(np.minimum(open_, close) - spread, digits)
+    rates['tick_volume'] = rng.integers(1, 500, rows)
+    rates['spread'] = rng.integers(0, 20, rows)
+    rates['real_volume'] = 0
+    return rates
+
+def make_ohlcv(rows: int, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """
+    Generate a synthetic OHLCV DataFrame shaped like the output of DataFetcher.fetch_data.
+
+    Args:
+        rows (int): Number of bars.
+        seed (int): Seed of the random walk.
+        **kwargs: Passed to make_rates.
+
+    Returns:
+        pd.DataFrame: Bars indexed by time.
+    """
+    df = pd.DataFrame(make_rates(rows, seed=seed, **kwargs)).drop('real_volume', axis=1)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df.set_index('time')
+
+def make_universe(symbols: int, rows: int) -> Dict[str, pd.DataFrame]:
+    """
+    Generate synthetic OHLCV for several symbols with the same time index.
+
+    Args:
+        symbols (int): Number of symbols.
+        rows (int): Number of bars per symbol.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Bars per synthetic symbol name.
+    """
+    return {f"SYM{i:03d}": make_ohlcv(rows, seed=i, start_price=1.0 + i) for i in range(symbols)}
+
+def make_panel(frames: Dict[str, pd.DataFrame], fields: List[str]) -> pd.DataFrame:
+    """
+    Combine per-symbol frames into the panel layout used by universal features:
+    MultiIndex columns (field, symbol) over the common time index.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): Per-symbol frames.
+        fields (List[str]): Columns to keep.
+
+    Returns:
+        pd.DataFrame: The panel.
+    """
+    panel = pd.concat({symbol: df[fields] for symbol, df in frames.items()}, axis=1, join='inner')
+    return panel.swaplevel(axis=1).sort_index(axis=1)
@@ -41,13 +41,34 @@ miscellaneous = [
     "USDX", "LOGC", "SGP20", "FI", "COR"
 ]
 
+# Symbols per asset class, used to filter symbols discovered from the terminal
+SYMBOL_CATEGORIES = {
+    "forex": forex_pairs,
+    "indices": indices,
+    "commodities": commodities,
+    "crypto": cryptocurrencies,
+    "stocks": stocks,
+    "bonds": bonds_and_interest_rates,
+    "misc": miscellaneous,
+}
+
 # Concatenate all symbols into a single list
 all_symbols = (
     forex_pairs + indices + commodities + cryptocurrencies +
     stocks + bonds_and_interest_rates + miscellaneous
 )
 
-# Write the symbols to a text file
-with open('core_symbols.txt', 'w') as f:
-    for symbol in all_symbols:
-        f.write(symbol + '\n')
\ No newline at end of file
+def symbol_category(symbol):
+    """
+    Asset class of a symbol, None if it is not in any list.
+    """
+    for category, symbols in SYMBOL_CATEGORIES.items():
+        if symbol in symbols:
+            return category
+    return None
+
+if __name__ == "__main__":
+    # Write the symbols to a text file
+    with open('core_symbols.txt', 'w') as f:
+        for symbol in all_symbols:
+            f.write(symbol + '\n')
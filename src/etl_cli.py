@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import datetime
+import logging
+import sys
+from typing import List, Optional
+
+from data_selection.create_symbols_list import SYMBOL_CATEGORIES
+from ETL.async_io import DEFAULT_PANEL_BATCH
+from ETL.symbol_selection import DEFAULT_SYMBOLS_FILE, parse_shard, read_symbols_file, resolve_symbols, select_shard
+
+logger = logging.getLogger('etl')
+
+def _timestamp(value: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+
+def _shard(value: str):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _concurrency(value: str):
+    backend, _, limit = value.partition('=')
+    if not backend or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid concurrency '{value}', expected BACKEND=N with N >= 1")
+    return backend, int(limit)
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the `etl` argument parser with its run, backfill, recompute, universal, dataset, export, maintain,
+    symbols and bench commands.
+    """
+    parser = argparse.ArgumentParser(prog='etl', description="MT5 to ArcticDB ETL.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # Options shared by several commands, each command only takes the groups it uses
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument('--symbols', nargs='+', metavar='SYMBOL',
+                           help="Symbols or glob patterns (e.g. 'USD*') selected from the symbol file, all of them by default.")
+    selection.add_argument('--symbols-file', default=DEFAULT_SYMBOLS_FILE, help="Symbol universe, one symbol per line.")
+    selection.add_argument('--shard', type=_shard, metavar='I/N',
+                           help="Only process shard I of N (0 <= I < N), symbols are partitioned by CRC32 of their name.")
+
+    journal = argparse.ArgumentParser(add_help=False)
+    journal.add_argument('--journal-path', default='TimeSeriesDB/etl_journal.sqlite', help="Run journal path.")
+
+    etl = argparse.ArgumentParser(add_help=False)
+    etl.add_argument('--end', type=_timestamp, help="End of the data range, now by default.")
+    etl.add_argument('--profile', action='store_true', default=None,
+                     help="Profile every feature instance (also enabled by ETL_PROFILE=1).")
+    etl.add_argument('--metadata-path', default='TimeSeriesDB/metadata.json', help="Metadata snapshot path.")
+
+    execution = argparse.ArgumentParser(add_help=False)
+    execution.add_argument('--workers', type=int, default=4, help="Number of worker processes.")
+    execution.add_argument('--async', dest='use_async', action='store_true',
+                           help="Run from a single process with asyncio instead of worker processes.")
+    execution.add_argument('--panel', action='store_true',
+                           help="With --async, compute the symbol features of all symbols at once on a time x symbol panel.")
+    execution.add_argument('--panel-batch', type=int, default=DEFAULT_PANEL_BATCH, metavar='N',
+                           help="With --panel, symbols computed per panel, bounding the frames held in memory.")
+    execution.add_argument('--concurrency', type=_concurrency, action='append', default=[], metavar='BACKEND=N',
+                           help="With --async, calls in flight for a backend (mt5, storage or compute), repeatable.")
+    runs = [selection, journal, etl, execution]
+
+    run = commands.add_parser('run', parents=runs, help="Incremental run from each symbol's watermark.")
+    run.add_argument('--start', type=_timestamp, help="Start of the history of symbols without stored data.")
+
+    backfill = commands.add_parser('backfill', parents=runs,
+                                   help="Extend history back to --start, rebuilding symbols whose stored history starts later.")
+    backfill.add_argument('--start', type=_timestamp, required=True, help="Start of the history to load.")
+
+    recompute = commands.add_parser('recompute', parents=runs,
+                                    help="Recompute and replace the stored history, e.g. after a feature change.")
+    recompute.add_argument('--start', type=_timestamp, help="Start of the recomputed history, 2024-09-01 by default.")
+
+    universal = commands.add_parser('universal', parents=[selection, journal, etl],
+                                    help="Only compute the universal features of the selected symbols, e.g. after sharded runs.")
+    universal.add_argument('--start', type=_timestamp, required=True, help="First timestamp to compute.")
+
+    dataset = commands.add_parser('dataset', parents=[selection],
+                                  help="Build a point-in-time training dataset of memory-mapped shards from the feature libraries.")
+    dataset.add_argument('--columns', nargs='+', required=True, help="Symbol-specific columns of every symbol.")
+    dataset.add_argument('--universal-columns', nargs='+', help="Columns of the universal features.")
+    dataset.add_argument('--start', type=_timestamp, required=True, help="First timestamp of the dataset.")
+    dataset.add_argument('--end', type=_timestamp, help="Last timestamp of the dataset, now by default.")
+    dataset.add_argument('--output', required=True, help="Directory of the shards and their index file.")
+    dataset.add_argument('--tolerance', type=int, metavar='MINUTES',
+                         help="Oldest row of a symbol carried forward to a timestamp, unlimited by default.")
+    dataset.add_argument('--dtype', choices=['float32', 'float64'], default='float32', help="Value dtype of the shards.")
+    dataset.add_argument('--memory-limit-mb', type=float, help="Ceiling for the data held per block.")
+    dataset.add_argument('--overwrite', action='store_true', help="Replace an existing dataset in --output.")
+
+    export = commands.add_parser('export', parents=[selection],
+                                 help="Export new partitions of the feature libraries to Parquet datasets, optionally archiving old history.")
+    export.add_argument('--root', default='TimeSeriesDB/parquet', help="Root directory of the Parquet datasets.")
+    export.add_argument('--partition', choices=['day', 'month'], default='day', help="Date partition granularity.")
+    export.add_argument('--archive-before', type=_timestamp,
+                        help="Then delete the exported history before this date from the libraries.")
+    export.add_argument('--rebuild', action='store_true', help="Export everything still in the libraries again.")
+
+    maintain = commands.add_parser('maintain', parents=[selection, journal],
+                                   help="Compact fragmented symbols of the feature libraries and prune their old versions.")
+    maintain.add_argument('--min-segments', type=int,
+                          help="Segments a compaction must merge away for a symbol to be compacted (8 by default).")
+    maintain.add_argument('--segment-size', type=int, help="Target rows per segment after compaction.")
+    maintain.add_argument('--keep-versions', type=int, default=1, help="Versions kept per symbol, the latest included.")
+    maintain.add_argument('--prune-snapshots', metavar='PREFIX',
+                          help="Also delete the snapshots named PREFIX... except the last --keep-snapshots.")
+    maintain.add_argument('--keep-snapshots', type=int, default=7, help="Snapshots kept with --prune-snapshots.")
+    maintain.add_argument('--no-timings', dest='timings', action='store_false',
+                          help="Do not time full reads of the compacted symbols.")
+
+    symbols = commands.add_parser('symbols', help="List symbols discovered from MetaTrader5 with their specifications.")
+    symbols.add_argument('patterns', nargs='*', metavar='PATTERN', help="Glob patterns (e.g. 'USD*'), all symbols by default.")
+    symbols.add_argument('--category', nargs='+', choices=sorted(SYMBOL_CATEGORIES),
+                         help="Only keep symbols of these asset classes (see data_selection/create_symbols_list.py).")
+    symbols.add_argument('--group', help="MetaTrader5 group filter of the discovery, e.g. '*,!*ft'.")
+    symbols.add_argument('--refresh', action='store_true', help="Discover again even if the cache is fresh.")
+    symbols.add_argument('--output', help="Write the selected symbols to this file, usable as --symbols-file.")
+    symbols.add_argument('--metadata-path', default='TimeSeriesDB/metadata.json',
+                         help="Metadata snapshot path, the catalog cache is kept next to it.")
+
+    bench = commands.add_parser('bench', help="Run the benchmark suite, see `etl bench -- --help`.")
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER, help="Arguments of run_benchmarks.py.")
+    return parser
+
+def select_symbols(args: argparse.Namespace) -> List[str]:
+    """
+    Resolve the symbols of a command: the symbol file filtered by --symbols, then restricted to --shard.
+    """
+    symbols = resolve_symbols(args.symbols, read_symbols_file(args.symbols_file))
+    if args.shard is not None:
+        index, count = args.shard
+        symbols = select_shard(symbols, index, count)
+        logger.info(f"Shard {index}/{count}: {len(symbols)} symbols")
+    return symbols
+
+def list_symbols(args: argparse.Namespace) -> int:
+    """
+    The `symbols` command: print (or write) the discovered symbols matching the patterns and categories.
+    """
+    import os
+    from ETL.data_fetcher import DataFetcher
+    from ETL.symbol_catalog import SymbolCatalog
+
+    catalog = SymbolCatalog(DataFetcher(), os.path.join(os.path.dirname(args.metadata_path), 'symbol_specs.json'),
+                            group=args.group)
+    if args.refresh:
+        catalog.refresh()
+    names = catalog.discover(args.patterns, args.category)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.writelines(f"{name}\n" for name in names)
+        logger.info(f"Wrote {len(names)} symbols to {args.output}")
+        return 0
+    for name in names:
+        spec = catalog.specs[name]
+        print(f"{name:<16}{spec.category or '-':<12}digits={spec.digits:<3}point={spec.point:<10g}"
+              f"contract={spec.trade_contract_size:g} {spec.description}")
+    return 0
+
+def _library(library_name: str):
+    """
+    A store of the ETL libraries. Symbol-specific reads derive the calendar columns the configured dtype
+    policy does not persist, like the stores of the ETL.
+    """
+    from ETL.data_store import DataStore
+    if library_name != 'symbol_specific':
+        return DataStore(library_name=library_name)
+    from ETL.dtype_policy import DtypePolicy
+    from ETL.feature_engineer import load_feature_config
+    return DataStore(library_name=library_name,
+                     dtype_policy=DtypePolicy.from_config(load_feature_config().get('dtype_policy')))
+
+def build_dataset(args: argparse.Namespace, symbols: List[str]) -> int:
+    """
+    The `dataset` command: write the selected symbols and columns as memory-mapped shards.
+    """
+    import pandas as pd
+    from ETL.dataset_builder import DatasetBuilder
+
+    options = {'memory_limit_mb': args.memory_limit_mb} if args.memory_limit_mb else {}
+    builder = DatasetBuilder(_library('symbol_specific'), _library('universal'),
+                             dtype=args.dtype, **options)
+    stats = builder.build(args.output, symbols, args.columns, args.start, args.end or datetime.datetime.now(),
+                          universal_columns=args.universal_columns,
+                          tolerance=pd.Timedelta(minutes=args.tolerance) if args.tolerance else None,
+                          overwrite=args.overwrite)
+    logger.info(f"Wrote {stats['rows']} rows in {stats['shards']} shards to {args.output}")
+    return 0
+
+def export_libraries(args: argparse.Namespace, symbols: List[str]) -> int:
+    """
+    The `export` command: export the selected symbols, and the universal features unless sharded, to Parquet.
+    """
+    from ETL.parquet_export import ParquetExporter
+
+    libraries = [('symbol_specific', symbols)]
+    if args.shard is None:
+        libraries.append(('universal', ['Universal_Features']))
+    for library_name, library_symbols in libraries:
+        exporter = ParquetExporter(_library(library_name), args.root, partition=args.partition)
+        written = exporter.export(library_symbols, rebuild=args.rebuild)
+        logger.info(f"Exported {sum(written.values())} partitions of {len(written)} symbols from {library_name}")
+        if args.archive_before:
+            archived = exporter.archive(library_symbols, args.archive_before)
+            logger.info(f"Archived {len(archived)} symbols of {library_name} before {args.archive_before}")
+    return 0
+
+def maintain_libraries(args: argparse.Namespace, symbols: List[str]) -> int:
+    """
+    The `maintain` command: compact and prune the selected symbols, and the universal features unless sharded.
+    """
+    from ETL.data_store import DataStore
+    from ETL.maintenance import StoreMaintenance
+    from ETL.run_journal import RunJournal
+
+    journal = RunJournal(args.journal_path)
+    options = {'min_segments': args.min_segments} if args.min_segments is not None else {}
+    libraries = [('symbol_specific', symbols)]
+    if args.shard is None:
+        libraries.append(('universal', ['Universal_Features']))
+    for library_name, library_symbols in libraries:
+        maintenance = StoreMaintenance(DataStore(library_name=library_name), segment_size=args.segment_size,
+                                       keep_versions=args.keep_versions, journal=journal, **options)
+        if args.prune_snapshots:
+            maintenance.prune_snapshots(args.prune_snapshots, args.keep_snapshots)
+        for entry in maintenance.run(library_symbols, timings=args.timings):
+            if entry["compacted"] or entry["pruned_versions"]:
+                before, after = entry["before"], entry["after"]
+                timing = (f", read {entry['read_s_before']:.3f}s -> {entry['read_s_after']:.3f}s"
+                          if entry["read_s_before"] is not None else "")
+                print(f"{library_name:<16}{entry['symbol']:<16}segments {before['segments']} -> {after['segments']} "
+                      f"({before['rows_per_segment']:.0f} -> {after['rows_per_segment']:.0f} rows each), "
+                      f"versions {before['versions']} -> {after['versions']}{timing}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the `etl` command line.
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'bench':
+        from run_benchmarks import main as run_benchmarks
+        bench_args = args.bench_args[1:] if args.bench_args[:1] == ['--'] else args.bench_args
+        return run_benchmarks(bench_args)
+
+    if args.command == 'symbols':
+        return list_symbols(args)
+
+    symbols = select_symbols(args)
+    if not symbols:
+        logger.warning("No symbols selected")
+        return 0
+
+    if args.command == 'dataset':
+        return build_dataset(args, symbols)
+
+    if args.command == 'export':
+        return export_libraries(args, symbols)
+
+    if args.command == 'maintain':
+        return maintain_libraries(args, symbols)
+
+    from main_etl import Mt5_ArcticDB_ETL
+    etl = Mt5_ArcticDB_ETL(metadata_path=args.metadata_path, journal_path=args.journal_path,
+                           profile=args.profile, data_start_time=args.start)
+
+    if args.command == 'backfill':
+        # Symbols already holding history from --start on are left alone
+        first_timestamps = etl.store_symbol_specific.get_first_timestamps(symbols)
+        symbols = [symbol for symbol in symbols if first_timestamps[symbol] is None or first_timestamps[symbol] > args.start]
+        logger.info(f"Backfilling {len(symbols)} symbols from {args.start}")
+        if not symbols:
+            return 0
+
+    if args.command == 'universal':
+        # The whole stored cross-section unless symbols were given explicitly
+        etl.compute_universal_features(args.start, args.end or datetime.datetime.now(),
+                                       symbols if args.symbols or args.shard is not None else None)
+        return 0
+
+    etl.add_symbols(symbols)
+    # A shard only sees part of the cross-section, universal features are computed by a separate `etl universal`
+    rebuild = args.command in ('backfill', 'recompute')
+    if args.panel and not args.use_async:
+        logger.warning("--panel needs all symbols in one process, running with --async")
+    if args.use_async or args.panel:
+        asyncio.run(etl.run_etl_async(end_time=args.end, rebuild=rebuild, universal=args.shard is None,
+                                      concurrency=dict(args.concurrency), panel=args.panel,
+                                      panel_batch=args.panel_batch))
+    else:
+        etl.run_etl(end_time=args.end, max_workers=args.workers, rebuild=rebuild, universal=args.shard is None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
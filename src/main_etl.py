@@ -1,38 +1,41 @@
+import asyncio
 import datetime
+import os
+import time
 import pandas as pd
 import numpy as np
 import logging
 from retry import retry
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from scipy import stats
-from typing import List, Dict, Optional, Tuple, Any
-from dotenv import load_dotenv
-import MetaTrader5 as mt5
-from os import environ
-import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Optional, Tuple, Type, Any
 from dotenv import load_dotenv
 
+# Heavy modules (MetaTrader5, arcticdb, pandas_ta through the feature modules) are imported on first use,
+# keeping the import of this module and the start of every worker process cheap
 from ETL.data_fetcher import DataFetcher
-from ETL.feature_engineer import FeatureEngineer
+from ETL.symbol_catalog import SymbolCatalog
+from ETL.feature_engineer import FeatureEngineer, load_feature_config
 from ETL.data_store import DataStore
-from ETL.feature_definitions import symbol_specific_features, universal_features
-
-# Load environment variables at the very beginning
-load_dotenv()
-
+from ETL.dtype_policy import DtypePolicy
+from ETL.features import recursions
+from ETL.features.base_feature import BaseFeature
+from ETL.run_journal import RunJournal, FAILED
+from ETL.maintenance import StoreMaintenance
+from ETL.instrumentation import registry, frame_bytes
+from ETL.profiling import FeatureProfiler, merge_profile_reports, profiling_enabled
+from ETL.snapshot_cache import SnapshotCache
+from ETL.universal_stream import UniversalFeatureStream
+from ETL.async_io import DEFAULT_CONCURRENCY, DEFAULT_PANEL_BATCH, AsyncBackends
+from ETL.scheduler import (TASKS_PER_WORKER, CostModel, lpt_order, schedule_report, simulate_makespan,
+                           ideal_makespan, symbol_costs)
+from ETL.feature_definitions import load_symbol_specific_features, load_universal_features
+
+# Handlers are configured by the entry point (etl_cli.main), records propagate to them
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-# Create console handler and set level to debug
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
-
-# Create formatter and add it to the handler
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-
-# Add the handler to the logger
-logger.addHandler(ch)
+# Start of the history fetched for symbols without stored data
+DEFAULT_DATA_START_TIME = datetime.datetime(2024, 9, 1, 0, 0, 0)
 
 class Mt5_ArcticDB_ETL:
     """
@@ -40,94 +43,143 @@ class Mt5_ArcticDB_ETL:
     """
 
     def __init__(self, 
-                 metadata_path: str = 'TimeSeriesDB/metadata.json') -> None:
+                 metadata_path: str = 'TimeSeriesDB/metadata.json',
+                 journal_path: str = 'TimeSeriesDB/etl_journal.sqlite',
+                 profile: Optional[bool] = None,
+                 data_start_time: Optional[datetime.datetime] = None,
+                 snapshot_rows: int = 0,
+                 snapshot_name: Optional[str] = None) -> None:
         """
-        Initialize the ETL process with the given library name, metadata path, and database path.
+        Initialize the ETL process with the given metadata snapshot path and run journal path.
+        Feature profiling is enabled by `profile`, or by the ETL_PROFILE environment variable when None.
+        `data_start_time` is where the history of symbols without stored data starts (2024-09-01 by default).
+        With `snapshot_rows`, the last rows of every symbol are kept in `snapshots` after each run, and
+        published in shared memory under `snapshot_name` for other processes (see ETL/snapshot_cache.py).
         """
+        # Load environment variables once, worker processes inherit them
         load_dotenv()
-        
-        # MetaTrader 5 login
-        authorized = mt5.login(
-            login=environ.get("mt5_broker_login"),
-            password=environ.get("mt5_broker_password"),
-            server=environ.get("mt5_broker_server")
+
+        self.metadata_path: str = metadata_path # path to the json metadata snapshot
+        self.journal: RunJournal = RunJournal(journal_path, snapshot_path=metadata_path) # per-symbol progress and watermarks
+        self.fetcher: DataFetcher = DataFetcher() # for fetching raw data, connects and logs in to MetaTrader5 on first use
+        # Contract specifications of all symbols, discovered in one call and cached next to the metadata
+        self.catalog: SymbolCatalog = SymbolCatalog(
+            self.fetcher, os.path.join(os.path.dirname(metadata_path), 'symbol_specs.json')
         )
         
-        self.metadata_path: str = metadata_path # path to the json metadata file
-        self.fetcher: DataFetcher = DataFetcher() # for fetching raw data
-        
-        # Initialize FeatureEngineer with class-based features
+        # Initialize FeatureEngineer with class-based features, importing only the enabled feature modules
+        feature_config = load_feature_config()
         self.feature_engineer: FeatureEngineer = FeatureEngineer(
-            symbol_features=symbol_specific_features,
-            universal_features=universal_features
+            symbol_features=load_symbol_specific_features(feature_config),
+            universal_features=load_universal_features(feature_config)
+        )
+
+        # Storage dtypes applied to processed frames before they are written
+        self.dtype_policy: DtypePolicy = DtypePolicy.from_config(
+            self.feature_engineer.feature_config.get('dtype_policy')
         )
 
         # Separate stores for symbol-specific and universal features
-        self.store_symbol_specific = DataStore(library_name='symbol_specific')
+        self.store_symbol_specific = DataStore(library_name='symbol_specific', dtype_policy=self.dtype_policy)
         self.store_universal = DataStore(library_name='universal')
 
+        self.profile: bool = profiling_enabled() if profile is None else profile
         self.symbols: List[str] = []
-        self.last_processed: Dict[str, Any] = {}
-        self.metadata: Dict[str, Any] = self.load_metadata()
+        self.watermarks: Dict[str, Optional[str]] = {} # watermarks prefetched from ArcticDB by run_etl
+        self.load_metadata()
         self.universal_symbol: str = 'Universal_Features'
-        self.data_start_time = datetime.datetime(2024, 9, 1, 0, 0, 0)
+        self.data_start_time = data_start_time or DEFAULT_DATA_START_TIME
+        # Latest rows of every symbol for live consumers, updated as symbols are stored
+        self.snapshots: Optional[SnapshotCache] = (SnapshotCache(snapshot_rows, name=snapshot_name)
+                                                   if snapshot_rows else None)
 
     def load_metadata(self) -> Dict[str, Any]:
         """
-        Load metadata from the specified path. If the file does not exist or is corrupted,
-        create a new metadata structure.
+        Load metadata from the run journal, seeding it from a legacy metadata.json on first use.
+        A corrupted metadata file raises instead of silently triggering a full-history reprocess.
         """
-        try:
-            with open(self.metadata_path, 'r') as f:
-                metadata = json.load(f)
-                logger.info("Metadata loaded successfully.")
-                return metadata
-        except:
-            logger.warning("Metadata file not found. Creating a new one.")
-            metadata = {
-                "symbols": {},
-                "etl_runs": []
-            }
-            self.metadata_path = 'TimeSeriesDB/metadata.json'
-            self.save_metadata(metadata)
-            return metadata
-
-    def save_metadata(self, metadata: Optional[Dict[str, Any]] = None) -> None:
-        """
-        Save the current metadata to the specified path.
-        """
-        if metadata is None:
-            metadata = self.metadata
-        with open(self.metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=4)
-            logger.info("Metadata saved successfully.")
+        self.journal.import_metadata(self.metadata_path)
+        logger.info("Metadata loaded successfully.")
+        return self.journal.to_metadata()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """
+        Read-only view of the journal in the legacy metadata.json layout.
+        """
+        return self.journal.to_metadata()
+
+    def save_metadata(self) -> None:
+        """
+        Atomically write the metadata snapshot next to the run journal.
+        """
+        self.journal.write_snapshot()
 
     def add_symbols(self, symbols: List[str]) -> None:
         """
-        Add new symbols to the ETL process and update the metadata accordingly.
+        Add new symbols to the ETL process and record their contract specifications in the metadata.
+        The specifications come from the symbol catalog: one MetaTrader5 call for all symbols, or none
+        while the local catalog cache is fresh.
+
+        Raises:
+            ValueError: If a symbol that is not in the journal yet is unknown to MetaTrader5.
         """
         self.symbols.extend(symbols)
-        for symbol in symbols:
-            if symbol not in self.metadata['symbols']:
-                symbol_info = self.fetcher.get_symbol_info(symbol)
-                self.metadata['symbols'][symbol] = symbol_info
+        specs = self.catalog.lookup(symbols)
+        missing = [symbol for symbol in symbols if symbol not in specs]
+        new_missing = [symbol for symbol in missing if not self.journal.has_symbol(symbol)]
+        if new_missing:
+            logger.error(f"Symbols not found in MetaTrader5: {new_missing}")
+            raise ValueError(f"Symbols not found: {new_missing}")
+        if missing:
+            logger.warning(f"Symbols no longer offered by MetaTrader5, keeping their stored information: {missing}")
+        # Known symbols keep their watermark, their specification is updated
+        self.journal.add_symbols({symbol: {**spec.to_dict(), 'last_timestamp': None} for symbol, spec in specs.items()})
         self.save_metadata()
         logger.info(f"Added symbols: {symbols}")
     
     def get_last_timestamp(self, symbol: str) -> Optional[str]:
         """
-        Retrieve the last processed timestamp for a given symbol from the metadata.
+        Retrieve the last stored timestamp for a given symbol. The watermark is read from the ArcticDB
+        symbol metadata (prefetched in bulk by run_etl), the run journal only mirrors it.
+        """
+        if symbol in self.watermarks:
+            return self.watermarks[symbol]
+        watermark = self.store_symbol_specific.get_watermark(symbol)
+        return watermark.strftime('%Y-%m-%d %H:%M:%S') if watermark is not None else None
+
+    def refresh_watermarks(self, symbols: List[str]) -> None:
         """
-        return self.metadata['symbols'][symbol].get('last_timestamp')
+        Fetch the watermarks of the given symbols from ArcticDB in one batched request and
+        bring the journal back in line where it drifted from the stored data.
+        """
+        self._sync_watermarks(self.store_symbol_specific.get_watermarks(symbols))
+
+    def _sync_watermarks(self, stored: Dict[str, Optional[pd.Timestamp]]) -> None:
+        """
+        Cache watermarks read from ArcticDB and reset the journal entries that drifted from them.
+        """
+        self.watermarks = {
+            symbol: watermark.strftime('%Y-%m-%d %H:%M:%S') if watermark is not None else None
+            for symbol, watermark in stored.items()
+        }
+        for symbol, watermark in self.watermarks.items():
+            if self.journal.get_last_timestamp(symbol) != watermark:
+                logger.warning(f"Journal watermark for {symbol} drifted from ArcticDB, resetting it to {watermark}")
+                self.journal.set_last_timestamp(symbol, watermark)
     
     @retry(tries=3, delay=2, backoff=2)
-    def process_symbol(self, symbol: str, end_time: datetime.datetime) -> Tuple[str, Optional[pd.DataFrame]] :
+    def process_symbol(self, symbol: str, end_time: datetime.datetime, run_id: Optional[int] = None,
+                       rebuild: bool = False) -> Tuple[str, Optional[pd.DataFrame]] :
         """
         Process a given symbol by fetching data, adding features, and storing the processed data.
 
         Args:
             symbol (str): The financial instrument symbol to process.
             end_time (datetime.datetime): The end time for the data range to process.
+            run_id (int, optional): The journal run id under which progress is recorded.
+            rebuild (bool): Ignore the stored watermark and replace the stored history of the symbol
+                            with data recomputed from `data_start_time` to `end_time`.
 
         Returns:
             Tuple[str, Optional[pd.DataFrame]]: A tuple containing the symbol and the processed DataFrame.
@@ -135,79 +187,227 @@ class Mt5_ArcticDB_ETL:
         """
         try:
             logger.info(f"Starting processing for symbol: {symbol}")
-            last_timestamp = self.get_last_timestamp(symbol)
-            if last_timestamp:
-                logger.info(f"Last timestamp for {symbol}: {last_timestamp}")
-                # Determine the required lookback
-                lookback_minutes = self.feature_engineer.max_lookback
-                logger.info(f"Lookback period: {lookback_minutes} minutes")
-                # Convert last_timestamp string to datetime
-                last_timestamp_dt = datetime.datetime.strptime(last_timestamp, '%Y-%m-%d %H:%M:%S')
-                # Calculate new start_time by subtracting lookback
-                start_time = last_timestamp_dt - datetime.timedelta(minutes=lookback_minutes)
-                # Ensure start_time does not go before the earliest possible date
-                earliest_date = self.data_start_time
-                if start_time < earliest_date:
-                    start_time = earliest_date
-                logger.info(f"Calculated start time: {start_time}")
-            else:
-                # No previous data, start from default start_time
-                start_time = self.data_start_time
-                logger.info(f"No previous data found. Using default start time: {start_time}")
-
-            # Fetch data
-            logger.info(f"Fetching data for {symbol} from {start_time} to {end_time}")
-            data = self.fetcher.fetch_data(symbol, start_time, end_time)
-            if data.empty:
-                logger.info(f"No new data for {symbol}")
+            data, last_timestamp_dt = self.fetch_symbol(symbol, end_time, rebuild)
+            if data is None:
                 return symbol, None
+            self._mark_stage(run_id, symbol, 'fetched', len(data))
 
-            # Check data quality
-            logger.info(f"Checking data quality for {symbol}")
-            data = self.check_data_quality(data)
-
-            # Add base features
-            logger.info(f"Adding base features for {symbol}")
-            data = self.feature_engineer.add_base_features(data)
-
-            # Apply symbol-specific features
-            logger.info(f"Applying symbol-specific features for {symbol}")
-            symbol_feature_classes = []
-            for category, features in symbol_specific_features.items():
-                symbol_feature_classes.extend(features)
-            data = self.feature_engineer.apply_symbol_features(data, symbol_feature_classes)
-
-            # Add 'symbol' and 'date_id' columns
-            # logger.info(f"Adding 'symbol' and 'date_id' columns for {symbol}")
-            # data['symbol'] = symbol
-            # data['date_id'] = pd.to_datetime(data.index.date)
-
-            # Since we fetched additional data for lookback, determine the incremental data to store
-            if last_timestamp:
-                # Filter data to only include new data after last_timestamp
-                new_data = data[data.index > last_timestamp_dt]
-                logger.info(f"Filtered new data for {symbol} after last timestamp")
-            else:
-                new_data = data
-
-            if new_data.empty:
-                logger.info(f"No new data to store for {symbol} after filtering with lookback")
+            # The last stored row anchors cumulative features (e.g. OBV)
+            anchor = self.store_symbol_specific.retrieve_tail(symbol, 1) if last_timestamp_dt else None
+            new_data = self.transform_symbol(symbol, data, last_timestamp_dt, anchor, run_id)
+            self._mark_stage(run_id, symbol, 'computed', len(data))
+            if new_data is None:
                 return symbol, None
 
-            # Store symbol specific data
-            logger.info(f"Storing data for {symbol}")
-            self.store_symbol_specific.store_data(symbol, new_data)
-
-            # Update metadata with the latest timestamp from new_data
-            self.metadata['symbols'][symbol]['last_timestamp'] = new_data.index.max().strftime('%Y-%m-%d %H:%M:%S')
-            self.save_metadata()
-
+            self.store_symbol(symbol, new_data, rebuild, self._price_digits(symbol))
+            # Advance the watermark and mark the symbol stored in a single journal transaction
+            self.journal.mark_stored(run_id, symbol, new_data.index.max().strftime('%Y-%m-%d %H:%M:%S'), len(new_data))
             logger.info(f"Processed and stored data for {symbol}")
             return symbol, new_data
         except Exception as e:
             logger.error(f"Error processing {symbol}: {e}")
+            self._mark_stage(run_id, symbol, FAILED, details={'error': str(e)})
             return symbol, None
 
+    def _symbol_feature_classes(self) -> List[Type[BaseFeature]]:
+        symbol_feature_classes = []
+        for category, features in self.feature_engineer.symbol_features.items():
+            symbol_feature_classes.extend(features)
+        return symbol_feature_classes
+
+    def fetch_symbol(self, symbol: str, end_time: datetime.datetime,
+                     rebuild: bool = False) -> Tuple[Optional[pd.DataFrame], Optional[datetime.datetime]]:
+        """
+        Fetch the bars of a symbol after its watermark, with the warm-up bars its features need.
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], Optional[datetime.datetime]]: The raw bars (None if there are none)
+                                                                        and the watermark (None without stored data).
+        """
+        last_timestamp = None if rebuild else self.get_last_timestamp(symbol)
+        if last_timestamp:
+            logger.info(f"Last timestamp for {symbol}: {last_timestamp}")
+            # Determine the lookback (in bars) the features of this symbol need
+            warmup_bars = self.feature_engineer.required_lookback(self._symbol_feature_classes())
+            logger.info(f"Lookback period: {warmup_bars} bars")
+            last_timestamp_dt = datetime.datetime.strptime(last_timestamp, '%Y-%m-%d %H:%M:%S')
+            start_time = last_timestamp_dt
+        else:
+            # No previous data, start from default start_time
+            last_timestamp_dt = None
+            start_time = self.data_start_time
+            warmup_bars = 0
+            logger.info(f"No previous data found. Using default start time: {start_time}")
+
+        # Fetch data
+        logger.info(f"Fetching data for {symbol} from {start_time} to {end_time} with {warmup_bars} warm-up bars")
+        with registry.stage('fetch', symbol=symbol) as metrics:
+            data = self.fetcher.fetch_data(symbol, start_time, end_time, warmup_bars=warmup_bars)
+            # Never warm up on bars a full recompute would not see
+            data = data[data.index >= self.data_start_time] if not data.empty else data
+            metrics.update(rows=len(data), bytes=frame_bytes(data),
+                           span_minutes=(end_time - start_time).total_seconds() / 60)
+        if data.empty:
+            logger.info(f"No new data for {symbol}")
+            return None, last_timestamp_dt
+        return data, last_timestamp_dt
+
+    def transform_symbol(self, symbol: str, data: pd.DataFrame, last_timestamp_dt: Optional[datetime.datetime],
+                         anchor: Optional[pd.DataFrame] = None, run_id: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Check, enrich and compact fetched bars, keeping only the rows after the watermark.
+
+        Args:
+            symbol (str): The financial instrument symbol.
+            data (pd.DataFrame): Bars returned by fetch_symbol, including warm-up bars.
+            last_timestamp_dt (datetime.datetime, optional): The watermark, None without stored data.
+            anchor (pd.DataFrame, optional): Last stored row, cumulative features continue from it.
+            run_id (int, optional): Run id, used for the profile report location.
+
+        Returns:
+            Optional[pd.DataFrame]: The rows to store, None if there are none.
+        """
+        symbol_feature_classes = self._symbol_feature_classes()
+        data = self._prepare_symbol(symbol, data)
+
+        # Apply symbol-specific features
+        logger.info(f"Applying symbol-specific features for {symbol}")
+        profiler = FeatureProfiler() if self.profile else None
+        with registry.stage('symbol_features', symbol=symbol, rows=len(data)) as metrics:
+            data = self.feature_engineer.apply_symbol_features(data, symbol_feature_classes, symbol=symbol, profiler=profiler)
+            metrics['bytes'] = frame_bytes(data)
+        if profiler is not None:
+            profiler.write_report(os.path.join(self.profile_dir(run_id), f"{symbol}.json"), symbol=symbol)
+        return self._finish_symbol(symbol, data, last_timestamp_dt, anchor)
+
+    def transform_symbols(self, batch: Dict[str, Tuple[pd.DataFrame, Optional[datetime.datetime], Optional[pd.DataFrame]]],
+                          run_id: Optional[int] = None) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        transform_symbol for several symbols at once, applying the symbol-specific features on a
+        (time x symbol) panel so that every feature kernel runs once for all symbols.
+
+        Args:
+            batch (Dict[str, Tuple]): Per symbol, the fetched bars, the watermark and the anchor row.
+            run_id (int, optional): Run id, used for the profile report location.
+
+        Returns:
+            Dict[str, Optional[pd.DataFrame]]: Per symbol, the rows to store or None if there are none.
+        """
+        frames = {symbol: self._prepare_symbol(symbol, data) for symbol, (data, _, _) in batch.items()}
+
+        logger.info(f"Applying symbol-specific features to a panel of {len(frames)} symbols")
+        profiler = FeatureProfiler() if self.profile else None
+        with registry.stage('symbol_features_panel', rows=sum(len(df) for df in frames.values())) as metrics:
+            frames = self.feature_engineer.apply_symbol_features_panel(frames, self._symbol_feature_classes(), profiler=profiler)
+            metrics['bytes'] = sum(frame_bytes(df) for df in frames.values())
+        if profiler is not None:
+            profiler.write_report(os.path.join(self.profile_dir(run_id), "panel.json"))
+        return {symbol: self._finish_symbol(symbol, frames[symbol], last_timestamp_dt, anchor)
+                for symbol, (_, last_timestamp_dt, anchor) in batch.items()}
+
+    def _prepare_symbol(self, symbol: str, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check the quality of fetched bars and add the base features.
+        """
+        # Check data quality
+        logger.info(f"Checking data quality for {symbol}")
+        with registry.stage('quality_check', symbol=symbol, rows=len(data)):
+            data = self.check_data_quality(data)
+
+        # Add base features
+        logger.info(f"Adding base features for {symbol}")
+        with registry.stage('base_features', symbol=symbol, rows=len(data)):
+            return self.feature_engineer.add_base_features(data)
+
+    def _finish_symbol(self, symbol: str, data: pd.DataFrame, last_timestamp_dt: Optional[datetime.datetime],
+                       anchor: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Continue cumulative features from the stored series, keep the rows after the watermark and compact them.
+        """
+        if last_timestamp_dt is not None and anchor is not None:
+            # Continue running sums (e.g. OBV) from the last stored row
+            data = self.feature_engineer.rebase_cumulative_features(data, self._symbol_feature_classes(), anchor)
+
+        # Since we fetched additional data for lookback, determine the incremental data to store
+        if last_timestamp_dt is not None:
+            # Filter data to only include new data after last_timestamp
+            new_data = data[data.index > last_timestamp_dt]
+            logger.info(f"Filtered new data for {symbol} after last timestamp")
+        else:
+            new_data = data
+
+        if new_data.empty:
+            logger.info(f"No new data to store for {symbol} after filtering with lookback")
+            return None
+
+        # Compact dtypes (float32 indicators, int8 calendar fields) before storage, rows appended to a
+        # symbol stored with another schema keep its schema
+        stored_dtypes = self.store_symbol_specific.stored_dtypes(symbol) if last_timestamp_dt is not None else None
+        return self.dtype_policy.apply(new_data, stored_dtypes)
+
+    def store_symbol(self, symbol: str, new_data: pd.DataFrame, rebuild: bool = False,
+                     price_digits: Optional[int] = None) -> None:
+        """
+        Store processed rows of a symbol, replacing its whole history when rebuilding. With `price_digits`
+        (see _price_digits), its prices are stored as fixed point.
+        """
+        logger.info(f"Storing data for {symbol}")
+        with registry.stage('store', symbol=symbol, rows=len(new_data)) as metrics:
+            metrics['bytes'] = frame_bytes(new_data)
+            self.store_symbol_specific.store_data(symbol, new_data, replace=rebuild,
+                                                  price_digits=price_digits)
+
+    def _price_digits(self, symbol: str) -> Optional[int]:
+        """
+        Digits of a symbol's prices when the dtype policy stores them as fixed point, from the journal
+        (or the catalog for symbols added before the journal kept contract specifications).
+        """
+        if not self.dtype_policy.fixed_point_prices:
+            return None
+        digits = (self.journal.get_symbol_info(symbol) or {}).get('digits')
+        if digits is None:
+            spec = self.catalog.get(symbol)
+            digits = spec.digits if spec is not None else None
+        if digits is None:
+            logger.warning(f"No digits known for {symbol}, storing its prices as float")
+        return digits
+
+    def _process_symbol_task(self, symbol: str, end_time: datetime.datetime, run_id: Optional[int] = None,
+                             rebuild: bool = False, tail_rows: int = 0
+                             ) -> Tuple[str, Optional[pd.Timestamp], Optional[pd.DataFrame], List[Dict[str, Any]]]:
+        """
+        Worker entry point: process a symbol and hand the first stored timestamp and the stage metrics back
+        to the parent process. The processed frame itself stays in the worker, the universal features read
+        the stored rows back. With `tail_rows`, the last stored rows are handed back as well, for the
+        parent's snapshot cache.
+        """
+        with registry.stage('process_symbol', symbol=symbol):
+            symbol, data = self.process_symbol(symbol, end_time, run_id, rebuild=rebuild)
+        first_timestamp = data.index.min() if data is not None else None
+        tail = data.tail(tail_rows) if data is not None and tail_rows else None
+        return symbol, first_timestamp, tail, registry.pop_symbol(symbol)
+
+    def _update_snapshot(self, symbol: str, data: Optional[pd.DataFrame]) -> None:
+        """
+        Append newly stored rows to the snapshot cache, if enabled. A failure only costs the snapshot.
+        """
+        if self.snapshots is None or data is None:
+            return
+        try:
+            with registry.stage('snapshot_update', symbol=symbol, rows=len(data)):
+                # With the columns read back from the store, calendar columns included
+                self.snapshots.update(symbol, self.dtype_policy.restore(data) if not self.dtype_policy.persist_derivable else data)
+        except Exception as e:
+            logger.error(f"Failed to update the snapshot of {symbol}: {e}")
+
+    def _mark_stage(self, run_id: Optional[int], symbol: str, stage: str,
+                    rows: Optional[int] = None, details: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record symbol progress in the run journal when processing within a run.
+        """
+        if run_id is not None:
+            self.journal.mark_stage(run_id, symbol, stage, rows=rows, details=details)
+
     def check_data_quality(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Check the quality of the data by identifying missing values, duplicate timestamps, and extreme values.
@@ -227,7 +427,8 @@ class Mt5_ArcticDB_ETL:
         # Check for extreme values (Z-score > 3)
         for column in ['open', 'high', 'low', 'close']:
             if column in df.columns:
-                z_scores = np.abs(stats.zscore(df[column].dropna()))
+                values = df[column].dropna()
+                z_scores = np.abs((values - values.mean()) / values.std(ddof=0))
                 extreme_values = (z_scores > 3).sum()
                 if extreme_values > 0:
                     logger.warning(f"Extreme values detected in {column}: {extreme_values}")
@@ -235,78 +436,359 @@ class Mt5_ArcticDB_ETL:
 
         return df
 
-    def run_etl(self) -> None:
+    def estimate_costs(self, symbols: List[str], end_time: datetime.datetime, rebuild: bool = False) -> Tuple[Dict[str, float], CostModel]:
+        """
+        Estimate the processing time of each symbol from the costs recorded in previous runs and
+        the span of data it has to catch up on (from its watermark, or `data_start_time`).
+        """
+        model = CostModel(self.journal.get_symbol_costs())
+        costs = {}
+        for symbol in symbols:
+            watermark = None if rebuild else self.watermarks.get(symbol)
+            start_time = datetime.datetime.strptime(watermark, '%Y-%m-%d %H:%M:%S') if watermark else self.data_start_time
+            costs[symbol] = model.estimate(symbol, (end_time - start_time).total_seconds() / 60)
+        return costs, model
+
+    def run_report_path(self, run_id: int) -> str:
+        """
+        Path of the JSON metrics report of a run, in a 'run_reports' folder next to the metadata.
+        """
+        return os.path.join(os.path.dirname(self.metadata_path), 'run_reports', f"run_{run_id}.json")
+
+    def profile_dir(self, run_id: Optional[int]) -> str:
+        """
+        Directory of the per-symbol feature profiles of a run, in a 'profiles' folder next to the metadata.
+        """
+        return os.path.join(os.path.dirname(self.metadata_path), 'profiles', f"run_{run_id}")
+
+    def compute_universal_features(self, start: datetime.datetime, end: datetime.datetime,
+                                   symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Compute and store the universal features from `start` to `end`, streaming the needed columns
+        of every symbol from the symbol-specific store in memory-bounded time blocks.
+
+        Args:
+            start (datetime.datetime): First timestamp to (re)compute, e.g. the earliest newly stored bar.
+            end (datetime.datetime): Last timestamp to compute.
+            symbols (List[str], optional): Symbols in the cross-section, every stored symbol if None, so that
+                                           a run over a subset of symbols still sees the full cross-section.
+
+        Returns:
+            Dict[str, Any]: Block statistics of the stream.
+        """
+        universal_feature_classes = []
+        for category, features in self.feature_engineer.universal_features.items():
+            universal_feature_classes.extend(features)
+        stream = UniversalFeatureStream.from_config(
+            self.feature_engineer.feature_config.get('universal_stream'), self.feature_engineer,
+            self.store_symbol_specific, self.store_universal, self.universal_symbol
+        )
+        stats = stream.run(symbols or self.store_symbol_specific.list_symbols(), universal_feature_classes, start, end)
+        logger.info(f"Stored universal features: {stats}")
+        return stats
+
+    def _start_run(self, end_time: Optional[datetime.datetime]) -> Tuple[int, datetime.datetime, List[str]]:
+        """
+        Begin (or resume) a run in the journal.
+
+        Returns:
+            Tuple[int, datetime.datetime, List[str]]: The run id, its end time and the symbols still to process.
+        """
+        run_id, end_time, resumed = self.journal.begin_run(end_time or datetime.datetime.now())
+        # A resumed run keeps its original end time and skips symbols it already stored
+        pending_symbols = self.symbols
+        if resumed:
+            stored = set(self.journal.symbols_in_stage(run_id, 'stored'))
+            pending_symbols = [symbol for symbol in self.symbols if symbol not in stored]
+            logger.info(f"Resuming run {run_id}: {len(stored)} symbols already stored, {len(pending_symbols)} pending")
+
+        if self.snapshots is not None:
+            # Symbols new to the snapshot cache start from their stored tail
+            self.snapshots.seed(self.store_symbol_specific, pending_symbols)
+
+        # Compile the JIT kernels once into Numba's disk cache, workers then load them instead of compiling
+        jit_features = self.feature_engineer.jit_features(self._symbol_feature_classes())
+        if jit_features:
+            with registry.stage('jit_warmup'):
+                recursions.warm_up()
+            logger.info(f"JIT backend for {', '.join(jit_features)} (numba {'available' if recursions.NUMBA_AVAILABLE else 'missing'})")
+        return run_id, end_time, pending_symbols
+
+    def _schedule(self, symbols: List[str], end_time: datetime.datetime, rebuild: bool,
+                  workers: int) -> Tuple[List[str], Dict[str, float], CostModel]:
+        """
+        Order symbols longest estimated first, so that no long symbol starts last and stretches the run.
+        """
+        estimates, cost_model = self.estimate_costs(symbols, end_time, rebuild)
+        schedule = lpt_order(estimates)
+        logger.info(f"Scheduled {len(schedule)} symbols longest first, predicted makespan "
+                    f"{simulate_makespan(schedule, estimates, workers):.1f} vs ideal "
+                    f"{ideal_makespan(estimates.values(), workers):.1f}")
+        return schedule, estimates, cost_model
+
+    def _finish_run(self, run_id: int, end_time: datetime.datetime, run_started: float, makespan: float, workers: int,
+                    estimates: Dict[str, float], cost_model: CostModel, cleaned_data_start_times: List[datetime.datetime],
+                    universal: bool, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record symbol costs, compute the universal features over the newly stored range and close the run
+        in the journal with its metrics summary. `extra` is added to the run summary and report.
+        """
+        # Measured costs feed the estimates of the next runs
+        costs = symbol_costs(registry.records)
+        self.journal.record_symbol_costs(run_id, costs)
+        schedule_summary = schedule_report(makespan, {symbol: cost["wall_s"] for symbol, cost in costs.items()},
+                                           workers, estimates if cost_model.has_history else None)
+        logger.info(f"Makespan {schedule_summary['makespan_s']:.1f}s vs ideal {schedule_summary['ideal_s']:.1f}s "
+                    f"(efficiency {schedule_summary['efficiency']:.0%})")
+
+        # Compute and store universal features over the newly stored range, streamed from the store
+        # instead of combining the processed frames of all symbols in memory
+        if universal and cleaned_data_start_times:
+            self.compute_universal_features(min(cleaned_data_start_times), end_time)
+
+        # Log ETL run details with the per-stage metrics summary, full report next to the metadata
+        run_duration = time.perf_counter() - run_started
+        summary = registry.summary()
+        # Terminal connections made by the parent and every worker process during the run
+        mt5_summary = {"connections": summary.get('mt5_connect', {}).get('count', 0),
+                       "reconnects": summary.get('mt5_reconnect', {}).get('count', 0)}
+        details = {"schedule": schedule_summary, "mt5": mt5_summary, **(extra or {})}
+        registry.write_report(self.run_report_path(run_id), extra={"run_id": run_id, "wall_s": run_duration, **details})
+        if self.profile and os.path.isdir(self.profile_dir(run_id)):
+            merge_profile_reports(self.profile_dir(run_id))
+            logger.info(f"Feature profiles written to {self.profile_dir(run_id)}")
+        self.journal.finish_run(run_id, summary={"wall_s": run_duration, "metrics": summary, **details})
+        self.save_metadata()
+        registry.clear()
+
+    def run_maintenance(self, timings: bool = True, **options) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Compact the fragmented symbols of both libraries and prune their old versions, between two
+        `run_etl` calls of a process that runs the ETL every few minutes (see ETL/maintenance.py).
+
+        Args:
+            timings (bool): Time full reads of the compacted symbols before and after compaction.
+            **options: Thresholds and retention of StoreMaintenance, e.g. `keep_versions`.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: The maintenance report per library.
+        """
+        libraries = [(self.store_symbol_specific, self.symbols), (self.store_universal, [self.universal_symbol])]
+        reports = {}
+        for store, symbols in libraries:
+            reports[store.library_name] = StoreMaintenance(store, journal=self.journal, **options).run(symbols, timings=timings)
+        return reports
+
+    def run_etl(self, end_time: Optional[datetime.datetime] = None, max_workers: int = 4, rebuild: bool = False,
+                universal: bool = True) -> None:
         """
         Run the entire ETL process: fetch data, process symbols, and compute universal features.
+
+        Args:
+            end_time (datetime.datetime, optional): End of the data range, now if None.
+            max_workers (int): Number of worker processes.
+            rebuild (bool): Recompute the symbols from `data_start_time` and replace their stored history
+                            instead of appending after their watermark.
+            universal (bool): Compute the universal features over the newly stored range.
         """
         logger.info("Starting ETL process")
-        end_time = datetime.datetime.now()
-        symbol_data: Dict[str, pd.DataFrame] = {}
-        cleaned_data_start_times: List[datetime.datetime] = []
+        run_started = time.perf_counter()
+        run_id, end_time, pending_symbols = self._start_run(end_time)
+        cleaned_data_start_times: List[datetime.datetime] = [] # first newly stored bar per symbol
 
-        # Use ProcessPoolExecutor for multiprocessing
-        with ProcessPoolExecutor(max_workers=4) as executor:
-            # Submit all symbol processing tasks
-            future_to_symbol = {executor.submit(self.process_symbol, symbol, end_time): symbol for symbol in self.symbols}
-
-            for future in as_completed(future_to_symbol):
-                symbol = future_to_symbol[future]
-                try:
-                    symbol, data = future.result()
-                    if data is not None:
-                        symbol_data[symbol] = data
-                        cleaned_data_start_times.append(data.index.min())
-                except Exception as e:
-                    logger.error(f"Exception occurred while processing {symbol}: {e}")
-
-        # Under development
-        # Compute and store universal features
-        # if symbol_data:
-        #     # Combine data from all symbols to compute universal features
-        #     logger.info("Combining data from all symbols for universal features")
-        #     combined_df = pd.concat(symbol_data.values(), axis=1, join='inner', keys=symbol_data.keys())
-        #     # Flatten MultiIndex columns
-        #     combined_df.columns = ['_'.join(col) for col in combined_df.columns]
-        #     # Apply universal features
-        #     logger.info("Applying universal features")
-        #     universal_feature_classes = []
-        #     for category, features in universal_features.items():
-        #         universal_feature_classes.extend(features)
-        #     combined_df = self.feature_engineer.apply_universal_features(combined_df, universal_feature_classes)
-
-            # Handle any additional processing
-            # combined_df.replace([np.inf, -np.inf], np.nan, inplace=True)
-            # combined_df.fillna(method='ffill', inplace=True)
-            # combined_df.fillna(method='bfill', inplace=True)
-            # combined_df.fillna(0, inplace=True)  # Final fallback
-
-            # Store universal features
-            # logger.info("Storing universal features")
-            # self.store_universal.store_data(self.universal_symbol, combined_df)
-
-            # logger.info("Stored universal features")
-
-        # Log ETL run details
-        etl_run = {
-            "timestamp": end_time.strftime('%Y-%m-%d %H:%M:%S'),
-            "processed_symbols": list(symbol_data.keys()),
-            "status": "Completed"
-        }
-        self.metadata['etl_runs'].append(etl_run)
-        self.save_metadata()
+        # Watermarks for all pending symbols in one batched metadata request
+        self.refresh_watermarks(pending_symbols)
+        schedule, estimates, cost_model = self._schedule(pending_symbols, end_time, rebuild, max_workers)
 
+        # Use ProcessPoolExecutor for multiprocessing
+        tail_rows = self.snapshots.capacity if self.snapshots is not None else 0 # rows handed back for the snapshots
+        processing_started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Only a few tasks per worker are queued at a time: whichever worker frees up first
+            # takes the next longest symbol
+            queue = iter(schedule)
+            future_to_symbol = {}
+
+            def submit_next() -> None:
+                symbol = next(queue, None)
+                if symbol is not None:
+                    future_to_symbol[executor.submit(self._process_symbol_task, symbol, end_time, run_id, rebuild, tail_rows)] = symbol
+
+            for _ in range(max_workers * TASKS_PER_WORKER):
+                submit_next()
+            while future_to_symbol:
+                done, _ = wait(future_to_symbol, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = future_to_symbol.pop(future)
+                    submit_next()
+                    try:
+                        symbol, first_timestamp, tail, symbol_metrics = future.result()
+                        registry.extend(symbol_metrics)
+                        self._update_snapshot(symbol, tail)
+                        if first_timestamp is not None:
+                            cleaned_data_start_times.append(first_timestamp)
+                    except Exception as e:
+                        logger.error(f"Exception occurred while processing {symbol}: {e}")
+        makespan = time.perf_counter() - processing_started
+
+        self._finish_run(run_id, end_time, run_started, makespan, max_workers, estimates, cost_model,
+                         cleaned_data_start_times, universal)
         logger.info("ETL process completed")
 
-# Example usage
+    async def _fetch_symbol_async(self, io: AsyncBackends, symbol: str, end_time: datetime.datetime, run_id: int,
+                                  rebuild: bool = False) -> Optional[Tuple[pd.DataFrame, Optional[datetime.datetime], Optional[pd.DataFrame]]]:
+        """
+        Fetch the bars of a symbol and the stored row anchoring its cumulative features (e.g. OBV).
+
+        Returns:
+            Optional[Tuple]: The bars, the watermark and the anchor row, None if there are no new bars.
+        """
+        logger.info(f"Starting processing for symbol: {symbol}")
+        data, last_timestamp_dt = await io.mt5.run(self.fetch_symbol, symbol, end_time, rebuild)
+        if data is None:
+            return None
+        self._mark_stage(run_id, symbol, 'fetched', len(data))
+        anchor = (await io.storage.run(self.store_symbol_specific.retrieve_tail, symbol, 1)
+                  if last_timestamp_dt else None)
+        return data, last_timestamp_dt, anchor
+
+    async def _store_symbol_async(self, io: AsyncBackends, symbol: str, new_data: pd.DataFrame, run_id: int,
+                                  rebuild: bool = False) -> pd.Timestamp:
+        """
+        Store processed rows and advance the watermark, returning the first stored timestamp.
+        """
+        await io.storage.run(self.store_symbol, symbol, new_data, rebuild, self._price_digits(symbol))
+        self.journal.mark_stored(run_id, symbol, new_data.index.max().strftime('%Y-%m-%d %H:%M:%S'), len(new_data))
+        self._update_snapshot(symbol, new_data)
+        logger.info(f"Processed and stored data for {symbol}")
+        return new_data.index.min()
+
+    def _mark_failed(self, run_id: int, symbol: str, error: Exception) -> None:
+        logger.error(f"Error processing {symbol}: {error}")
+        self._mark_stage(run_id, symbol, FAILED, details={'error': str(error)})
+
+    async def _process_symbol_async(self, io: AsyncBackends, symbol: str, end_time: datetime.datetime,
+                                    run_id: int, rebuild: bool = False) -> Optional[pd.Timestamp]:
+        """
+        Asyncio counterpart of process_symbol: every blocking phase runs on its backend, the journal
+        (a SQLite connection bound to the event loop thread) is only touched between phases.
+
+        Returns:
+            Optional[pd.Timestamp]: The first newly stored timestamp, None if nothing was stored.
+        """
+        with registry.stage('process_symbol', symbol=symbol):
+            try:
+                fetched = await self._fetch_symbol_async(io, symbol, end_time, run_id, rebuild)
+                if fetched is None:
+                    return None
+                data, last_timestamp_dt, anchor = fetched
+                new_data = await io.compute.run(self.transform_symbol, symbol, data, last_timestamp_dt, anchor, run_id)
+                self._mark_stage(run_id, symbol, 'computed', len(data))
+                if new_data is None:
+                    return None
+                return await self._store_symbol_async(io, symbol, new_data, run_id, rebuild)
+            except Exception as e:
+                self._mark_failed(run_id, symbol, e)
+                return None
+
+    async def _process_panel_async(self, io: AsyncBackends, symbols: List[str], end_time: datetime.datetime,
+                                   run_id: int, rebuild: bool = False) -> List[Optional[pd.Timestamp]]:
+        """
+        Panel counterpart of _process_symbol_async: all symbols are fetched, their features computed in
+        one panel (see transform_symbols), then all results are stored. Every fetched frame of `symbols`
+        is held in memory at once, run_etl_async passes them in batches of `panel_batch` symbols.
+
+        Returns:
+            List[Optional[pd.Timestamp]]: The first newly stored timestamp of every stored symbol.
+        """
+        async def fetch(symbol: str):
+            try:
+                return await self._fetch_symbol_async(io, symbol, end_time, run_id, rebuild)
+            except Exception as e:
+                self._mark_failed(run_id, symbol, e)
+                return None
+
+        async def store(symbol: str, new_data: pd.DataFrame) -> Optional[pd.Timestamp]:
+            try:
+                return await self._store_symbol_async(io, symbol, new_data, run_id, rebuild)
+            except Exception as e:
+                self._mark_failed(run_id, symbol, e)
+                return None
+
+        fetched = await asyncio.gather(*[fetch(symbol) for symbol in symbols])
+        batch = {symbol: result for symbol, result in zip(symbols, fetched) if result is not None}
+        if not batch:
+            return []
+        try:
+            results = await io.compute.run(self.transform_symbols, batch, run_id)
+        except Exception as e:
+            for symbol in batch:
+                self._mark_failed(run_id, symbol, e)
+            return []
+        for symbol, (data, _, _) in batch.items():
+            self._mark_stage(run_id, symbol, 'computed', len(data))
+        return await asyncio.gather(*[store(symbol, new_data) for symbol, new_data in results.items() if new_data is not None])
+
+    async def run_etl_async(self, end_time: Optional[datetime.datetime] = None, rebuild: bool = False,
+                            universal: bool = True, concurrency: Optional[Dict[str, int]] = None,
+                            panel: bool = False, panel_batch: int = DEFAULT_PANEL_BATCH) -> None:
+        """
+        Run the ETL process from a single process with asyncio: MetaTrader5 fetches, ArcticDB reads and
+        writes and feature computation run in bounded thread pools, so that many uploads and watermark
+        reads are in flight while the next symbols are fetched and computed.
+
+        Args:
+            end_time (datetime.datetime, optional): End of the data range, now if None.
+            rebuild (bool): Recompute the symbols from `data_start_time` and replace their stored history.
+            universal (bool): Compute the universal features over the newly stored range.
+            concurrency (Dict[str, int], optional): Calls in flight per backend ('mt5', 'storage', 'compute'),
+                                                    see async_io.DEFAULT_CONCURRENCY.
+            panel (bool): Compute the symbol-specific features of all symbols at once on a (time x symbol)
+                          panel instead of symbol by symbol.
+            panel_batch (int): With `panel`, symbols per panel; the batches run one after the other so that
+                               at most `panel_batch` fetched frames are held in memory.
+        """
+        logger.info("Starting ETL process (asyncio)")
+        run_started = time.perf_counter()
+        run_id, end_time, pending_symbols = self._start_run(end_time)
+        limits = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        if self.profile:
+            limits['compute'] = 1 # tracemalloc is process-wide, profiles of overlapping symbols would mix
+
+        with AsyncBackends(limits) as io:
+            # Watermarks for all pending symbols in one batched metadata request, off the event loop
+            self._sync_watermarks(await io.storage.run(self.store_symbol_specific.get_watermarks, pending_symbols))
+            schedule, estimates, cost_model = self._schedule(pending_symbols, end_time, rebuild, io.compute.max_concurrency)
+
+            processing_started = time.perf_counter()
+            if panel:
+                first_timestamps = []
+                panel_batch = max(panel_batch, 1)
+                for start in range(0, len(schedule), panel_batch):
+                    first_timestamps.extend(await self._process_panel_async(
+                        io, schedule[start:start + panel_batch], end_time, run_id, rebuild))
+            else:
+                # Symbols start in schedule order, a symbol takes a slot from its fetch to its store so that
+                # fetched frames do not pile up in front of the compute pool
+                slots = asyncio.Semaphore(io.frames_in_flight)
+
+                async def process(symbol: str) -> Optional[pd.Timestamp]:
+                    async with slots:
+                        return await self._process_symbol_async(io, symbol, end_time, run_id, rebuild)
+
+                first_timestamps = await asyncio.gather(*[process(symbol) for symbol in schedule])
+            makespan = time.perf_counter() - processing_started
+            backend_stats = io.stats()
+
+        logger.info(f"Backend concurrency: {backend_stats}")
+        self._finish_run(run_id, end_time, run_started, makespan, io.compute.max_concurrency, estimates, cost_model,
+                         [timestamp for timestamp in first_timestamps if timestamp is not None], universal,
+                         extra={"backends": backend_stats})
+        logger.info("ETL process completed")
 
 if __name__ == "__main__":
-    # Initialize ETL class
-    etl = Mt5_ArcticDB_ETL(metadata_path = 'TimeSeriesDB/metadata.json')
-    
-    # Add symbols, for example from a text file
-    with open('src/data_selection/core_symbols.txt', 'r') as f:
-        symbols = [line.strip() for line in f.readlines()]
-    etl.add_symbols(symbols) 
-    
-    # Run ETL process
-    etl.run_etl()
+    import sys
+    from etl_cli import main
+
+    # Without arguments this behaves like `etl run`: an incremental run over the core symbols
+    sys.exit(main(sys.argv[1:] or ['run']))
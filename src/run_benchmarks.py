@@ -0,0 +1,50 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+from benchmarks.suite import compare_results, run_suite, save_results
+
+logger = logging.getLogger('benchmarks')
+
+def main(argv=None) -> int:
+    """
+    Run the benchmark suite, save the JSON report and optionally compare it against a baseline report.
+
+    Returns:
+        int: 1 if a benchmark regressed against the baseline, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the ETL hot paths on synthetic OHLCV data.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Bars per synthetic symbol.")
+    parser.add_argument('--symbols', type=int, default=10, help="Number of synthetic symbols.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per benchmark.")
+    parser.add_argument('--filter', dest='name_filter', help="Only run benchmarks whose name contains this string.")
+    parser.add_argument('--output', help="Path of the JSON report, defaults to benchmarks/results/<commit>.json.")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative slowdown reported as a regression.")
+    parser.add_argument('--verbose', action='store_true', help="Also show INFO logs of the ETL modules.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not args.verbose:
+        # The timed ETL code logs every call, keep only the benchmark lines and warnings
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(lambda record: record.name.startswith('benchmarks') or record.levelno >= logging.WARNING)
+
+    report = run_suite(rows=args.rows, symbols=args.symbols, repeat=args.repeat, name_filter=args.name_filter)
+    output = args.output or os.path.join('benchmarks', 'results', f"{report['meta']['git_commit'] or 'local'}.json")
+    save_results(report, output)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, 'r') as f:
+        baseline = json.load(f)
+    comparison = compare_results(baseline, report, threshold=args.threshold)
+    for name, entry in comparison.items():
+        flag = "REGRESSION" if entry['regression'] else "ok"
+        logger.info(f"{name}: {entry['baseline_s']:.4f}s -> {entry['current_s']:.4f}s (x{entry['ratio']:.2f}) {flag}")
+    return 1 if any(entry['regression'] for entry in comparison.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+from ETL.async_io import DEFAULT_CONCURRENCY, FRAMES_PER_COMPUTE_SLOT, AsyncBackend, AsyncBackends
+
+class TestAsyncBackends(unittest.TestCase):
+    def test_calls_are_bounded_per_backend(self):
+        running = {'now': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def blocking_call(value):
+            with lock:
+                running['now'] += 1
+                running['peak'] = max(running['peak'], running['now'])
+            time.sleep(0.02)
+            with lock:
+                running['now'] -= 1
+            return value * 2
+
+        async def main(backend):
+            return await asyncio.gather(*[backend.run(blocking_call, value) for value in range(12)])
+
+        backend = AsyncBackend('storage', 3)
+        try:
+            self.assertEqual(asyncio.run(main(backend)), [value * 2 for value in range(12)])
+        finally:
+            backend.shutdown()
+        self.assertEqual(running['peak'], 3)
+        self.assertEqual(backend.stats(), {'max_concurrency': 3, 'calls': 12, 'peak_in_flight': 3})
+
+    def test_backends_overlap_but_mt5_is_serialized(self):
+        async def main(io):
+            await asyncio.gather(*[io.mt5.run(time.sleep, 0.01) for _ in range(4)],
+                                 *[io.storage.run(time.sleep, 0.01) for _ in range(4)])
+
+        with AsyncBackends({'storage': 4}) as io:
+            started = time.perf_counter()
+            asyncio.run(main(io))
+            elapsed = time.perf_counter() - started
+            stats = io.stats()
+        self.assertEqual(stats['mt5']['peak_in_flight'], DEFAULT_CONCURRENCY['mt5'])
+        self.assertEqual(stats['storage']['peak_in_flight'], 4)
+        self.assertEqual(stats['compute']['calls'], 0)
+        # Storage calls run while MT5 fetches queue, the run takes about as long as the MT5 calls alone
+        self.assertLess(elapsed, 0.08)
+
+    def test_errors_propagate(self):
+        async def main(io):
+            await io.storage.run(int, 'not a number')
+
+        with AsyncBackends() as io:
+            with self.assertRaises(ValueError):
+                asyncio.run(main(io))
+            self.assertEqual(io.storage.in_flight, 0)
+        with self.assertRaises(AttributeError):
+            AsyncBackends().network
+
+class TestAsyncRunBackpressure(unittest.TestCase):
+    def run_etl(self, **options):
+        from main_etl import Mt5_ArcticDB_ETL
+        etl = Mt5_ArcticDB_ETL.__new__(Mt5_ArcticDB_ETL)
+        etl.profile = False
+        symbols = [f"SYM{i:02d}" for i in range(20)]
+        held = {'now': 0, 'peak': 0}
+
+        async def process_symbol(io, symbol, end_time, run_id, rebuild):
+            # A fetched frame is held until the symbol is computed and stored
+            held['now'] += 1
+            held['peak'] = max(held['peak'], held['now'])
+            await io.mt5.run(time.sleep, 0.001)
+            await io.compute.run(time.sleep, 0.01)
+            held['now'] -= 1
+            return None
+
+        async def process_panel(io, batch, end_time, run_id, rebuild):
+            held['peak'] = max(held['peak'], len(batch))
+            return [None] * len(batch)
+
+        etl._start_run = mock.Mock(return_value=(1, None, symbols))
+        etl._schedule = mock.Mock(return_value=(symbols, {}, None))
+        etl._sync_watermarks = etl._finish_run = mock.Mock()
+        etl._process_symbol_async, etl._process_panel_async = process_symbol, process_panel
+        etl.store_symbol_specific = mock.Mock()
+        asyncio.run(etl.run_etl_async(universal=False, **options))
+        return held['peak']
+
+    def test_fetched_frames_are_bounded_by_the_compute_pool(self):
+        self.assertEqual(self.run_etl(concurrency={'compute': 3}), 3 * FRAMES_PER_COMPUTE_SLOT)
+        self.assertEqual(AsyncBackends({'compute': 3}).frames_in_flight, 3 * FRAMES_PER_COMPUTE_SLOT)
+
+    def test_panels_run_in_batches(self):
+        self.assertEqual(self.run_etl(panel=True, panel_batch=8), 8)
+
+if __name__ == '__main__':
+    unittest.main()
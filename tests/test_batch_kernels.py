@@ -0,0 +1,91 @@
+import importlib.util
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.base_feature import BaseFeature
+from ETL.features.kernels import bollinger_bands, rolling_means
+
+def make_close(rows=5000, level=1.1, seed=7):
+    rng = np.random.default_rng(seed)
+    close = pd.Series(level * np.exp(np.cumsum(rng.normal(0, 1e-4, rows))),
+                      index=pd.date_range('2024-09-01', periods=rows, freq='min'), name='close')
+    close.iloc[[100, 101, 2500]] = np.nan
+    return close
+
+class GridFeature(BaseFeature):
+    batched = True
+    calls = []
+
+    def __init__(self, length: int):
+        super().__init__(f"GridFeature_{length}")
+        self.length = length
+
+    def compute(self, df):
+        raise AssertionError("the grid is computed in one call")
+
+    @classmethod
+    def compute_batch(cls, df, param_combinations):
+        cls.calls.append(param_combinations)
+        return pd.DataFrame({f"GridFeature_{p['length']}": df['close'] * p['length'] for p in param_combinations})
+
+class TestBatchKernels(unittest.TestCase):
+    def test_rolling_means_match_pandas(self):
+        lengths = [1, 5, 10, 20, 50, 100, 200]
+        for level in [1.1, 60000.0]:
+            close = make_close(level=level)
+            means = rolling_means(close.to_numpy(), lengths)
+            for j, length in enumerate(lengths):
+                expected = close.rolling(length).mean().to_numpy()
+                np.testing.assert_allclose(means[:, j], expected, rtol=1e-12, equal_nan=True)
+
+    def test_rolling_means_short_series(self):
+        means = rolling_means(np.array([1.0, 2.0, 3.0]), [2, 5])
+        np.testing.assert_array_equal(means[:, 0], [np.nan, 1.5, 2.5])
+        self.assertTrue(np.isnan(means[:, 1]).all())
+        self.assertEqual(rolling_means(np.array([]), [3]).shape, (0, 1))
+
+    def test_bollinger_bands_share_variance(self):
+        close = make_close()
+        bands = bollinger_bands(close, 20, [1, 2.5])
+        self.assertEqual(list(bands[2.5].columns), ['BBL_20_2.5', 'BBM_20_2.5', 'BBU_20_2.5', 'BBB_20_2.5', 'BBP_20_2.5'])
+        mid = close.rolling(20).mean()
+        deviation = close.rolling(20).std(ddof=0)
+        for std in [1.0, 2.5]:
+            np.testing.assert_allclose(bands[std][f'BBL_20_{std}'], mid - std * deviation, rtol=1e-10, equal_nan=True)
+            np.testing.assert_allclose(bands[std][f'BBU_20_{std}'], mid + std * deviation, rtol=1e-10, equal_nan=True)
+            np.testing.assert_allclose(bands[std][f'BBP_20_{std}'],
+                                       (close - (mid - std * deviation)) / (2 * std * deviation), rtol=1e-8, equal_nan=True)
+
+    def test_engineer_routes_grids(self):
+        engineer = FeatureEngineer({}, {})
+        engineer.feature_config['symbol_specific']['Test'] = {'GridFeature': {'length': [2, 3], 'description': ''}}
+        GridFeature.calls.clear()
+        df = pd.DataFrame({'close': [1.0, 2.0], 'tick_volume': [1, 1]})
+        df = engineer.apply_symbol_features(df, [GridFeature])
+        self.assertEqual(GridFeature.calls, [[{'length': 2}, {'length': 3}]])
+        self.assertEqual(list(df['GridFeature_3']), [3.0, 6.0])
+        # Instances (lookbacks, cumulative columns) are still built per combination
+        self.assertEqual([f.name for f in engineer.build_feature_instances([GridFeature])], ['GridFeature_2', 'GridFeature_3'])
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), "pandas_ta is not installed")
+    def test_batches_match_pandas_ta(self):
+        from ETL.features.symbol_specific.moving_averages import SMA
+        from ETL.features.symbol_specific.volatility_indicators import BBANDS
+        df = make_close().to_frame()
+
+        sma_grid = [{'length': length} for length in [5, 10, 20, 50, 100, 200]]
+        batch = SMA.compute_batch(df, sma_grid)
+        for params in sma_grid:
+            instance = SMA(**params)
+            np.testing.assert_allclose(batch[instance.name], instance.compute(df), rtol=1e-10, equal_nan=True)
+
+        bbands_grid = [{'length': length, 'std': std} for length in [20, 30] for std in [1, 2]]
+        batch = BBANDS.compute_batch(df, bbands_grid)
+        for params in bbands_grid:
+            instance = BBANDS(**params)
+            for col, values in instance.compute(df).items():
+                np.testing.assert_allclose(batch[f"{instance.name}_{col}"], values, rtol=1e-8, equal_nan=True)
+
+if __name__ == '__main__':
+    unittest.main()
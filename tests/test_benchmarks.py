@@ -0,0 +1,22 @@
+import unittest
+from benchmarks.suite import compare_results, run_suite
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_run_suite_smoke(self):
+        report = run_suite(rows=500, symbols=2, repeat=1)
+        self.assertEqual(report['meta']['rows'], 500)
+        self.assertIn('add_base_features', report['results'])
+        self.assertIn('data_store_read', report['results'])
+        for name, result in report['results'].items():
+            self.assertTrue('median_s' in result or 'skipped' in result, name)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'a': {'median_s': 1.0}, 'b': {'median_s': 1.0}, 'c': {'skipped': 'ImportError'}}}
+        current = {'results': {'a': {'median_s': 1.5}, 'b': {'median_s': 1.05}, 'c': {'median_s': 1.0}}}
+        comparison = compare_results(baseline, current, threshold=0.10)
+        self.assertTrue(comparison['a']['regression'])
+        self.assertFalse(comparison['b']['regression'])
+        self.assertNotIn('c', comparison)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import datetime
+import os
+import tempfile
+import unittest
+from etl_cli import build_parser, select_symbols
+from ETL.symbol_selection import parse_shard, read_symbols_file, resolve_symbols, select_shard, shard_of
+
+class TestSymbolSelection(unittest.TestCase):
+    def setUp(self):
+        self.universe = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD', 'XAGUSD', 'BTCUSD', 'SP500']
+
+    def test_resolve_globs_and_names(self):
+        self.assertEqual(resolve_symbols(['USD*', 'XA?USD'], self.universe), ['USDJPY', 'XAUUSD', 'XAGUSD'])
+        self.assertEqual(resolve_symbols(['SP500', 'NAS100'], self.universe), ['SP500', 'NAS100'])
+        self.assertEqual(resolve_symbols(None, self.universe), self.universe)
+
+    def test_shards_partition_the_universe(self):
+        shards = [select_shard(self.universe, index, 3) for index in range(3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(self.universe))
+        self.assertEqual(len(set(sum(shards, []))), len(self.universe))
+        # Stable across processes and hosts
+        self.assertEqual(shard_of('EURUSD', 4), 3)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('1/4'), (1, 4))
+        for invalid in ['4/4', '-1/4', '1', 'a/b', '0/0']:
+            with self.assertRaises(ValueError):
+                parse_shard(invalid)
+
+class TestCommandLine(unittest.TestCase):
+    def test_select_symbols_from_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'symbols.txt')
+            with open(path, 'w') as f:
+                f.write('EURUSD\nGBPUSD\n# metals\nXAUUSD\n\nEURUSD\n')
+            self.assertEqual(read_symbols_file(path), ['EURUSD', 'GBPUSD', 'XAUUSD'])
+            args = build_parser().parse_args(['run', '--symbols-file', path, '--symbols', '*USD', '--shard', '0/1'])
+            self.assertEqual(select_symbols(args), ['EURUSD', 'GBPUSD', 'XAUUSD'])
+
+    def test_parse_commands(self):
+        args = build_parser().parse_args(['recompute', '--start', '2024-01-01', '--end', '2024-02-01T12:00:00',
+                                          '--workers', '8', '--shard', '2/3'])
+        self.assertEqual(args.command, 'recompute')
+        self.assertEqual(args.start, datetime.datetime(2024, 1, 1))
+        self.assertEqual(args.end, datetime.datetime(2024, 2, 1, 12))
+        self.assertEqual((args.workers, args.shard), (8, (2, 3)))
+        with self.assertRaises(SystemExit):
+            build_parser().parse_args(['backfill'])  # --start is required
+        args = build_parser().parse_args(['dataset', '--columns', 'close', 'RSI_14', '--start', '2024-09-01',
+                                          '--output', 'datasets/fx', '--tolerance', '30'])
+        self.assertEqual((args.columns, args.tolerance, args.dtype), (['close', 'RSI_14'], 30, 'float32'))
+        args = build_parser().parse_args(['export', '--archive-before', '2024-06-01', '--partition', 'month'])
+        self.assertEqual((args.archive_before, args.partition), (datetime.datetime(2024, 6, 1), 'month'))
+        args = build_parser().parse_args(['maintain', '--keep-versions', '3', '--no-timings'])
+        self.assertEqual((args.keep_versions, args.timings, args.min_segments), (3, False, None))
+
+    def test_options_belong_to_their_commands(self):
+        for argv in (['export', '--workers', '8'], ['maintain', '--async'], ['dataset', '--columns', 'close',
+                     '--start', '2024-09-01', '--output', 'datasets/fx', '--profile']):
+            with self.assertRaises(SystemExit):
+                build_parser().parse_args(argv)
+        args = build_parser().parse_args(['maintain', '--journal-path', 'journal.sqlite', '--shard', '0/2'])
+        self.assertEqual((args.journal_path, args.shard), ('journal.sqlite', (0, 2)))
+        self.assertEqual(build_parser().parse_args(['universal', '--start', '2024-09-01', '--profile']).profile, True)
+
+    def test_parse_async_concurrency(self):
+        args = build_parser().parse_args(['run', '--async', '--concurrency', 'storage=16', '--concurrency', 'compute=4'])
+        self.assertTrue(args.use_async)
+        self.assertEqual(dict(args.concurrency), {'storage': 16, 'compute': 4})
+        self.assertFalse(build_parser().parse_args(['run']).use_async)
+        self.assertTrue(build_parser().parse_args(['run', '--async', '--panel']).panel)
+        self.assertEqual(build_parser().parse_args(['run', '--panel', '--panel-batch', '16']).panel_batch, 16)
+        with self.assertRaises(SystemExit):
+            build_parser().parse_args(['run', '--concurrency', 'storage=0'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.kernels import cross_sectional_rank, cross_sectional_zscore, within_groups
+from ETL.features.universal.cross_sectional import CrossSectionalRank, CrossSectionalZScore
+from ETL.panel import build_panel
+from ETL.universal_stream import UniversalFeatureStream
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'SP500', 'GER40', 'XAUUSD', 'BTCUSD', 'ETHUSD']
+
+def make_frames(periods, symbols=SYMBOLS, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-09-02', periods=periods, freq='min')
+    # Rounded returns, so that ties (e.g. unchanged prices) occur
+    return {symbol: pd.DataFrame({'Log_Returns': np.round(rng.normal(0, 1e-3, periods), 4),
+                                  'RSI_14': rng.uniform(0, 100, periods)}, index=index)
+            for symbol in symbols}
+
+class TestCrossSectionalKernels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        values = np.round(rng.normal(size=(300, 12)), 1)
+        values[rng.random(values.shape) < 0.2] = np.nan
+        values[10] = np.nan
+        values[11, 1:] = np.nan
+        self.values = pd.DataFrame(values)
+
+    def test_rank_matches_pandas(self):
+        np.testing.assert_allclose(cross_sectional_rank(self.values.to_numpy()),
+                                   self.values.rank(axis=1, pct=True).to_numpy())
+
+    def test_zscore_matches_pandas(self):
+        expected = self.values.sub(self.values.mean(axis=1), axis=0).div(self.values.std(axis=1), axis=0)
+        scores = cross_sectional_zscore(self.values.to_numpy())
+        np.testing.assert_allclose(scores, expected.to_numpy())
+        self.assertTrue(np.isnan(cross_sectional_zscore(np.ones((3, 4)))).all())
+
+    def test_within_groups(self):
+        groups = ['a', 'b', 'a', None] * 3
+        ranks = within_groups(cross_sectional_rank, self.values.to_numpy(), groups)
+        expected = self.values.T.groupby(np.array(groups, dtype=str)).rank(pct=True).T
+        np.testing.assert_allclose(ranks, expected.to_numpy())
+
+class TestCrossSectionalFeatures(unittest.TestCase):
+    def test_features_on_panel(self):
+        panel = build_panel(make_frames(100), ['Log_Returns', 'RSI_14'], how='outer')
+        rank = CrossSectionalRank('RSI_14').compute(panel)
+        self.assertEqual(list(rank.columns), sorted(SYMBOLS))
+        pd.testing.assert_frame_equal(rank, panel['RSI_14'].rank(axis=1, pct=True))
+        self.assertEqual(CrossSectionalRank('RSI_14', by_category=True).name, 'CS_Rank_RSI_14_Category')
+        self.assertEqual(CrossSectionalZScore().input_columns, ['Log_Returns'])
+
+        scores = CrossSectionalZScore(by_category=True).compute(panel)
+        # Within asset classes: BTCUSD and ETHUSD are the only crypto symbols, their z-scores are opposite
+        np.testing.assert_allclose(scores['BTCUSD'], -scores['ETHUSD'])
+        returns = panel['Log_Returns'][['EURUSD', 'GBPUSD', 'USDJPY']]
+        expected = returns.sub(returns.mean(axis=1), axis=0).div(returns.std(axis=1), axis=0)
+        np.testing.assert_allclose(scores[['EURUSD', 'GBPUSD', 'USDJPY']], expected)
+
+    def test_configured_columns(self):
+        engineer = FeatureEngineer({}, {})
+        engineer.feature_config['universal'] = {
+            "Cross_Sectional_Metrics": {"CrossSectionalRank": {"column": ["Log_Returns", "RSI_14"],
+                                                               "by_category": [False, True]}}}
+        panel = build_panel(make_frames(50), ['Log_Returns', 'RSI_14'], how='outer')
+        result = engineer.compute_universal_features(panel, [CrossSectionalRank, CrossSectionalZScore])
+        self.assertIn('CS_Rank_RSI_14_Category_XAUUSD', result.columns)
+        self.assertIn('CS_ZScore_Log_Returns_EURUSD', result.columns)
+        self.assertEqual(result.shape[1], 5 * len(SYMBOLS))
+
+class TestStreamedCrossSection(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        uri = f"lmdb://{self.tmpdir.name}"
+        self.source = DataStore(library_name='symbol_specific', uri=uri)
+        self.target = DataStore(library_name='universal', uri=uri)
+        self.frames = make_frames(2000)
+        self.frames['ETHUSD'] = self.frames['ETHUSD'].iloc[500:]  # listed later
+        for symbol, df in self.frames.items():
+            self.source.store_data(symbol, df)
+        self.engineer = FeatureEngineer({}, {})
+        self.engineer.feature_config['universal'] = {
+            "Cross_Sectional_Metrics": {"CrossSectionalRank": {"column": ["RSI_14"], "by_category": [True]},
+                                        "CrossSectionalZScore": {"column": ["Log_Returns"]}}}
+        self.features = [CrossSectionalRank, CrossSectionalZScore]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_incremental_runs_match_full_history(self):
+        stream = UniversalFeatureStream(self.engineer, self.source, self.target, 'Universal_Features', memory_limit_mb=0.05)
+        split = pd.Timestamp('2024-09-02 20:00')
+        stream.run(self.source.list_symbols(), self.features, pd.Timestamp('2024-09-02'), split - pd.Timedelta(minutes=1))
+        stats = stream.run(self.source.list_symbols(), self.features, split, pd.Timestamp('2024-09-04'))
+        # Only the rows after the split are computed by the second run
+        self.assertEqual(stats['rows'], 2000 - 20 * 60)
+
+        panel = build_panel(self.frames, ['Log_Returns', 'RSI_14'], how='outer')
+        expected = self.engineer.compute_universal_features(panel, self.features)
+        stored = self.target.retrieve_data('Universal_Features')
+        self.assertEqual(sorted(stored.columns), sorted(expected.columns))
+        pd.testing.assert_frame_equal(stored, expected[stored.columns], check_freq=False)
+
+if __name__ == '__main__':
+    unittest.main()
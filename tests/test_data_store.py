@@ -1,3 +1,4 @@
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from ETL.data_store import DataStore
@@ -70,5 +71,43 @@ class TestDataStore(unittest.TestCase):
             }, index=df.index)
             pd.testing.assert_frame_equal(normalized_df, expected_df)
 
+class TestDataStoreWatermarks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = DataStore(library_name='test', uri=f"lmdb://{self.tmpdir.name}")
+        self.data = pd.DataFrame({
+            'close': [1.1000, 1.1010, 1.1020],
+            'SMA_10': [1.1005, 1.1007, 1.1009]
+        }, index=pd.date_range(start='2024-09-01', periods=3, freq='min'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_watermark_stored_with_data(self):
+        self.store.store_data('EURUSD', self.data.iloc[:2])
+        self.store.store_data('EURUSD', self.data.iloc[1:])
+        self.assertEqual(self.store.get_watermark('EURUSD'), pd.Timestamp('2024-09-01 00:02:00'))
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), self.data, check_freq=False)
+
+    def test_bulk_watermarks(self):
+        self.store.store_data('EURUSD', self.data)
+        self.store.lib.write('GBPUSD', self.data.iloc[:2])  # written without watermark metadata
+        watermarks = self.store.get_watermarks(['EURUSD', 'GBPUSD', 'USDJPY'])
+        self.assertEqual(watermarks, {
+            'EURUSD': pd.Timestamp('2024-09-01 00:02:00'),
+            'GBPUSD': pd.Timestamp('2024-09-01 00:01:00'),
+            'USDJPY': None,
+        })
+
+    def test_replace_and_first_timestamps(self):
+        self.store.store_data('EURUSD', self.data)
+        self.store.store_data('EURUSD', self.data.iloc[1:2], replace=True)
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), self.data.iloc[1:2], check_freq=False)
+        self.assertEqual(self.store.get_watermark('EURUSD'), pd.Timestamp('2024-09-01 00:01:00'))
+        self.assertEqual(self.store.get_first_timestamps(['EURUSD', 'USDJPY']), {
+            'EURUSD': pd.Timestamp('2024-09-01 00:01:00'),
+            'USDJPY': None,
+        })
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.dataset_builder import Dataset, DatasetBuilder
+
+class TestDatasetBuilder(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        uri = f"lmdb://{os.path.join(self.tmpdir.name, 'lmdb')}"
+        self.source = DataStore(library_name='symbol_specific', uri=uri)
+        self.universal = DataStore(library_name='universal', uri=uri)
+        rng = np.random.default_rng(3)
+        index = pd.date_range('2024-09-01', periods=2000, freq='min')
+        self.frames = {}
+        for i, symbol in enumerate(['BTCUSD', 'EURUSD', 'AAPL']):
+            symbol_index = index[i * 300:].delete(slice(900, 960 + 40 * i))  # different sessions and gaps
+            df = pd.DataFrame({'close': 100 + np.cumsum(rng.normal(0, 0.1, len(symbol_index))),
+                               'RSI_14': rng.uniform(0, 100, len(symbol_index)),
+                               'SMA_10': 1.0}, index=symbol_index)
+            self.source.store_data(symbol, df)
+            self.frames[symbol] = df
+        self.universal_frame = pd.DataFrame({'Average_Close': np.arange(len(index), dtype='float64')}, index=index)
+        self.universal.store_data('Universal_Features', self.universal_frame)
+        self.output = os.path.join(self.tmpdir.name, 'dataset')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def expected(self, start, end, tolerance):
+        inputs = {symbol: df[['close', 'RSI_14']] for symbol, df in self.frames.items()}
+        inputs['Universal_Features'] = self.universal_frame
+        timeline = None
+        for df in inputs.values():
+            in_range = df.loc[start:end].index
+            timeline = in_range if timeline is None else timeline.union(in_range)
+        parts = []
+        for symbol, df in inputs.items():
+            aligned = pd.merge_asof(pd.DataFrame(index=timeline), df, left_index=True, right_index=True,
+                                    direction='backward', tolerance=tolerance)
+            aligned.columns = pd.MultiIndex.from_product([[symbol], aligned.columns])
+            parts.append(aligned)
+        return pd.concat(parts, axis=1)
+
+    def test_point_in_time_alignment_across_shards(self):
+        builder = DatasetBuilder(self.source, self.universal, memory_limit_mb=0.005, dtype='float64')
+        start, end = pd.Timestamp('2024-09-01 02:00'), pd.Timestamp('2024-09-02 09:00')
+        tolerance = pd.Timedelta(minutes=30)
+        stats = builder.build(self.output, ['BTCUSD', 'EURUSD', 'AAPL'], ['close', 'RSI_14'], start, end,
+                              universal_columns=['Average_Close'], tolerance=tolerance)
+        self.assertGreater(stats['shards'], 3)
+
+        dataset = Dataset(self.output)
+        self.assertEqual(len(dataset), stats['rows'])
+        self.assertEqual(dataset.columns[:2], [('BTCUSD', 'close'), ('BTCUSD', 'RSI_14')])
+        self.assertEqual(dataset.positions(column='close'), [0, 2, 4])
+        timestamps, values = dataset.shard(0)
+        self.assertIsInstance(values, np.memmap)
+        result = pd.concat([dataset.frame(i) for i in range(len(dataset.shards))])
+        pd.testing.assert_frame_equal(result, self.expected(start, end, tolerance), check_freq=False, check_names=False)
+
+    def test_existing_dataset_is_kept_unless_overwritten(self):
+        builder = DatasetBuilder(self.source, dtype='float32')
+        args = (self.output, ['EURUSD'], ['close'], pd.Timestamp('2024-09-01 05:00'), pd.Timestamp('2024-09-01 06:00'))
+        builder.build(*args)
+        with self.assertRaises(FileExistsError):
+            builder.build(*args)
+        builder.build(*args, overwrite=True)
+        dataset = Dataset(self.output)
+        self.assertEqual(dataset.frame(0).dtypes.unique().tolist(), [np.dtype('float32')])
+        self.assertEqual(len(dataset), 61)
+
+if __name__ == '__main__':
+    unittest.main()
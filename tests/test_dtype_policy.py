@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.dtype_policy import DtypePolicy
+from ETL.feature_engineer import CALENDAR_COLUMNS, compute_calendar_features, load_feature_config
+
+def make_frame():
+    index = pd.date_range(start='2024-09-01', periods=120, freq='min')
+    close = 1.1 + np.cumsum(np.random.default_rng(0).normal(0, 1e-4, len(index)))
+    df = pd.DataFrame({
+        'open': close,
+        'high': close + 1e-4,
+        'low': close - 1e-4,
+        'close': close,
+        'volume': np.arange(len(index), dtype='uint64'),
+        'SMA_10': pd.Series(close).rolling(10).mean().values,
+        'RSI_14': np.linspace(0, 100, len(index)),
+    }, index=index)
+    return df.join(compute_calendar_features(index))
+
+class TestDtypePolicy(unittest.TestCase):
+    def setUp(self):
+        self.df = make_frame()
+
+    def test_apply_downcasts_indicators_and_calendar(self):
+        policy = DtypePolicy()
+        compact = policy.apply(self.df)
+        self.assertEqual(compact['SMA_10'].dtype, np.float32)
+        self.assertEqual(compact['RSI_14'].dtype, np.float32)
+        self.assertEqual(compact['close'].dtype, np.float64)
+        self.assertEqual(compact['volume'].dtype, np.uint64)
+        for column in CALENDAR_COLUMNS:
+            self.assertEqual(compact[column].dtype, np.int8)
+        self.assertLess(compact.memory_usage().sum(), self.df.memory_usage().sum())
+        np.testing.assert_allclose(compact['SMA_10'], self.df['SMA_10'], rtol=2 ** -24)
+
+    def test_drop_and_restore_derivable_columns(self):
+        policy = DtypePolicy(persist_derivable=False)
+        compact = policy.apply(self.df)
+        for column in CALENDAR_COLUMNS:
+            self.assertNotIn(column, compact.columns)
+        restored = policy.restore(compact)
+        for column in CALENDAR_COLUMNS:
+            np.testing.assert_array_equal(restored[column].values, self.df[column].values)
+
+    def test_from_config_ignores_description(self):
+        policy = DtypePolicy.from_config({'float_dtype': 'float64', 'description': 'test'})
+        self.assertEqual(policy.apply(self.df)['SMA_10'].dtype, np.float64)
+
+    def test_configured_policy_persists_calendar_columns(self):
+        self.assertTrue(DtypePolicy.from_config(load_feature_config().get('dtype_policy')).persist_derivable)
+
+class TestStoredDtypePolicy(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.uri = f"lmdb://{self.tmpdir.name}"
+        self.policy = DtypePolicy(persist_derivable=False)
+        self.store = DataStore(library_name='symbol_specific', uri=self.uri, dtype_policy=self.policy)
+        self.df = make_frame()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_appends_keep_the_stored_schema(self):
+        # A symbol stored before the policy, with float64 indicators and int64 calendar columns
+        self.store.store_data('EURUSD', self.df.iloc[:60])
+        stored_dtypes = self.store.stored_dtypes('EURUSD')
+        rows = self.policy.apply(self.df.iloc[60:], stored_dtypes)
+        pd.testing.assert_series_equal(rows.dtypes, stored_dtypes)
+        self.store.store_data('EURUSD', rows)
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), self.df, check_freq=False)
+        self.assertIsNone(self.store.stored_dtypes('GBPUSD'))
+
+    def test_appends_with_new_columns_are_refused(self):
+        self.store.store_data('EURUSD', self.policy.apply(self.df.iloc[:60]))
+        stored_dtypes = self.store.stored_dtypes('EURUSD')
+        rows = self.df.iloc[60:].assign(EMA_20=1.0)  # a feature enabled since the symbol was written
+        with self.assertRaisesRegex(ValueError, r'new: EMA_20; missing: none'):
+            self.policy.apply(rows, stored_dtypes)
+        with self.assertRaisesRegex(ValueError, r'missing: RSI_14'):
+            self.policy.apply(self.df.iloc[60:].drop(columns='RSI_14'), stored_dtypes)
+
+    def test_reads_restore_calendar_columns(self):
+        self.store.store_data('EURUSD', self.policy.apply(self.df))
+        self.assertNotIn('hour', self.store.lib.read('EURUSD').data.columns)
+        data = self.store.retrieve_data('EURUSD')
+        for column in CALENDAR_COLUMNS:
+            np.testing.assert_array_equal(data[column].values, self.df[column].values)
+        self.assertIn('minute', self.store.retrieve_tail('EURUSD', 5).columns)
+        batch = self.store.retrieve_batch(['EURUSD'], ['close', 'hour'])
+        self.assertEqual(list(batch['EURUSD'].columns), ['close', 'hour'])
+        # A store without the policy reads the columns as stored
+        self.assertNotIn('hour', DataStore(library_name='symbol_specific', uri=self.uri).retrieve_data('EURUSD').columns)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import pandas as pd
+from ETL.instrumentation import MetricsRegistry, frame_bytes
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_stage_records_measurements(self):
+        df = pd.DataFrame({'close': range(100)}, index=pd.date_range('2024-09-01', periods=100, freq='min'))
+        with self.registry.stage('fetch', symbol='EURUSD') as metrics:
+            metrics.update(rows=len(df), bytes=frame_bytes(df))
+        with self.registry.stage('fetch', symbol='GBPUSD', rows=10):
+            pass
+        record = self.registry.records[0]
+        self.assertEqual(record['rows'], 100)
+        self.assertEqual(record['bytes'], frame_bytes(df))
+        self.assertGreaterEqual(record['wall_s'], 0)
+        self.assertGreaterEqual(record['cpu_s'], 0)
+        summary = self.registry.summary()
+        self.assertEqual(summary['fetch']['count'], 2)
+        self.assertEqual(summary['fetch']['rows'], 110)
+
+    def test_cpu_time_of_the_stage_thread(self):
+        # A stage waiting in one thread is not charged the CPU another thread burns meanwhile
+        started = threading.Event()
+        def wait():
+            with self.registry.stage('store', symbol='EURUSD'):
+                started.set()
+                time.sleep(0.3)
+        thread = threading.Thread(target=wait)
+        thread.start()
+        started.wait()
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+        thread.join()
+        record = self.registry.records[0]
+        self.assertLess(record['cpu_s'], 0.1)
+        self.assertIn('process_peak_rss_bytes', record)
+
+    def test_stage_recorded_on_exception(self):
+        with self.assertRaises(ValueError):
+            with self.registry.stage('store', symbol='EURUSD'):
+                raise ValueError("boom")
+        self.assertEqual(len(self.registry.records), 1)
+
+    def test_pop_symbol_and_extend(self):
+        timed_compute = self.registry.timed('compute')(lambda symbol: symbol.lower())
+        timed_compute(symbol='EURUSD')
+        timed_compute(symbol='GBPUSD')
+        popped = self.registry.pop_symbol('EURUSD')
+        self.assertEqual([r['symbol'] for r in popped], ['EURUSD'])
+        self.assertEqual([r['symbol'] for r in self.registry.records], ['GBPUSD'])
+        parent = MetricsRegistry()
+        parent.extend(popped)
+        self.assertEqual(parent.summary()['compute']['count'], 1)
+
+    def test_exports(self):
+        with self.registry.stage('feature:SMA', symbol='EURUSD', rows=5):
+            pass
+        text = self.registry.to_prometheus()
+        self.assertIn('# TYPE etl_stage_wall_seconds counter', text)
+        self.assertIn('etl_stage_rows{stage="feature:SMA",symbol="EURUSD"} 5', text)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'run_1.json')
+            self.registry.write_report(path, extra={'run_id': 1})
+            with open(path) as f:
+                report = json.load(f)
+            self.assertEqual(report['run_id'], 1)
+            self.assertIn('feature:SMA', report['summary'])
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'run_1.prom')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.base_feature import BaseFeature, ewm_warmup
+from ETL.features.symbol_specific.price_transformations import LogReturns, PctChange, ZScore
+
+class EWMClose(BaseFeature):
+    def __init__(self, length: int = 30):
+        super().__init__(f"EWM_Close_{length}")
+        self.length = length
+
+    @property
+    def lookback(self) -> int:
+        return ewm_warmup(2 / (self.length + 1))
+
+    def compute(self, df: pd.DataFrame) -> pd.Series:
+        return df['close'].ewm(span=self.length, adjust=False).mean()
+
+class TruncatedEWMClose(EWMClose):
+    @property
+    def lookback(self) -> int:
+        return 5
+
+class CumulativeVolume(BaseFeature):
+    cumulative = True
+
+    def __init__(self):
+        super().__init__("Cumulative_Volume")
+
+    @property
+    def lookback(self) -> int:
+        return 0
+
+    def compute(self, df: pd.DataFrame) -> pd.Series:
+        return df['tick_volume'].cumsum().astype(float)
+
+class TestLookback(unittest.TestCase):
+    def setUp(self):
+        self.engineer = FeatureEngineer({}, {})
+        rng = np.random.default_rng(1)
+        index = pd.date_range(start='2024-09-01', periods=3000, freq='min')
+        close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+        self.df = pd.DataFrame({
+            'open': close, 'high': close + 0.05, 'low': close - 0.05, 'close': close,
+            'tick_volume': rng.integers(1, 100, len(index)),
+        }, index=index)
+        self.cutoff = index[2500]
+
+    def test_lookback_derived_from_parameters(self):
+        self.assertEqual(self.engineer.required_lookback([ZScore]), 49)  # configured windows [20, 50]
+        self.assertEqual(ZScore(window=50).lookback, 49)
+        self.assertEqual(PctChange(periods=10).lookback, 10)
+        self.assertGreater(EWMClose(length=30).lookback, 30)
+        self.assertEqual(self.engineer.required_lookback([EWMClose, LogReturns]), EWMClose().lookback)
+
+    def test_incremental_matches_full_recompute(self):
+        mismatches = self.engineer.validate_incremental(
+            self.df, [LogReturns, PctChange, ZScore, EWMClose, CumulativeVolume], self.cutoff)
+        self.assertEqual(mismatches, {})
+
+    def test_validator_detects_short_lookback(self):
+        mismatches = self.engineer.validate_incremental(self.df, [TruncatedEWMClose], self.cutoff)
+        self.assertIn('EWM_Close_30', mismatches)
+
+if __name__ == '__main__':
+    unittest.main()
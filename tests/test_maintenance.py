@@ -0,0 +1,106 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from arcticdb_ext import get_config_int
+from ETL.data_store import DataStore
+from ETL.maintenance import SEGMENT_COUNT_CONFIG, StoreMaintenance
+from ETL.price_codec import CODEC_KEY
+from ETL.run_journal import RunJournal
+
+def make_bars(periods):
+    index = pd.date_range('2024-09-01', periods=periods, freq='min')
+    return pd.DataFrame({'close': np.round(1.1 + np.arange(periods) * 1e-5, 5), 'RSI_14': 50.0}, index=index)
+
+class TestStoreMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = DataStore(library_name='symbol_specific', uri=f"lmdb://{os.path.join(self.tmpdir.name, 'lmdb')}")
+        self.bars = make_bars(600)
+        # Ten-minute incremental runs, one segment and one version each
+        for start in range(0, len(self.bars), 10):
+            self.store.store_data('EURUSD', self.bars.iloc[start:start + 10], price_digits=5)
+        self.store.store_data('GBPUSD', self.bars)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_fragmentation(self):
+        maintenance = StoreMaintenance(self.store)
+        stats = maintenance.fragmentation('EURUSD')
+        self.assertEqual((stats['rows'], stats['segments'], stats['versions'], stats['fragmented']), (600, 60, 60, True))
+        self.assertEqual(stats['rows_per_segment'], 10)
+        self.assertEqual(StoreMaintenance(self.store, segment_size=100).fragmentation('EURUSD')['segments'], 60)
+        self.assertFalse(maintenance.fragmentation('GBPUSD')['fragmented'])
+        self.assertFalse(StoreMaintenance(self.store, min_segments=1000).fragmentation('EURUSD')['fragmented'])
+        # The process-wide threshold is restored after every check
+        self.assertIsNone(get_config_int(SEGMENT_COUNT_CONFIG))
+
+    def test_compaction_keeps_data_and_metadata(self):
+        report = {entry['symbol']: entry for entry in StoreMaintenance(self.store).run(timings=True)}
+        eurusd = report['EURUSD']
+        self.assertTrue(eurusd['compacted'])
+        self.assertFalse(eurusd['after']['fragmented'])
+        self.assertEqual((eurusd['after']['segments'], eurusd['after']['rows_per_segment']), (1, 600))
+        self.assertEqual(eurusd['after']['versions'], 1)
+        self.assertGreater(eurusd['read_s_before'], 0)
+        self.assertFalse(report['GBPUSD']['compacted'])
+        self.assertIsNone(get_config_int(SEGMENT_COUNT_CONFIG))
+
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), self.bars, check_freq=False)
+        self.assertEqual(self.store.get_watermark('EURUSD'), self.bars.index[-1])
+        self.assertIn(CODEC_KEY, self.store.lib.read_metadata('EURUSD').metadata)
+        # Later incremental runs keep appending to the compacted symbol
+        more = make_bars(610).iloc[600:]
+        self.store.store_data('EURUSD', more, price_digits=5)
+        self.assertEqual(self.store.retrieve_data('EURUSD').index[-1], more.index[-1])
+
+    def test_journal_lease(self):
+        journal = RunJournal(os.path.join(self.tmpdir.name, 'journal.sqlite'))
+        self.addCleanup(journal.close)
+        maintenance = StoreMaintenance(self.store, journal=journal)
+        run_id, _, _ = journal.begin_run(datetime.datetime(2024, 9, 2))
+        with self.assertRaisesRegex(RuntimeError, 'unfinished'):
+            maintenance.run(timings=False)
+        journal.finish_run(run_id)
+
+        original = maintenance.maintain_symbol
+        def maintain_symbol(symbol, timings):
+            # ETL runs cannot start while the lease is held
+            with self.assertRaisesRegex(RuntimeError, 'maintenance'):
+                journal.begin_run(datetime.datetime(2024, 9, 3))
+            return original(symbol, timings)
+        with mock.patch.object(maintenance, 'maintain_symbol', maintain_symbol):
+            maintenance.run(['EURUSD'], timings=False)
+        run_id, _, resumed = journal.begin_run(datetime.datetime(2024, 9, 3))
+        self.assertFalse(resumed)
+        journal.finish_run(run_id)
+
+        # The lease of a maintenance that died is ignored once it expired
+        journal.begin_maintenance()
+        journal.conn.execute("UPDATE maintenance SET renewed_at = '2024-09-01 00:00:00'")
+        journal.begin_run(datetime.datetime(2024, 9, 4))
+
+    def test_version_retention(self):
+        maintenance = StoreMaintenance(self.store, min_segments=1000, keep_versions=5)
+        entry = maintenance.maintain_symbol('EURUSD', timings=False)
+        self.assertFalse(entry['compacted'])
+        self.assertEqual(entry['pruned_versions'], 55)
+        self.assertEqual(entry['after']['versions'], 5)
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), self.bars, check_freq=False)
+        with self.assertRaises(ValueError):
+            StoreMaintenance(self.store, keep_versions=0)
+
+    def test_snapshot_retention(self):
+        for day in ('2024-09-01', '2024-09-02', '2024-09-03'):
+            self.store.lib.snapshot(f"daily-{day}")
+        self.store.lib.snapshot('manual')
+        deleted = StoreMaintenance(self.store).prune_snapshots('daily-', keep=1)
+        self.assertEqual(deleted, ['daily-2024-09-01', 'daily-2024-09-02'])
+        self.assertEqual(sorted(self.store.lib.list_snapshots(load_metadata=False)), ['daily-2024-09-03', 'manual'])
+
+if __name__ == '__main__':
+    unittest.main()
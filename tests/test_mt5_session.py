@@ -0,0 +1,139 @@
+import datetime
+import threading
+import time
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+import numpy as np
+from ETL.data_fetcher import DataFetcher
+from ETL.instrumentation import registry
+from ETL.mt5_session import Mt5Session
+
+class FakeTerminal:
+    """
+    Records calls to the MetaTrader5 functions the session uses, failing `fail_calls` data calls
+    with an IPC error before the next initialize.
+    """
+    TIMEFRAME_M1 = 1
+
+    def __init__(self, fail_calls=0):
+        self.initialized = 0
+        self.fail_calls = fail_calls
+        self.alive = False
+        self.active = 0
+        self.peak_active = 0
+        self.error = (1, 'Success')
+
+    def initialize(self):
+        self.initialized += 1
+        self.alive = True
+        return True
+
+    def shutdown(self):
+        self.alive = False
+
+    def last_error(self):
+        return self.error
+
+    def terminal_info(self):
+        return SimpleNamespace(connected=True) if self.alive else None
+
+    def copy_rates_range(self, symbol, timeframe, start, end):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        time.sleep(0.005)
+        self.active -= 1
+        if self.fail_calls:
+            self.fail_calls -= 1
+            self.alive = False
+            self.error = (-10002, 'IPC recv failed')
+            return None
+        self.error = (1, 'Success')
+        times = np.array([int(datetime.datetime(2024, 9, 2).timestamp())], dtype='int64')
+        return np.array([(times[0], 1.0, 1.1, 0.9, 1.05, 10, 1, 0)],
+                        dtype=[('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+                               ('tick_volume', 'u8'), ('spread', 'i4'), ('real_volume', 'u8')])
+
+    def symbol_info(self, symbol):
+        self.error = (-1, 'Terminal: Call failed')
+        return None
+
+class TestMt5Session(unittest.TestCase):
+    def setUp(self):
+        registry.clear()
+
+    def tearDown(self):
+        registry.clear()
+
+    def make_fetcher(self, terminal):
+        session = Mt5Session()
+        session._mt5 = terminal
+        return DataFetcher(session), session
+
+    def test_initializes_once_per_process(self):
+        terminal = FakeTerminal()
+        fetcher, session = self.make_fetcher(terminal)
+        start, end = datetime.datetime(2024, 9, 2), datetime.datetime(2024, 9, 3)
+        for _ in range(5):
+            self.assertEqual(len(fetcher.fetch_data('EURUSD', start, end)), 1)
+        self.assertEqual(terminal.initialized, 1)
+        self.assertEqual(session.stats(), {'connections': 1, 'reconnects': 0})
+        self.assertTrue(session.healthy())
+        self.assertEqual(registry.summary()['mt5_connect']['count'], 1)
+
+    def test_reconnects_only_on_connection_errors(self):
+        terminal = FakeTerminal(fail_calls=1)
+        fetcher, session = self.make_fetcher(terminal)
+        df = fetcher.fetch_data('EURUSD', datetime.datetime(2024, 9, 2), datetime.datetime(2024, 9, 3))
+        self.assertEqual(len(df), 1)
+        self.assertEqual(session.stats(), {'connections': 2, 'reconnects': 1})
+        self.assertEqual([record['symbol'] for record in registry.records if record['stage'] == 'mt5_reconnect'], ['EURUSD'])
+
+        # An unknown symbol is not a connection problem
+        with self.assertRaises(ValueError):
+            fetcher.get_symbol_info('UNKNOWN')
+        self.assertEqual(session.reconnects, 1)
+
+    def test_reconnects_when_the_terminal_lost_the_server(self):
+        terminal = FakeTerminal()
+        fetcher, session = self.make_fetcher(terminal)
+        session.connect()
+        # The terminal is up but disconnected from the trade server, the call fails without an IPC error
+        terminal.terminal_info = lambda: SimpleNamespace(connected=terminal.initialized > 1)
+        with self.assertRaises(ValueError):
+            fetcher.get_symbol_info('EURUSD')
+        self.assertEqual(session.reconnects, 1)
+        self.assertTrue(session.healthy())
+
+    def test_rejects_a_non_numeric_login(self):
+        terminal = FakeTerminal()
+        _, session = self.make_fetcher(terminal)
+        with mock.patch.dict('os.environ', {'mt5_broker_login': 'your_login'}):
+            with self.assertRaisesRegex(ValueError, 'mt5_broker_login'):
+                session.connect()
+        self.assertEqual(terminal.initialized, 0)
+
+    def test_failed_login_does_not_connect(self):
+        terminal = FakeTerminal()
+        terminal.login = lambda login, password, server: False
+        _, session = self.make_fetcher(terminal)
+        with mock.patch.dict('os.environ', {'mt5_broker_login': '12345'}):
+            with self.assertRaisesRegex(RuntimeError, 'login'):
+                session.connect()
+        self.assertFalse(session.connected)
+        self.assertFalse(session.healthy())
+
+    def test_calls_are_serialized(self):
+        terminal = FakeTerminal()
+        fetcher, session = self.make_fetcher(terminal)
+        start, end = datetime.datetime(2024, 9, 2), datetime.datetime(2024, 9, 3)
+        threads = [threading.Thread(target=fetcher.fetch_data, args=('EURUSD', start, end)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(terminal.peak_active, 1)
+        self.assertEqual(terminal.initialized, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.base_feature import BaseFeature
+from ETL.features.kernels import rolling_means
+from ETL.features.symbol_specific.price_transformations import LogReturns, PctChange, ZScore
+from ETL.panel import SymbolPanel, build_panel
+
+def make_frame(rows, level, seed, start='2024-09-02'):
+    rng = np.random.default_rng(seed)
+    close = level * np.exp(np.cumsum(rng.normal(0, 1e-4, rows)))
+    return pd.DataFrame({'close': close, 'tick_volume': rng.integers(1, 100, rows)},
+                        index=pd.date_range(start, periods=rows, freq='min'))
+
+class FailingPanelFeature(BaseFeature):
+    supports_panel = True
+
+    def __init__(self):
+        super().__init__("FailingPanelFeature")
+
+    def compute(self, df):
+        return df['close'] * 2
+
+    @classmethod
+    def compute_panel(cls, panel, param_combinations):
+        raise ValueError("no panel kernel")
+
+class TestSymbolPanel(unittest.TestCase):
+    def setUp(self):
+        self.frames = {
+            'EURUSD': make_frame(300, 1.1, 1),
+            'BTCUSD': make_frame(120, 60000.0, 2, start='2024-09-02 03:00'),
+            'EMPTY': make_frame(0, 1.0, 3),
+        }
+
+    def test_columns_are_aligned_on_the_last_bar(self):
+        panel = SymbolPanel(self.frames)
+        self.assertEqual(panel.rows, 300)
+        close = panel['close']
+        self.assertEqual(list(close.columns), ['EURUSD', 'BTCUSD', 'EMPTY'])
+        self.assertEqual(close['BTCUSD'].iloc[-1], self.frames['BTCUSD']['close'].iloc[-1])
+        self.assertTrue(close['BTCUSD'].iloc[:180].isna().all())
+        self.assertTrue(close['EMPTY'].isna().all())
+
+        scattered = panel.scatter(panel.matrix('close'))
+        for symbol, df in self.frames.items():
+            np.testing.assert_array_equal(scattered[symbol], df['close'].to_numpy())
+
+    def test_rolling_means_of_a_matrix(self):
+        panel = SymbolPanel(self.frames)
+        means = rolling_means(panel.matrix('close'), [5, 150])
+        self.assertEqual(means.shape, (300, 3, 2))
+        for j, symbol in enumerate(panel.symbols):
+            for k, length in enumerate([5, 150]):
+                expected = panel['close'][symbol].rolling(length).mean().to_numpy()
+                np.testing.assert_allclose(means[:, j, k], expected, rtol=1e-12, equal_nan=True)
+
+    def test_panel_matches_per_symbol_features(self):
+        feature_classes = [LogReturns, PctChange, ZScore, FailingPanelFeature]
+        engineer = FeatureEngineer({}, {})
+        self.frames.pop('EMPTY')  # symbols without new bars never reach the features
+        expected = {symbol: engineer.apply_symbol_features(df.copy(), feature_classes)
+                    for symbol, df in self.frames.items()}
+        frames = engineer.apply_symbol_features_panel({s: df.copy() for s, df in self.frames.items()}, feature_classes)
+        for symbol, df in frames.items():
+            self.assertEqual(list(df.columns), list(expected[symbol].columns))
+            self.assertIn('FailingPanelFeature', df.columns)
+            pd.testing.assert_frame_equal(df, expected[symbol], rtol=1e-10)
+
+class TestBuildPanel(unittest.TestCase):
+    def test_build_panel(self):
+        index = pd.date_range('2024-09-01', periods=4, freq='min')
+        frames = {
+            'EURUSD': pd.DataFrame({'close': [1.0, 2.0, 3.0, 4.0], 'tick_volume': [1, 2, 3, 4]}, index=index),
+            'GBPUSD': pd.DataFrame({'close': [5.0, 6.0, 7.0], 'tick_volume': [5, 6, 7]}, index=index[1:]),
+        }
+        panel = build_panel(frames, ['close', 'tick_volume'])
+        self.assertEqual(list(panel.index), list(index[1:]))
+        self.assertEqual(panel[('close', 'EURUSD')].tolist(), [2.0, 3.0, 4.0])
+        self.assertEqual(panel[('tick_volume', 'GBPUSD')].tolist(), [5.0, 6.0, 7.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import pytest
+from ETL.data_store import DataStore
+from ETL.parquet_export import ParquetExporter
+
+def make_frame(start, periods):
+    index = pd.date_range(start, periods=periods, freq='min')
+    return pd.DataFrame({'close': np.linspace(1.0, 2.0, periods), 'RSI_14': 50.0}, index=index)
+
+class TestParquetExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = DataStore(library_name='symbol_specific', uri=f"lmdb://{os.path.join(self.tmpdir.name, 'lmdb')}")
+        self.root = os.path.join(self.tmpdir.name, 'parquet')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_partitions(self):
+        exporter = ParquetExporter(self.store, self.root, partition='month')
+        index = pd.DatetimeIndex(['2024-09-30 23:59', '2024-10-01 00:00'])
+        self.assertEqual(list(exporter.partition_start(index)), [pd.Timestamp('2024-09-01'), pd.Timestamp('2024-10-01')])
+        self.assertTrue(exporter.partition_path('EURUSD', pd.Timestamp('2024-09-01')).endswith(
+            os.path.join('symbol_specific', 'symbol=EURUSD', 'month=2024-09', 'part.parquet')))
+        day = ParquetExporter(self.store, self.root)
+        self.assertEqual(day.partition_start(pd.Timestamp('2024-09-02 13:45')), pd.Timestamp('2024-09-02'))
+        with self.assertRaises(ValueError):
+            ParquetExporter(self.store, self.root, partition='week')
+
+    def test_delete_range_keeps_the_watermark(self):
+        self.store.store_data('EURUSD', make_frame('2024-09-01', 3000))
+        self.store.delete_range('EURUSD', (None, pd.Timestamp('2024-09-02') - pd.Timedelta(1, 'ns')))
+        data = self.store.retrieve_data('EURUSD')
+        self.assertEqual(data.index[0], pd.Timestamp('2024-09-02'))
+        self.assertEqual(self.store.get_watermark('EURUSD'), make_frame('2024-09-01', 3000).index[-1])
+
+    def test_incremental_export_and_archive(self):
+        pytest.importorskip('pyarrow')
+        full = make_frame('2024-09-01', 4000)
+        self.store.store_data('EURUSD', full.iloc[:2000])
+        exporter = ParquetExporter(self.store, self.root)
+        self.assertEqual(exporter.export(['EURUSD', 'MISSING']), {'EURUSD': 2})
+
+        # Only the last (partial) partition and the new ones are written again
+        self.store.store_data('EURUSD', full.iloc[2000:])
+        exporter = ParquetExporter(self.store, self.root)
+        self.assertEqual(exporter.export(['EURUSD']), {'EURUSD': 2})
+        exported = pd.concat(pd.read_parquet(exporter.partition_path('EURUSD', day))
+                             for day in pd.date_range('2024-09-01', '2024-09-03'))
+        pd.testing.assert_frame_equal(exported, full, check_freq=False)
+
+        archived = exporter.archive(['EURUSD'], pd.Timestamp('2024-09-02 12:00'))
+        self.assertEqual(archived, {'EURUSD': '2024-09-02 00:00:00'})
+        self.assertEqual(self.store.retrieve_data('EURUSD').index[0], pd.Timestamp('2024-09-02'))
+        self.assertEqual(exporter.archive(['EURUSD'], pd.Timestamp('2024-09-02 12:00')), {})
+
+    def test_archive_keeps_the_resume_partition(self):
+        pytest.importorskip('pyarrow')
+        full = make_frame('2024-09-01', 4000)
+        self.store.store_data('EURUSD', full.iloc[:2000])
+        exporter = ParquetExporter(self.store, self.root)
+        # A cutoff after the watermark stops at the partition of the last exported row
+        archived = exporter.archive(['EURUSD'], pd.Timestamp('2024-09-10'))
+        self.assertEqual(archived, {'EURUSD': '2024-09-02 00:00:00'})
+        self.assertEqual(self.store.retrieve_data('EURUSD').index[0], pd.Timestamp('2024-09-02'))
+
+        self.store.store_data('EURUSD', full.iloc[2000:])
+        exporter.export(['EURUSD'])
+        day = pd.read_parquet(exporter.partition_path('EURUSD', pd.Timestamp('2024-09-02')))
+        pd.testing.assert_frame_equal(day, full.loc['2024-09-02'], check_freq=False)
+
+if __name__ == '__main__':
+    unittest.main()
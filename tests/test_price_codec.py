@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.dtype_policy import DtypePolicy
+from ETL.price_codec import CODEC_KEY, PriceCodec
+
+def make_bars(start, periods, digits=5, base=1.1):
+    index = pd.date_range(start, periods=periods, freq='min')
+    points = np.round(base * 10 ** digits) + np.cumsum(np.random.default_rng(0).integers(-20, 21, periods))
+    scale = 10 ** digits  # prices as MetaTrader5 returns them: the nearest float to a count of points
+    return pd.DataFrame({
+        'open': points / scale,
+        'high': (points + 3) / scale,
+        'low': (points - 2) / scale,
+        'close': points / scale,
+        'tick_volume': np.arange(periods, dtype='uint64'),
+        'RSI_14': np.linspace(0, 100, periods).astype('float32'),
+    }, index=index)
+
+class TestPriceCodec(unittest.TestCase):
+    def test_round_trip_is_exact(self):
+        for digits, base in [(5, 1.1), (3, 151.234), (2, 61234.56), (0, 18000)]:
+            bars = make_bars('2024-09-01', 500, digits, base)
+            codec = PriceCodec(digits)
+            encoded = codec.encode(bars)
+            self.assertEqual(codec.columns, ['open', 'high', 'low', 'close'])
+            self.assertEqual(encoded['close'].dtype, np.int32)
+            self.assertEqual(encoded['RSI_14'].dtype, np.float32)
+            decoded = PriceCodec.from_metadata(codec.to_metadata()).decode(encoded.copy())
+            pd.testing.assert_frame_equal(decoded, bars)
+
+    def test_off_grid_columns_stay_float(self):
+        bars = make_bars('2024-09-01', 100)
+        bars['high'] += 1e-7
+        bars.loc[bars.index[5], 'low'] = np.nan
+        codec = PriceCodec(5)
+        encoded = codec.encode(bars)
+        self.assertEqual(codec.columns, ['open', 'close'])
+        self.assertEqual(encoded['high'].dtype, np.float64)
+        with self.assertRaises(ValueError):
+            codec.encode(bars.assign(close=bars['close'] + 1e-7))
+
+    def test_dtype_is_kept_once_settled(self):
+        codec = PriceCodec(2)
+        codec.encode(make_bars('2024-09-01', 10, 2, 50000))
+        self.assertEqual(codec.dtype, np.int32)
+        with self.assertRaises(ValueError):
+            codec.encode(make_bars('2024-09-01', 10, 2, 3e7))
+        self.assertEqual(PriceCodec(2).encode(make_bars('2024-09-01', 10, 2, 3e7))['close'].dtype, np.int64)
+
+    def test_policy_option(self):
+        self.assertFalse(DtypePolicy().fixed_point_prices)
+        self.assertTrue(DtypePolicy.from_config({'fixed_point_prices': True}).fixed_point_prices)
+
+class TestDataStorePriceCodec(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = DataStore(library_name='symbol_specific', uri=f"lmdb://{os.path.join(self.tmpdir.name, 'lmdb')}")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_store_and_retrieve(self):
+        bars = make_bars('2024-09-01', 2000)
+        self.store.store_data('EURUSD', bars.iloc[:1500], price_digits=5)
+        self.store.store_data('EURUSD', bars.iloc[1500:], price_digits=5)
+        stored = self.store.lib.read('EURUSD')
+        self.assertEqual(stored.data['close'].dtype, np.int32)
+        self.assertEqual(stored.metadata[CODEC_KEY]['digits'], 5)
+        self.assertEqual(self.store.get_watermark('EURUSD'), bars.index[-1])
+
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), bars, check_freq=False)
+        pd.testing.assert_frame_equal(self.store.retrieve_tail('EURUSD', 3), bars.tail(3), check_freq=False)
+        window = (bars.index[10], bars.index[19])
+        batch = self.store.retrieve_batch(['EURUSD'], ['close'], window)
+        pd.testing.assert_frame_equal(batch['EURUSD'], bars.loc[window[0]:window[1], ['close']],
+                                      check_freq=False)
+
+    def test_updates_keep_the_stored_encoding(self):
+        bars = make_bars('2024-09-01', 200)
+        self.store.store_data('EURUSD', bars.iloc[:100])
+        # A float symbol is only encoded when written from scratch
+        self.store.store_data('EURUSD', bars.iloc[100:150], price_digits=5)
+        self.assertEqual(self.store.lib.read('EURUSD').data['close'].dtype, np.float64)
+        self.store.store_data('EURUSD', bars.iloc[:150], replace=True, price_digits=5)
+        self.store.store_data('EURUSD', bars.iloc[150:], price_digits=5)
+        self.assertEqual(self.store.lib.read('EURUSD').data['close'].dtype, np.int32)
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), bars, check_freq=False)
+
+    def test_appends_without_digits_keep_the_encoding(self):
+        # e.g. fixed_point_prices turned off, or no digits known for the symbol
+        bars = make_bars('2024-09-01', 200)
+        self.store.store_data('EURUSD', bars.iloc[:100], price_digits=5)
+        self.store.store_data('EURUSD', bars.iloc[100:])
+        stored = self.store.lib.read('EURUSD')
+        self.assertEqual(stored.data['close'].dtype, np.int32)
+        self.assertEqual(stored.metadata[CODEC_KEY]['digits'], 5)
+        pd.testing.assert_frame_equal(self.store.retrieve_data('EURUSD'), bars, check_freq=False)
+
+if __name__ == '__main__':
+    unittest.main()
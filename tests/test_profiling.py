@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.symbol_specific.price_transformations import PctChange, ZScore
+from ETL.profiling import FeatureProfiler, merge_profile_reports, profiling_enabled
+
+class TestFeatureProfiler(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range(start='2024-09-01', periods=5000, freq='min')
+        close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, len(index)))
+        self.df = pd.DataFrame({'close': close, 'tick_volume': 1}, index=index)
+        self.engineer = FeatureEngineer({}, {})
+
+    def test_profiles_every_feature_instance(self):
+        profiler = FeatureProfiler()
+        self.engineer.apply_symbol_features(self.df, [PctChange, ZScore], profiler=profiler)
+        report = profiler.report('EURUSD')
+        names = [entry['feature'] for entry in report['features']]
+        self.assertEqual(sorted(names), ['Pct_Change_1', 'Pct_Change_10', 'Pct_Change_5', 'Z_Score_20', 'Z_Score_50'])
+        walls = [entry['wall_s'] for entry in report['features']]
+        self.assertEqual(walls, sorted(walls, reverse=True))
+        self.assertTrue(report['features'][0]['top_functions'])
+        self.assertGreater(max(entry['peak_alloc_bytes'] for entry in report['features']), 0)
+
+    def test_merge_reports(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for symbol in ['EURUSD', 'GBPUSD']:
+                profiler = FeatureProfiler()
+                self.engineer.apply_symbol_features(self.df.copy(), [ZScore], profiler=profiler)
+                profiler.write_report(os.path.join(tmpdir, f"{symbol}.json"), symbol=symbol)
+            summary = merge_profile_reports(tmpdir)
+            self.assertEqual({entry['feature'] for entry in summary['features']}, {'Z_Score_20', 'Z_Score_50'})
+            self.assertEqual(summary['features'][0]['symbols'], 2)
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'summary.json')))
+
+    def test_enabled_by_env_var(self):
+        with patch.dict(os.environ, {'ETL_PROFILE': '1'}):
+            self.assertTrue(profiling_enabled())
+        with patch.dict(os.environ, {'ETL_PROFILE': ''}):
+            self.assertFalse(profiling_enabled())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import importlib.util
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features import recursions
+
+def make_ohlcv(rows=3000, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-4, rows)))
+    spread = np.abs(rng.normal(0, 5e-5, rows))
+    df = pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread, 'close': close,
+                       'tick_volume': rng.integers(1, 500, rows).astype('float64')},
+                      index=pd.date_range('2024-09-02', periods=rows, freq='min'))
+    df.iloc[[50, 51, 1700], df.columns.get_loc('close')] = np.nan
+    df.iloc[200, df.columns.get_loc('high')] = df['low'].iloc[200]  # a zero range bar
+    return df
+
+class TestRecursions(unittest.TestCase):
+    def test_ewm_mean_matches_pandas(self):
+        values = make_ohlcv()['close']
+        for alpha, adjust, min_periods in [(0.1, True, 14), (2 / 11, False, 0), (0.5, True, 0)]:
+            expected = values.ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean().to_numpy()
+            result = recursions.ewm_mean(values.to_numpy(), alpha, adjust, min_periods)
+            np.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+        self.assertEqual(len(recursions.ewm_mean(np.array([]), 0.5, True, 0)), 0)
+
+    def test_indicators_match_their_pandas_definitions(self):
+        df = make_ohlcv()
+        close = df['close']
+
+        seeded = close.copy()
+        seeded.iloc[:9] = np.nan
+        seeded.iloc[9] = close.iloc[:10].mean()
+        np.testing.assert_allclose(recursions.ema(close.to_numpy(), 10),
+                                   seeded.ewm(span=10, adjust=False).mean(), rtol=1e-12, equal_nan=True)
+
+        change = close.diff()
+        gains, losses = change.clip(lower=0), change.clip(upper=0)
+        rma = lambda x: x.ewm(alpha=1 / 14, min_periods=14).mean()
+        np.testing.assert_allclose(recursions.rsi(close.to_numpy(), 14),
+                                   100 * rma(gains) / (rma(gains) + rma(losses).abs()), rtol=1e-10, equal_nan=True)
+
+        previous_close = close.shift()
+        high_low = df['high'] - df['low'] + np.finfo(float).eps
+        true_range = pd.concat([high_low, df['high'] - previous_close, previous_close - df['low']], axis=1).abs().max(axis=1)
+        true_range.iloc[0] = np.nan
+        np.testing.assert_allclose(recursions.atr(df['high'], df['low'], close, 14), rma(true_range),
+                                   rtol=1e-10, equal_nan=True)
+
+        volume = df['tick_volume']
+        sign = np.sign(close.diff())
+        sign.iloc[0] = 1
+        np.testing.assert_allclose(recursions.obv(close, volume), (sign * volume).cumsum(), rtol=1e-12, equal_nan=True)
+
+    def test_macd_columns(self):
+        close = make_ohlcv()['close'].to_numpy()
+        columns = recursions.macd(close, 26, 12, 9)
+        self.assertEqual(list(columns), ['MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9'])
+        line = columns['MACD_12_26_9']
+        first = np.flatnonzero(~np.isnan(line))[0]
+        self.assertEqual(first, 25)
+        np.testing.assert_allclose(columns['MACDs_12_26_9'][first:], recursions.ema(line[first:], 9), equal_nan=True)
+        np.testing.assert_allclose(columns['MACDh_12_26_9'], line - columns['MACDs_12_26_9'], equal_nan=True)
+
+    def test_backend_from_config(self):
+        engineer = FeatureEngineer({}, {})
+        engineer.feature_config['symbol_specific']['Test'] = {
+            'Window': {'length': [3], 'backend': 'jit', 'description': ''}
+        }
+
+        class Window:
+            backend = recursions.PANDAS_TA
+
+            def __init__(self, length):
+                self.length = length
+
+        instances = engineer.build_feature_instances([Window])
+        self.assertEqual([(i.length, i.backend) for i in instances], [(3, 'jit')])
+        self.assertEqual(engineer.jit_features([Window]), ['Window'])
+        with self.assertRaises(ValueError):
+            recursions.check_backend('fortran', 'Window')
+
+    @unittest.skipUnless(importlib.util.find_spec('pandas_ta'), "pandas_ta is not installed")
+    def test_jit_backend_matches_pandas_ta(self):
+        df = make_ohlcv()
+        for module, feature, params in [
+            ('moving_averages', 'EMA', {'length': 20}),
+            ('momentum_indicators', 'RSI', {'length': 14}),
+            ('momentum_indicators', 'MACD', {'fast': 12, 'slow': 26, 'signal': 9}),
+            ('volatility_indicators', 'ATR', {'length': 14}),
+            ('volume_indicators', 'OBV', {}),
+        ]:
+            with self.subTest(feature=feature):
+                feature_cls = getattr(importlib.import_module(f"ETL.features.symbol_specific.{module}"), feature)
+                reference = feature_cls(**params).compute(df)
+                instance = feature_cls(**params)
+                instance.backend = recursions.JIT
+                result = instance.compute(df)
+                if isinstance(reference, pd.DataFrame):
+                    self.assertEqual(list(result.columns), list(reference.columns))
+                np.testing.assert_allclose(result, reference, rtol=1e-9, equal_nan=True)
+
+if __name__ == '__main__':
+    unittest.main()
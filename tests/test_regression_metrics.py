@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.base_feature import BaseFeature
+from ETL.features.kernels import rolling_regression
+from ETL.features.universal.regression_metrics import RollingRegression
+from ETL.panel import build_panel
+from ETL.universal_stream import UniversalFeatureStream
+
+class MeanReturn(BaseFeature):
+    # A rowwise feature computed along with the regressions
+    input_columns = ['Log_Returns']
+    rowwise = True
+
+    def __init__(self):
+        super().__init__("Mean_Return")
+
+    def compute(self, df):
+        return df['Log_Returns'].mean(axis=1)
+
+def make_returns(periods, symbols, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 1e-3, periods)
+    index = pd.date_range('2024-09-02', periods=periods, freq='min')
+    # The first symbol is the market, the others load 0.5, 1.0, ... on it
+    return {symbol: pd.DataFrame({'Log_Returns': market if i == 0 else 0.5 * i * market + rng.normal(0, 1e-3, periods)},
+                                 index=index)
+            for i, symbol in enumerate(symbols)}
+
+class TestRollingRegression(unittest.TestCase):
+    def test_matches_pandas_rolling_moments(self):
+        rng = np.random.default_rng(1)
+        x = pd.Series(rng.normal(0, 1e-3, 2000))
+        y = pd.DataFrame({'a': 1.5 * x + rng.normal(0, 1e-3, 2000), 'b': rng.normal(0, 1e-3, 2000)})
+        beta, alpha, r2 = rolling_regression(x.to_numpy(), y.to_numpy(), 60)
+        for j, column in enumerate(y.columns):
+            expected_beta = y[column].rolling(60).cov(x) / x.rolling(60).var()
+            np.testing.assert_allclose(beta[:, j], expected_beta, rtol=1e-7, atol=1e-12)
+            expected_alpha = y[column].rolling(60).mean() - expected_beta * x.rolling(60).mean()
+            np.testing.assert_allclose(alpha[:, j], expected_alpha, rtol=1e-6, atol=1e-12)
+            np.testing.assert_allclose(r2[:, j], y[column].rolling(60).corr(x) ** 2, rtol=1e-7, atol=1e-12)
+        slope, intercept = np.polyfit(x[1000:1060], y['a'][1000:1060], 1)
+        self.assertAlmostEqual(beta[1059, 0], slope, places=8)
+        self.assertAlmostEqual(alpha[1059, 0], intercept, places=10)
+
+    def test_missing_values_and_min_periods(self):
+        x = np.random.default_rng(2).normal(0, 1, 100)
+        y = 2 * x[:, None] + 1
+        y[50:55] = np.nan
+        beta, alpha, r2 = rolling_regression(x, y, 20)
+        self.assertTrue(np.isnan(beta[:19]).all())
+        self.assertTrue(np.isnan(beta[50:74]).all())  # windows with missing bars
+        np.testing.assert_allclose(beta[74:, 0], 2)
+        np.testing.assert_allclose(alpha[74:, 0], 1, atol=1e-9)
+        beta, _, r2 = rolling_regression(x, y, 20, min_periods=10)
+        np.testing.assert_allclose(beta[9:, 0], 2)
+        np.testing.assert_allclose(r2[9:, 0], 1)
+
+    def test_feature_on_panel(self):
+        frames = make_returns(500, ['SP500', 'EURUSD', 'BTCUSD'])
+        panel = build_panel(frames, ['Log_Returns'], how='outer')
+        result = RollingRegression('SP500', 60).compute(panel)
+        self.assertEqual(list(result.columns), ['Beta_BTCUSD', 'Beta_EURUSD', 'Alpha_BTCUSD', 'Alpha_EURUSD',
+                                                'R2_BTCUSD', 'R2_EURUSD'])
+        self.assertEqual(RollingRegression('SP500', 60).lookback, 59)
+        self.assertAlmostEqual(result['Beta_EURUSD'].iloc[60:].mean(), 0.5, delta=0.2)
+        with self.assertRaises(ValueError):
+            RollingRegression('USDX', 60).compute(panel)
+
+    def test_configured_parameters(self):
+        engineer = FeatureEngineer({}, {})
+        engineer.feature_config['universal'] = {
+            "Regression_Metrics": {"RollingRegression": {"reference": ["SP500", "BTCUSD"], "window": [30, 60],
+                                                         "description": "test"}},
+            "Global_Metrics": ["MeanReturn"],
+        }
+        names = [f.name for f in engineer.build_feature_instances([RollingRegression, MeanReturn], 'universal')]
+        self.assertEqual(names, ['Regression_SP500_30', 'Regression_SP500_60', 'Regression_BTCUSD_30',
+                                 'Regression_BTCUSD_60', 'Mean_Return'])
+        panel = build_panel(make_returns(200, ['SP500', 'EURUSD', 'BTCUSD']), ['Log_Returns'], how='outer')
+        result = engineer.compute_universal_features(panel, [RollingRegression])
+        self.assertIn('Regression_BTCUSD_60_R2_SP500', result.columns)
+        self.assertEqual(result.shape[1], 4 * 3 * 2)
+
+class TestStreamedRegression(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        uri = f"lmdb://{self.tmpdir.name}"
+        self.source = DataStore(library_name='symbol_specific', uri=uri)
+        self.target = DataStore(library_name='universal', uri=uri)
+        self.frames = make_returns(3000, ['SP500', 'EURUSD', 'XAUUSD'])
+        self.frames['XAUUSD'] = self.frames['XAUUSD'].iloc[700:]  # listed later
+        # A weekend without any bar
+        for symbol, df in self.frames.items():
+            self.frames[symbol] = df[(df.index < '2024-09-03 02:00') | (df.index >= '2024-09-03 10:00')]
+            self.source.store_data(symbol, self.frames[symbol])
+        self.engineer = FeatureEngineer({}, {})
+        self.engineer.feature_config['universal'] = {
+            "Regression_Metrics": {"RollingRegression": {"reference": ["SP500"], "window": [120]}}}
+        self.features = [RollingRegression, MeanReturn]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_blocks_and_incremental_runs_match_full_history(self):
+        stream = UniversalFeatureStream(self.engineer, self.source, self.target, 'Universal_Features', memory_limit_mb=0.02)
+        split = pd.Timestamp('2024-09-03 10:30')
+        stream.run(self.source.list_symbols(), self.features, pd.Timestamp('2024-09-02'), split - pd.Timedelta(minutes=1))
+        stats = stream.run(self.source.list_symbols(), self.features, split, pd.Timestamp('2024-09-05'))
+        self.assertGreater(stats['blocks'], 3)
+
+        panel = build_panel(self.frames, ['Log_Returns'], how='outer')
+        expected = self.engineer.compute_universal_features(panel, self.features)
+        stored = self.target.retrieve_data('Universal_Features')
+        self.assertIn('Regression_SP500_120_Beta_XAUUSD', stored.columns)
+        pd.testing.assert_frame_equal(stored, expected[stored.columns], check_freq=False, rtol=1e-9, atol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
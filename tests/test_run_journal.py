@@ -0,0 +1,68 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from ETL.run_journal import RunJournal, FAILED
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.metadata_path = os.path.join(self.tmpdir.name, 'metadata.json')
+        self.journal = RunJournal(os.path.join(self.tmpdir.name, 'journal.sqlite'), snapshot_path=self.metadata_path)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmpdir.cleanup()
+
+    def test_resume_unfinished_run(self):
+        self.journal.add_symbol('EURUSD', {'name': 'EURUSD', 'description': 'Euro vs US Dollar', 'last_timestamp': None})
+        self.journal.add_symbol('GBPUSD', {'name': 'GBPUSD', 'description': 'Pound vs US Dollar', 'last_timestamp': None})
+        end_time = datetime.datetime(2024, 9, 2, 12, 0, 0)
+        run_id, _, resumed = self.journal.begin_run(end_time)
+        self.assertFalse(resumed)
+        self.journal.mark_stage(run_id, 'EURUSD', 'fetched', rows=10)
+        self.journal.mark_stored(run_id, 'EURUSD', '2024-09-02 11:59:00', rows=10)
+        self.journal.mark_stage(run_id, 'GBPUSD', FAILED, details={'error': 'boom'})
+
+        # Simulate a crash: a new journal instance picks the unfinished run up with its end time
+        reopened = RunJournal(self.journal.path, snapshot_path=self.metadata_path)
+        resumed_id, resumed_end, resumed = reopened.begin_run(datetime.datetime(2024, 9, 3))
+        self.assertTrue(resumed)
+        self.assertEqual(resumed_id, run_id)
+        self.assertEqual(resumed_end, end_time)
+        self.assertEqual(reopened.symbols_in_stage(run_id, 'stored'), ['EURUSD'])
+        self.assertEqual(reopened.get_last_timestamp('EURUSD'), '2024-09-02 11:59:00')
+        self.assertIsNone(reopened.get_last_timestamp('GBPUSD'))
+
+        reopened.finish_run(run_id)
+        new_id, _, resumed = reopened.begin_run(datetime.datetime(2024, 9, 3))
+        self.assertFalse(resumed)
+        self.assertNotEqual(new_id, run_id)
+        reopened.close()
+
+    def test_snapshot_and_legacy_import(self):
+        legacy = {
+            "symbols": {"EURUSD": {"name": "EURUSD", "description": "Euro", "last_timestamp": "2024-09-01 10:00:00"}},
+            "etl_runs": [{"timestamp": "2024-09-01 10:00:00", "processed_symbols": ["EURUSD"], "status": "Completed"}]
+        }
+        with open(self.metadata_path, 'w') as f:
+            json.dump(legacy, f)
+        self.journal.import_metadata(self.metadata_path)
+        self.assertEqual(self.journal.get_last_timestamp('EURUSD'), '2024-09-01 10:00:00')
+
+        self.journal.write_snapshot()
+        with open(self.metadata_path) as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot['symbols'], legacy['symbols'])
+        self.assertEqual(snapshot['etl_runs'][0]['processed_symbols'], ['EURUSD'])
+        self.assertEqual(os.listdir(self.tmpdir.name).count('metadata.json'), 1)
+
+    def test_corrupted_metadata_raises(self):
+        with open(self.metadata_path, 'w') as f:
+            f.write('{"symbols": ')
+        with self.assertRaises(ValueError):
+            self.journal.import_metadata(self.metadata_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import datetime
+import os
+import tempfile
+import unittest
+from ETL.run_journal import RunJournal
+from ETL.scheduler import CostModel, ideal_makespan, lpt_order, schedule_report, simulate_makespan, symbol_costs
+
+class TestScheduling(unittest.TestCase):
+    def test_lpt_beats_file_order(self):
+        costs = {'AAPL': 1.0, 'MSFT': 1.0, 'EURUSD': 2.0, 'GBPUSD': 2.0, 'BTCUSD': 6.0}
+        order = lpt_order(costs)
+        self.assertEqual(order[0], 'BTCUSD')
+        self.assertEqual(simulate_makespan(order, costs, 2), 6.0)
+        self.assertEqual(simulate_makespan(list(costs), costs, 2), 9.0)  # the long symbol starts last
+        self.assertEqual(ideal_makespan(costs.values(), 2), 6.0)
+
+    def test_cost_model_learns_density_and_scale(self):
+        history = [{
+            'BTCUSD': {'wall_s': 10.5, 'rows': 1000, 'minutes': 1000},
+            'AAPL': {'wall_s': 3.0, 'rows': 250, 'minutes': 1000},
+            'EURUSD': {'wall_s': 7.0, 'rows': 600, 'minutes': 600},
+        }]
+        model = CostModel(history)
+        self.assertAlmostEqual(model.rows_per_minute['AAPL'], 0.25)
+        self.assertGreater(model.estimate('BTCUSD', 60), model.estimate('AAPL', 60))
+        self.assertAlmostEqual(model.estimate('BTCUSD', 1000), 10.5, places=6)
+        # Unknown symbols use the median density of the known ones
+        self.assertGreater(model.estimate('ETHUSD', 60), 0)
+
+    def test_without_history_costs_follow_span(self):
+        model = CostModel([])
+        self.assertFalse(model.has_history)
+        self.assertGreater(model.estimate('EURUSD', 600), model.estimate('GBPUSD', 60))
+
+    def test_symbol_costs_and_report(self):
+        records = [
+            {'stage': 'fetch', 'symbol': 'EURUSD', 'rows': 100, 'span_minutes': 120.0, 'wall_s': 0.1},
+            {'stage': 'symbol_features', 'symbol': 'EURUSD', 'rows': 100, 'wall_s': 0.5},
+            {'stage': 'process_symbol', 'symbol': 'EURUSD', 'rows': None, 'wall_s': 0.8},
+        ]
+        costs = symbol_costs(records)
+        self.assertEqual(costs, {'EURUSD': {'wall_s': 0.8, 'rows': 100, 'minutes': 120.0}})
+        report = schedule_report(1.0, {'EURUSD': 0.8}, workers=2, predicted={'EURUSD': 0.4})
+        self.assertEqual(report['ideal_s'], 0.8)
+        self.assertAlmostEqual(report['efficiency'], 0.8)
+        self.assertAlmostEqual(report['estimate_error'], 0.5)
+
+    def test_costs_recorded_in_journal(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            journal = RunJournal(os.path.join(tmpdir, 'journal.sqlite'), os.path.join(tmpdir, 'metadata.json'))
+            run_id, _, _ = journal.begin_run(datetime.datetime(2024, 9, 2))
+            journal.mark_stage(run_id, 'EURUSD', 'fetched', rows=100)
+            journal.record_symbol_costs(run_id, {'EURUSD': {'wall_s': 0.8, 'rows': 100, 'minutes': 120.0}})
+            self.assertEqual(journal.get_symbol_costs(), [])  # the run is still running
+            journal.finish_run(run_id)
+            self.assertEqual(journal.get_symbol_costs(), [{'EURUSD': {'wall_s': 0.8, 'rows': 100, 'minutes': 120.0}}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import pickle
+import unittest
+import uuid
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from ETL.snapshot_cache import RingBuffer, SnapshotCache, SnapshotReader
+
+def make_rows(start, rows, columns=('close', 'SMA_10')):
+    index = pd.date_range('2024-09-02', periods=start + rows, freq='min')[start:]
+    return pd.DataFrame({column: np.arange(start, start + rows, dtype='float64') + i for i, column in enumerate(columns)},
+                        index=index)
+
+def _read_in_process(name, symbol, n):
+    with SnapshotReader(name) as reader:
+        return reader.latest(symbol, n)
+
+class TestRingBuffer(unittest.TestCase):
+    def test_keeps_the_last_rows_across_wraparound(self):
+        ring = RingBuffer.create(['close', 'SMA_10'], 5)
+        self.assertEqual(len(ring.latest(3)), 0)
+        ring.append(make_rows(0, 3))
+        ring.append(make_rows(3, 4))
+        self.assertEqual(len(ring), 5)
+        pd.testing.assert_frame_equal(ring.latest(5), make_rows(2, 5), check_freq=False)
+        pd.testing.assert_frame_equal(ring.latest(2), make_rows(5, 2), check_freq=False)
+        # A frame longer than the ring only keeps its last rows
+        ring.append(make_rows(7, 12))
+        pd.testing.assert_frame_equal(ring.latest(10), make_rows(14, 5), check_freq=False)
+
+    def test_rebuilt_history_replaces_the_rows(self):
+        ring = RingBuffer.create(['close'], 4)
+        ring.append(make_rows(0, 4, ['close']))
+        ring.append(make_rows(1, 2, ['close']))
+        pd.testing.assert_frame_equal(ring.latest(4), make_rows(1, 2, ['close']), check_freq=False)
+
+    def test_missing_columns_are_nan(self):
+        ring = RingBuffer.create(['close', 'RSI_14'], 4)
+        ring.append(make_rows(0, 2, ['close', 'extra']))
+        latest = ring.latest(2)
+        self.assertEqual(list(latest.columns), ['close', 'RSI_14'])
+        self.assertTrue(latest['RSI_14'].isna().all())
+
+class TestSnapshotCache(unittest.TestCase):
+    def test_in_process(self):
+        cache = SnapshotCache(capacity=3)
+        cache.update('EURUSD', make_rows(0, 2))
+        cache.update('EURUSD', make_rows(2, 2))
+        pd.testing.assert_frame_equal(cache.latest('EURUSD', 3), make_rows(1, 3), check_freq=False)
+        with self.assertRaises(KeyError):
+            cache.latest('BTCUSD')
+        # New columns keep the previous rows
+        cache.update('EURUSD', make_rows(4, 1, ['close', 'SMA_10', 'RSI_14']))
+        latest = cache.latest('EURUSD', 3)
+        self.assertEqual(list(latest.columns), ['close', 'SMA_10', 'RSI_14'])
+        self.assertEqual(list(latest['close']), [2.0, 3.0, 4.0])
+        self.assertEqual(pickle.loads(pickle.dumps(cache)).symbols, [])
+
+    def test_seed_from_store(self):
+        class Store:
+            def retrieve_tail(self, symbol, n):
+                return make_rows(100, n) if symbol == 'EURUSD' else pd.DataFrame()
+
+        cache = SnapshotCache(capacity=4)
+        cache.seed(Store(), ['EURUSD', 'NEW'])
+        self.assertEqual(cache.symbols, ['EURUSD'])
+        self.assertEqual(cache.latest('EURUSD').index[0], make_rows(103, 1).index[0])
+
+    def test_shared_with_other_processes(self):
+        name = f"test_snap_{uuid.uuid4().hex[:8]}"
+        with SnapshotCache(capacity=8, name=name) as cache, ProcessPoolExecutor(max_workers=1) as executor:
+            cache.update('EUR.USD', make_rows(0, 10))
+            pd.testing.assert_frame_equal(executor.submit(_read_in_process, name, 'EUR.USD', 2).result(),
+                                          make_rows(8, 2), check_freq=False)
+            with SnapshotReader(name) as reader:
+                self.assertEqual(reader.latest('EUR.USD').iloc[0]['close'], 9.0)
+                cache.update('EUR.USD', make_rows(10, 1))
+                self.assertEqual(reader.latest('EUR.USD').iloc[0]['close'], 10.0)
+                # A replaced ring is followed by the readers
+                cache.update('EUR.USD', make_rows(11, 1, ['close']))
+                self.assertEqual(list(reader.latest('EUR.USD', 2)['close']), [10.0, 11.0])
+                with self.assertRaises(KeyError):
+                    reader.latest('NOPE')
+
+    def test_reader_attaches_an_empty_ring_once(self):
+        name = f"test_snap_{uuid.uuid4().hex[:8]}"
+        with SnapshotCache(capacity=8, name=name) as cache, SnapshotReader(name) as reader:
+            cache._create('EURUSD', ['close'])  # published, no rows appended yet
+            with mock.patch.object(reader, '_attach', wraps=reader._attach) as attach:
+                self.assertTrue(reader.latest('EURUSD').empty)
+                self.assertTrue(reader.latest('EURUSD').empty)
+            self.assertEqual(attach.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
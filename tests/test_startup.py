@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+class TestLazyImports(unittest.TestCase):
+    def test_import_main_etl_skips_heavy_modules(self):
+        code = (
+            "import sys, main_etl\n"
+            "print(','.join(m for m in ('MetaTrader5', 'arcticdb', 'scipy', 'pandas_ta') if m in sys.modules))\n"
+        )
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+        self.assertEqual(output.stdout.strip(), '')
+
+    def test_only_enabled_features_are_loaded(self):
+        from ETL.feature_definitions import load_symbol_specific_features
+        config = {'symbol_specific': {'Price_Transformations': {'PctChange': {'periods': [1]}}}}
+        features = load_symbol_specific_features(config)
+        self.assertEqual([cls.__name__ for cls in features['Price_Transformations']], ['PctChange'])
+        self.assertEqual(features['Moving_Averages'], [])
+
+if __name__ == '__main__':
+    unittest.main()
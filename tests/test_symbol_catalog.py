@@ -0,0 +1,110 @@
+import json
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from ETL.run_journal import RunJournal
+from ETL.symbol_catalog import SymbolCatalog, SymbolSpec
+from data_selection.create_symbols_list import symbol_category
+
+def symbol_info(name, digits, point, contract_size, path):
+    return {'name': name, 'description': f"{name} description", 'path': path, 'digits': digits, 'point': point,
+            'trade_contract_size': contract_size, 'volume_min': 0.01, 'volume_step': 0.01, 'currency_base': name[:3],
+            'currency_profit': 'USD', 'trade_mode': 4, 'session_deals': 0, 'bid': 1.1}
+
+class CountingFetcher:
+    def __init__(self, infos):
+        self.infos = infos
+        self.calls = 0
+
+    def get_symbols(self, group=None):
+        self.calls += 1
+        return list(self.infos)
+
+class TestSymbolCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, 'symbol_specs.json')
+        self.fetcher = CountingFetcher([
+            symbol_info('EURUSD', 5, 0.00001, 100000, 'Forex\\Majors\\EURUSD'),
+            symbol_info('USDJPY', 3, 0.001, 100000, 'Forex\\Majors\\USDJPY'),
+            symbol_info('BTCUSD', 2, 0.01, 1, 'Crypto\\BTCUSD'),
+            symbol_info('ZZZUSD', 2, 0.01, 1, 'Exotic\\ZZZUSD'),
+        ])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_specs_are_typed_and_categorized(self):
+        catalog = SymbolCatalog(self.fetcher, self.cache_path)
+        spec = catalog['EURUSD']
+        self.assertIsInstance(spec, SymbolSpec)
+        self.assertEqual((spec.digits, spec.point, spec.trade_contract_size), (5, 0.00001, 100000.0))
+        self.assertEqual(spec.category, 'forex')
+        self.assertIsNone(catalog['ZZZUSD'].category)
+        self.assertNotIn('NOPE', catalog)
+        self.assertEqual(catalog.discover(['*USD']), ['BTCUSD', 'EURUSD', 'ZZZUSD'])
+        self.assertEqual(catalog.discover(['*USD*'], ['forex', 'crypto']), ['BTCUSD', 'EURUSD', 'USDJPY'])
+
+    def test_one_discovery_then_cache(self):
+        catalog = SymbolCatalog(self.fetcher, self.cache_path)
+        self.assertEqual(set(catalog.lookup(['EURUSD', 'BTCUSD'])), {'EURUSD', 'BTCUSD'})
+        self.assertEqual(self.fetcher.calls, 1)
+        # Unknown symbols do not trigger a discovery right after one
+        self.assertEqual(catalog.lookup(['NOPE']), {})
+        self.assertEqual(self.fetcher.calls, 1)
+
+        # A new process (or run) starts from the cache without calling the terminal
+        cached = pickle.loads(pickle.dumps(SymbolCatalog(self.fetcher, self.cache_path)))
+        cached.fetcher = self.fetcher
+        self.assertEqual(cached.lookup(['USDJPY'])['USDJPY'].digits, 3)
+        self.assertEqual(self.fetcher.calls, 1)
+        # ... until a symbol is missing from it
+        cached.lookup(['NOPE'])
+        self.assertEqual(self.fetcher.calls, 2)
+
+    def test_expired_cache_is_discovered_again(self):
+        SymbolCatalog(self.fetcher, self.cache_path).lookup(['EURUSD'])
+        with open(self.cache_path) as f:
+            cache = json.load(f)
+        cache['discovered_at'] = time.time() - 7200
+        with open(self.cache_path, 'w') as f:
+            json.dump(cache, f)
+        SymbolCatalog(self.fetcher, self.cache_path, ttl_seconds=3600).lookup(['EURUSD'])
+        self.assertEqual(self.fetcher.calls, 2)
+
+    def test_failed_discovery_keeps_the_cache(self):
+        SymbolCatalog(self.fetcher, self.cache_path).lookup(['EURUSD'])
+        with open(self.cache_path) as f:
+            cache = f.read()
+        self.fetcher.infos = []  # get_symbols returns [] when MetaTrader5 fails
+        catalog = SymbolCatalog(self.fetcher, self.cache_path)
+        self.assertEqual(set(catalog.lookup(['EURUSD', 'NOPE'])), {'EURUSD'})
+        with self.assertRaises(RuntimeError):
+            catalog.refresh()
+        with self.assertRaises(RuntimeError):
+            SymbolCatalog(self.fetcher, os.path.join(self.tmpdir.name, 'missing.json')).lookup(['EURUSD'])
+        self.assertEqual(catalog['USDJPY'].digits, 3)
+        with open(self.cache_path) as f:
+            self.assertEqual(f.read(), cache)
+
+    def test_journal_stores_specs_in_one_transaction(self):
+        journal = RunJournal(os.path.join(self.tmpdir.name, 'journal.sqlite'),
+                             snapshot_path=os.path.join(self.tmpdir.name, 'metadata.json'))
+        journal.add_symbol('EURUSD', {'name': 'EURUSD', 'description': 'Euro', 'last_timestamp': '2024-09-02 00:00:00'})
+        specs = SymbolCatalog(self.fetcher, self.cache_path).lookup(['EURUSD', 'BTCUSD'])
+        journal.add_symbols({symbol: spec.to_dict() for symbol, spec in specs.items()})
+        info = journal.get_symbol_info('EURUSD')
+        self.assertEqual((info['digits'], info['category']), (5, 'forex'))
+        self.assertEqual(info['last_timestamp'], '2024-09-02 00:00:00')
+        self.assertEqual(journal.get_symbol_info('BTCUSD')['trade_contract_size'], 1.0)
+        journal.close()
+
+    def test_symbol_category(self):
+        self.assertEqual(symbol_category('XAUUSD'), 'commodities')
+        self.assertEqual(symbol_category('SP500'), 'indices')
+        self.assertIsNone(symbol_category('UNKNOWN'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ETL.data_store import DataStore
+from ETL.feature_engineer import FeatureEngineer
+from ETL.features.symbol_specific.price_transformations import LogReturns
+from ETL.features.universal.correlation_metrics import ClosePriceCorrelation
+from ETL.features.universal.global_metrics import AverageCloseAllSymbols, MedianVolumeAllSymbols
+from ETL.panel import build_panel
+from ETL.universal_stream import UniversalFeatureStream
+
+class TestUniversalFeatureStream(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        uri = f"lmdb://{self.tmpdir.name}"
+        self.source = DataStore(library_name='symbol_specific', uri=uri)
+        self.target = DataStore(library_name='universal', uri=uri)
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2024-09-01', periods=3000, freq='min')
+        self.engineer = FeatureEngineer({'Price_Transformations': [LogReturns]}, {})
+        self.frames = {}
+        for i, symbol in enumerate(['BTCUSD', 'EURUSD', 'AAPL']):
+            symbol_index = index[i * 500:]  # different sessions
+            close = 100 + np.cumsum(rng.normal(0, 0.1, len(symbol_index)))
+            rates = pd.DataFrame({
+                'open': close,
+                'high': close + 0.05,
+                'low': close - 0.05,
+                'close': close,
+                'tick_volume': rng.integers(1, 100, len(symbol_index)),
+                'spread': np.full(len(symbol_index), 2),
+            }, index=symbol_index)
+            # Stored as the ETL stores it, with tick_volume renamed to volume
+            df = self.engineer.apply_symbol_features(self.engineer.add_base_features(rates), [LogReturns], symbol)
+            self.source.store_data(symbol, df)
+            self.frames[symbol] = df
+        self.features = [AverageCloseAllSymbols, MedianVolumeAllSymbols]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_blockwise_matches_full_computation(self):
+        stream = UniversalFeatureStream(self.engineer, self.source, self.target, 'Universal_Features', memory_limit_mb=0.05)
+        stats = stream.run(self.source.list_symbols(), self.features + [ClosePriceCorrelation],
+                           pd.Timestamp('2024-09-01'), pd.Timestamp('2024-09-03 02:00'))
+        self.assertGreater(stats['blocks'], 5)
+        self.assertLessEqual(stats['peak_block_bytes'], 0.05 * 1024 * 1024)
+
+        panel = build_panel(self.frames, ['close', 'volume', 'Log_Returns'], how='outer')
+        expected = self.engineer.compute_universal_features(panel, self.features)
+        stored = self.target.retrieve_data('Universal_Features')
+        self.assertTrue(stored['Median_Volume_All_Symbols'].notna().all())
+        self.assertNotIn('Close_Price_Correlation', ''.join(stored.columns))
+        pd.testing.assert_frame_equal(stored, expected, check_freq=False)
+
+    def test_block_length_follows_memory_limit(self):
+        stream = UniversalFeatureStream(self.engineer, self.source, self.target, 'Universal_Features', memory_limit_mb=1)
+        self.assertEqual(stream.block_length(2, 2), pd.Timedelta(minutes=1024 * 1024 // (2 * 2 * 8 * 3)))
+        self.assertGreater(stream.block_length(2, 2), stream.block_length(200, 2))
+
+    def test_retrieve_columns_and_range(self):
+        data = self.source.retrieve_data('BTCUSD', columns=['close'],
+                                         date_range=(pd.Timestamp('2024-09-01 00:10'), pd.Timestamp('2024-09-01 00:19')))
+        self.assertEqual(list(data.columns), ['close'])
+        self.assertEqual(len(data), 10)
+
+if __name__ == '__main__':
+    unittest.main()